@@ -1,8 +1,22 @@
-from flask import Flask, jsonify
+import time
+
+from flask import Flask, g, jsonify, request
 from flask_cors import CORS
-from app.logging_config import init_logger
+from app.logging_config import configure_logging, init_logger, log_stats
 from .routes import register_routes
-from app.services import camera_service, mqtt_service
+from app.services import camera_service, mqtt_service, event_service, memory_service, watchdog_service, thermal_service
+from app.core.camera.scheduling import scheduler
+from app.core.config import config_service
+from app.core.metrics import registry
+
+HTTP_REQUESTS = registry.counter(
+    "smartfactory_http_requests_total", "HTTP requests", ["method", "endpoint", "status"]
+)
+HTTP_SECONDS = registry.histogram(
+    "smartfactory_http_request_seconds",
+    "Time to produce an HTTP response (streams: until headers are sent)",
+    ["endpoint"],
+)
 
 def create_app(env: str | None = None) -> Flask:
     app = Flask(__name__, template_folder="templates", static_folder="static")
@@ -12,7 +26,10 @@ def create_app(env: str | None = None) -> Flask:
         app.config["ENV"] = env
         app.config["DEBUG"] = env.lower() == "development"
 
-    # Logger
+    # Logger: đọc lại LOG_* (sau load_dotenv), log request của werkzeug
+    # cũng đi qua queue chung
+    configure_logging()
+    init_logger("werkzeug")
     logger = init_logger(name="SmartFactory")
     app.logger = logger
     app.logger.info(f"Creating Flask app with env='{env}'")
@@ -20,9 +37,18 @@ def create_app(env: str | None = None) -> Flask:
     # CORS
     CORS(app, resources={r"/*": {"origins": "*"}})
 
+    # Scheduling profile (CPU affinity / OpenCV threads / ưu tiên thread web)
+    scheduler.configure(config_service.get_camera_config().scheduling)
+    register_scheduling_hooks(app)
+    register_metrics_hooks(app)
+
     # Init services
+    event_service.init_app(app)
     camera_service.init_app(app)
     mqtt_service.init_app(app)
+    memory_service.init_app(app)
+    watchdog_service.init_app(app)
+    thermal_service.init_app(app)
 
     # Register routes
     register_routes(app)
@@ -36,6 +62,39 @@ def create_app(env: str | None = None) -> Flask:
     app.logger.info("Flask app creation complete")
     return app
 
+def register_scheduling_hooks(app: Flask):
+    @app.before_request
+    def pin_web_thread():
+        # Thread request Flask → core / nice của role "web"
+        scheduler.pin("web")
+
+def register_metrics_hooks(app: Flask):
+    registry.gauge(
+        "smartfactory_log_queue_depth", "Log records waiting for the background writer"
+    ).set_function(lambda: log_stats()["queue_depth"])
+    registry.counter(
+        "smartfactory_log_records_dropped_total",
+        "Log records not written (queue_full / rate_limited)", ["reason"]
+    ).set_function(lambda: {
+        ("queue_full",): log_stats()["dropped"],
+        ("rate_limited",): log_stats()["suppressed"],
+    })
+
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        # Label theo route pattern (/api/camera/<x>) → số series không tăng theo URL
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        HTTP_REQUESTS.labels(request.method, endpoint, response.status_code).inc()
+
+        started = g.get("request_started")
+        if started is not None:
+            HTTP_SECONDS.labels(endpoint).observe(time.perf_counter() - started)
+        return response
+
 def register_error_handlers(app: Flask):
     @app.errorhandler(404)
     def not_found(e):
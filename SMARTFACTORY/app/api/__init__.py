@@ -2,10 +2,18 @@ from .api_camera import api_camera
 from .api_mqtt import api_mqtt
 from .api_colors import api_colors
 from .api_wifi import api_wifi
+from .api_events import api_events
+from .api_metrics import api_metrics
+from .api_profiler import api_profiler
+from .api_memory import api_memory
 
 __all__ = [
     "api_camera",
     "api_mqtt",
     "api_colors",
     "api_wifi",
+    "api_events",
+    "api_metrics",
+    "api_profiler",
+    "api_memory",
 ]
@@ -54,12 +54,41 @@ def stop_camera():
     })
 
 
+# ---------------------------------------------------------------------------
+
+@api_camera.post("/seek")
+@require_camera_running
+def seek_camera():
+    """
+    Tua nguồn file video / thư mục ảnh.
+
+    Body: {"frame": <index>} hoặc {"seconds": <giây>}
+    """
+    payload = request.get_json(silent=True) or {}
+    frame = payload.get("frame")
+    seconds = payload.get("seconds")
+
+    try:
+        frame = int(frame) if frame is not None else None
+        seconds = float(seconds) if seconds is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"status": "error", "message": "Invalid frame / seconds"}), 400
+
+    if not camera_service.seek(frame=frame, seconds=seconds):
+        return jsonify({
+            "status": "error",
+            "message": "Seek is only supported for file / directory sources"
+        }), 400
+
+    return jsonify({"status": "success", "frame": frame, "seconds": seconds})
+
+
 # ---------------------------------------------------------------------------
 
 @api_camera.get("/status")
 def camera_status():
     status = camera_service.get_status()
-    current_app.logger.info(f"/camera/status called, status={status}")
+    current_app.logger.debug("/camera/status called, status=%s", status)
     return jsonify({"status": "success", "data": status})
 
 
@@ -83,20 +112,78 @@ def video_stream() -> Response:
 
 # ---------------------------------------------------------------------------
 
+def _snapshot_response(snapshot, envelope_key=None):
+    """
+    Trả snapshot dưới dạng bytes đã cache của frame hiện tại.
+
+    - ?format=bin → binary gọn (FrameSnapshot.to_binary)
+    - mặc định    → JSON; envelope_key=None gộp các field snapshot vào
+                    object ngoài, ngược lại bọc trong {"data": ...}
+    """
+    if request.args.get("format") == "bin":
+        return Response(
+            snapshot.to_binary(),
+            mimetype="application/octet-stream",
+            headers={"X-Frame-Seq": str(snapshot.seq)},
+        )
+
+    body = snapshot.to_json()
+    if envelope_key is None:
+        body = b'{"status":"success",' + body[1:]
+    else:
+        body = b'{"status":"success","' + envelope_key.encode() + b'":' + body + b"}"
+
+    return Response(body, mimetype="application/json")
+
+
 @api_camera.get("/detections")
 @require_camera_running
 def camera_detections():
     """
-    Danh sách vật thể detect (đã chuẩn hoá).
+    Danh sách vật thể detect (đã chuẩn hoá) + track của frame gần nhất.
+
+    Response: {"status", "seq", "timestamp", "width", "height", "fps",
+               "detections": [...], "tracks": [...]}
+    Query: format=bin → binary (xem FrameSnapshot)
+    """
+    snapshot = camera_service.get_snapshot()
+    if snapshot is None:
+        return jsonify({
+            "status": "error",
+            "message": "Camera pipeline not ready"
+        }), 400
+
+    return _snapshot_response(snapshot)
+
+
+# ---------------------------------------------------------------------------
+
+@api_camera.get("/tracks")
+@require_camera_running
+def camera_tracks():
+    """
+    Metadata track theo frame (box, ID, màu, trajectory, seq)
+    để browser tự vẽ overlay lên canvas.
+
+    Query:
+    - after: seq client đã có → long-poll tới khi có frame mới
+    - timeout: thời gian chờ tối đa (giây, <= 5)
+    - format=bin → binary (xem FrameSnapshot)
     """
-    detections = camera_service.get_detections()
-    if detections is None:
+    after = request.args.get("after", type=int)
+    timeout = min(max(request.args.get("timeout", 2.0, type=float), 0.0), 5.0)
+
+    snapshot = camera_service.get_tracks(after=after, timeout=timeout)
+    if snapshot is None:
         return jsonify({
             "status": "error",
             "message": "Camera pipeline not ready"
         }), 400
 
-    return jsonify({"status": "success", "detections": detections})
+    return _snapshot_response(snapshot, envelope_key="data")
+
+
+# ---------------------------------------------------------------------------
 
 @api_camera.get("/list")
 def list_cameras():
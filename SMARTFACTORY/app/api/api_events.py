@@ -0,0 +1,35 @@
+# app/api/api_events.py
+from flask import Blueprint, Response, request
+
+from app.services.event_service import event_service
+
+api_events = Blueprint("events", __name__, url_prefix="/api/events")
+
+
+@api_events.get("/")
+def event_stream() -> Response:
+    """
+    Server-Sent Events: đẩy trạng thái khi có thay đổi.
+
+    Event:
+    - detections    → {"seq", "detections": [...]}
+    - tracks        → metadata overlay (chỉ khi overlay_mode = "client")
+    - camera_status → giống /api/camera/status
+    - mqtt_status   → {"connected"}
+    - conveyor      → {"user", "topic", "message"}
+    - memory_alert  → {"rss_mb", "growth_mb", "window_s", "top_components"}
+
+    Query:
+    - rate: số lần gửi tối đa / giây cho client này (mặc định 20)
+    """
+    rate = request.args.get("rate", type=float)
+    min_interval = 1.0 / rate if rate and rate > 0 else None
+
+    return Response(
+        event_service.stream(min_interval),
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache, no-store, must-revalidate",
+            "X-Accel-Buffering": "no",
+        }
+    )
@@ -0,0 +1,79 @@
+# app/api/api_memory.py
+from flask import Blueprint, jsonify, request
+
+from app.api.api_profiler import require_profiler_token
+from app.services.memory_service import memory_service
+
+api_memory = Blueprint("memory", __name__, url_prefix="/api/memory")
+
+
+@api_memory.get("/")
+def memory_status():
+    """
+    RSS, byte ước lượng theo thành phần, xu hướng RSS (MB/giờ), cảnh báo.
+
+    Query:
+    - history: kèm N mẫu RSS gần nhất [(time, rss_mb, components_mb)]
+    """
+    history = request.args.get("history", type=int)
+    return jsonify({"status": "success", "data": memory_service.get_status(history)})
+
+
+# ---------------------------------------------------------------------------
+# tracemalloc: tốn CPU / RAM và lộ đường dẫn source → cùng token với profiler
+# ---------------------------------------------------------------------------
+
+MAX_TRACEMALLOC_FRAMES = 100
+
+
+@api_memory.post("/tracemalloc/start")
+@require_profiler_token
+def tracemalloc_start():
+    """Bật tracemalloc + chụp baseline. Body (tuỳ chọn): {"frames": 10}"""
+    payload = request.get_json(silent=True) or {}
+    frames = payload.get("frames")
+
+    try:
+        frames = int(frames) if frames is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"status": "error", "message": "Invalid frames"}), 400
+    if frames is not None and not 1 <= frames <= MAX_TRACEMALLOC_FRAMES:
+        return jsonify({
+            "status": "error",
+            "message": f"frames must be between 1 and {MAX_TRACEMALLOC_FRAMES}"
+        }), 400
+
+    memory_service.start_tracemalloc(frames)
+    return jsonify({"status": "success", "message": "tracemalloc started"})
+
+
+@api_memory.get("/tracemalloc/diff")
+@require_profiler_token
+def tracemalloc_diff():
+    """
+    Vị trí cấp phát tăng nhiều nhất so với baseline.
+
+    Query:
+    - limit: số dòng (mặc định 20)
+    - reset: 1 → snapshot hiện tại thành baseline mới
+    - group: "lineno" (mặc định) | "filename" | "traceback"
+    """
+    group = request.args.get("group", "lineno")
+    if group not in ("lineno", "filename", "traceback"):
+        return jsonify({"status": "error", "message": "Invalid group"}), 400
+
+    diff = memory_service.tracemalloc_diff(
+        limit=request.args.get("limit", default=20, type=int),
+        reset=request.args.get("reset") in ("1", "true"),
+        group_by=group,
+    )
+    if diff is None:
+        return jsonify({"status": "error", "message": "tracemalloc not started"}), 400
+    return jsonify({"status": "success", "data": diff})
+
+
+@api_memory.post("/tracemalloc/stop")
+@require_profiler_token
+def tracemalloc_stop():
+    memory_service.stop_tracemalloc()
+    return jsonify({"status": "success", "message": "tracemalloc stopped"})
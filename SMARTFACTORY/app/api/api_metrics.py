@@ -0,0 +1,19 @@
+# app/api/api_metrics.py
+from flask import Blueprint, Response
+
+from app.core.metrics import registry
+
+api_metrics = Blueprint("metrics", __name__, url_prefix="/api/metrics")
+
+
+@api_metrics.get("/")
+def metrics() -> Response:
+    """
+    Metrics ở Prometheus text format (scrape_config: metrics_path=/api/metrics/).
+
+    - capture / detection FPS, tuổi frame khi detect
+    - thời gian từng stage detect / track / render / encode
+    - frame processed / dropped, detect chờ frame quá hạn, queue drops
+    - stream / SSE clients, MQTT publish & lỗi, HTTP requests
+    """
+    return Response(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
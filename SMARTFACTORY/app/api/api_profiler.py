@@ -0,0 +1,99 @@
+# app/api/api_profiler.py
+import hmac
+import os
+import time
+from functools import wraps
+
+from flask import Blueprint, Response, jsonify, request
+
+from app.core.profiler import ProfilerBusy, profiler
+
+api_profiler = Blueprint("profiler", __name__, url_prefix="/api/profiler")
+
+
+def require_profiler_token(f):
+    """
+    Decorator: chỉ cho phép khi header X-Profiler-Token (hoặc
+    Authorization: Bearer <token>) khớp biến môi trường PROFILER_TOKEN.
+    PROFILER_TOKEN trống → endpoint coi như không tồn tại.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        expected = os.getenv("PROFILER_TOKEN", "")
+        if not expected:
+            return jsonify({"status": "error", "message": "Profiler disabled"}), 404
+
+        token = request.headers.get("X-Profiler-Token", "")
+        auth = request.headers.get("Authorization", "")
+        if not token and auth.startswith("Bearer "):
+            token = auth[len("Bearer "):]
+
+        if not hmac.compare_digest(token.encode(), expected.encode()):
+            return jsonify({"status": "error", "message": "Invalid profiler token"}), 403
+        return f(*args, **kwargs)
+    return decorated
+
+
+def _render(profile):
+    """
+    Query:
+    - format: "json" (mặc định) → thống kê + hàm nóng của thread `focus`
+              "collapsed"       → file .folded cho flamegraph.pl / speedscope
+    - thread: chỉ lấy các thread có tên bắt đầu bằng giá trị này
+    - focus:  thread cần tóm tắt hàm nóng (mặc định "stage-detect")
+    - limit:  số hàm nóng (mặc định 15)
+    """
+    thread = request.args.get("thread") or None
+
+    if request.args.get("format") == "collapsed":
+        name = time.strftime("profile-%Y%m%d-%H%M%S.folded", time.localtime(profile.created))
+        return Response(
+            profile.collapsed(thread),
+            mimetype="text/plain",
+            headers={"Content-Disposition": f"attachment; filename={name}"},
+        )
+
+    focus = request.args.get("focus", "stage-detect")
+    limit = request.args.get("limit", default=15, type=int)
+    data = profile.summary(focus=focus, limit=limit)
+    if thread:
+        data["threads"] = {k: v for k, v in data["threads"].items() if k.startswith(thread)}
+    return jsonify({"status": "success", "data": data})
+
+
+# ---------------------------------------------------------------------------
+
+@api_profiler.get("/")
+@require_profiler_token
+def run_profiler():
+    """
+    Lấy mẫu stack mọi thread trong N giây rồi trả kết quả
+    (request block trong suốt thời gian đo).
+
+    Query thêm (ngoài các tham số của _render):
+    - seconds:     thời gian đo, mặc định 10, tối đa 60
+    - interval_ms: chu kỳ lấy mẫu, mặc định 5 ms
+
+    curl -H "X-Profiler-Token: $PROFILER_TOKEN" \\
+         "http://<host>:5000/api/profiler/?seconds=15&format=collapsed" -o detect.folded
+    """
+    seconds = request.args.get("seconds", default=10.0, type=float)
+    interval = request.args.get("interval_ms", default=5.0, type=float) / 1000.0
+
+    try:
+        profile = profiler.run(seconds=seconds, interval=interval)
+    except ProfilerBusy as e:
+        return jsonify({"status": "error", "message": str(e)}), 409
+
+    return _render(profile)
+
+
+# ---------------------------------------------------------------------------
+
+@api_profiler.get("/last")
+@require_profiler_token
+def last_profile():
+    """Kết quả phiên đo gần nhất (vd. tải file collapsed sau khi đã xem JSON)."""
+    if profiler.last is None:
+        return jsonify({"status": "error", "message": "No profile recorded yet"}), 404
+    return _render(profiler.last)
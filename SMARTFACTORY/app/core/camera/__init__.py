@@ -3,27 +3,47 @@ Camera processing package v1.0
 
 Provides modules for:
 - Camera capture with threading
+- Recorded sources (video file / image directory) and injectable clocks
+- Synthetic conveyor scenes with ground truth (synthetic:// source)
 - Color object definitions (HSV/BGR)
 - Color detection using HSV thresholds
 - Object tracking with IDs and trajectory
 - Drawing bounding boxes, labels, and trajectories
+- Per-frame immutable snapshots (JSON / binary cached)
 - Full pipeline integration
+- Adaptive quality control (detection FPS / scale, JPEG quality)
 """
 
+from .clock import SystemClock, ScaledClock, ManualClock
 from .camera_reader import CameraReader
+from .file_source import VideoFileSource, ImageDirSource
+from .synthetic_source import ConveyorScene, SyntheticSource
 from .color_object import ColorObject
 from .color_detector import ColorDetector
 from .tracker import Tracker
 from .draw_manager import DrawManager
+from .mjpeg_parser import MJPEGParser
 from .mjpeg_reader import MJPEGReader
+from .snapshot import FrameSnapshot
 from .pipeline import CameraPipeline
+from .quality import QualityController
 
 __all__ = [
+    "SystemClock",
+    "ScaledClock",
+    "ManualClock",
     "CameraReader",
+    "VideoFileSource",
+    "ImageDirSource",
+    "ConveyorScene",
+    "SyntheticSource",
     "ColorObject",
     "ColorDetector",
     "Tracker",
     "DrawManager",
+    "MJPEGParser",
     "MJPEGReader",
+    "FrameSnapshot",
     "CameraPipeline",
+    "QualityController",
 ]
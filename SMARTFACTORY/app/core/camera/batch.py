@@ -0,0 +1,307 @@
+"""
+Xử lý offline video đã ghi: ColorDetector → Tracker, không Flask,
+không chờ nhịp frame (chạy nhanh nhất có thể).
+
+Video dài được chia thành các chunk theo số frame, mỗi chunk chạy ở
+1 process riêng. Mỗi chunk đọc thêm `warmup` frame trước điểm bắt đầu
+để tracker seed lại các track đang dở; track cắt ngang ranh giới được
+ghép lại (stitch) theo màu + vị trí ở vùng warm-up.
+
+Kết quả:
+    - events.csv : 1 dòng "enter" + 1 dòng "exit" cho mỗi track
+    - counts.json: số track theo màu + thông tin lần chạy
+"""
+
+import csv
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from app.core.camera.clock import ManualClock
+from app.core.camera.color_detector import ColorDetector
+from app.core.camera.color_object import ColorObject
+from app.core.camera.file_source import open_file_source
+from app.core.camera.tracker import Tracker
+from app.logging_config import init_logger
+
+logger = init_logger("BatchProcessor")
+
+
+# ---------------------------------------------------------------------------
+# 1 chunk (chạy trong process con → chỉ nhận / trả dữ liệu picklable)
+# ---------------------------------------------------------------------------
+
+def _new_record(label, index, t, box):
+    return {
+        "color": label.name if label is not None else "unknown",
+        "first_frame": index, "first_time": t, "first_box": box,
+        "last_frame": index, "last_time": t, "last_box": box,
+        "frames": 0,
+        "warmup_last": None,     # (frame, cx, cy) lần cuối thấy trong warm-up
+        "in_chunk": False,       # đã xuất hiện từ frame start trở đi
+    }
+
+
+def process_chunk(task):
+    """
+    Chạy detect + track cho frame [start, stop) của 1 video.
+
+    task: dict gồm path, start, stop, warmup, scale, detector (min_area,
+    colors) và tracker (max_lost, max_history, match_dist).
+
+    Return dict {"start", "stop", "frames", "tracks": [record...]}.
+    Frame trong warm-up chỉ dùng để seed tracker, không được tính.
+    """
+    cv2.setNumThreads(1)
+
+    start, stop = task["start"], task["stop"]
+    first = max(0, start - task["warmup"])
+    scale = task.get("scale", 1)
+
+    colors = [
+        ColorObject(c["name"], c["lower"], c["upper"], c["bgr"],
+                    c.get("action_id", 0), c.get("duration_ms", 3000))
+        for c in task["colors"]
+    ]
+    detector = ColorDetector(colors, min_area=task["min_area"])
+
+    clock = ManualClock()
+    tracker = Tracker(clock=clock, **task["tracker"])
+
+    source = open_file_source(task["path"], fps=task.get("fps"))
+    if source is None or not source.open():
+        raise RuntimeError(f"Cannot open {task['path']}")
+
+    records = {}
+    frames = 0
+
+    try:
+        for packet in source.iter_frames(first, stop):
+            index, t, frame = packet
+            clock.set(t)
+
+            if scale != 1:
+                h, w = frame.shape[:2]
+                frame = cv2.resize(
+                    frame, ((w + scale - 1) // scale, (h + scale - 1) // scale),
+                    interpolation=cv2.INTER_AREA,
+                )
+
+            detections = detector.detect(frame, scale=scale)
+            tracked = tracker.update(
+                [(x, y, w, h) for x, y, w, h, _ in detections],
+                [obj for _, _, _, _, obj in detections],
+            )
+
+            in_chunk = index >= start
+            if in_chunk:
+                frames += 1
+
+            for obj_id, box in tracked:
+                rec = records.get(obj_id)
+                if rec is None:
+                    rec = records[obj_id] = _new_record(
+                        tracker.get_label(obj_id), index, t, box
+                    )
+
+                rec["last_frame"], rec["last_time"], rec["last_box"] = index, t, box
+
+                if in_chunk:
+                    rec["frames"] += 1
+                    rec["in_chunk"] = True
+                else:
+                    x, y, w, h = box
+                    rec["warmup_last"] = (index, x + w / 2, y + h / 2)
+    finally:
+        source.close()
+
+    # Track chỉ sống trong warm-up thuộc về chunk trước
+    tracks = [rec for rec in records.values() if rec["in_chunk"]]
+
+    return {"start": start, "stop": stop, "frames": frames, "tracks": tracks}
+
+
+# ---------------------------------------------------------------------------
+# Ghép kết quả các chunk
+# ---------------------------------------------------------------------------
+
+def _center(box):
+    x, y, w, h = box
+    return x + w / 2, y + h / 2
+
+
+def stitch(chunks, match_dist, max_gap):
+    """
+    Ghép track cắt ngang ranh giới chunk.
+
+    Track của chunk sau được seed trong warm-up (warmup_last != None)
+    được nối vào track cùng màu của chunk trước còn sống tới gần ranh
+    giới, nếu tâm box lệch < match_dist (ghép tham lam theo khoảng cách).
+    """
+    chunks = sorted(chunks, key=lambda c: c["start"])
+    merged = []
+    open_tracks = []     # track của chunk trước còn có thể nối tiếp
+
+    for chunk in chunks:
+        start = chunk["start"]
+        candidates = [
+            rec for rec in open_tracks
+            if rec["last_frame"] >= start - 1 - max_gap
+        ]
+
+        pairs = []
+        for rec in chunk["tracks"]:
+            if rec["warmup_last"] is None:
+                continue
+            _, cx, cy = rec["warmup_last"]
+            for prev in candidates:
+                if prev["color"] != rec["color"]:
+                    continue
+                px, py = _center(prev["last_box"])
+                dist = math.hypot(cx - px, cy - py)
+                if dist < match_dist:
+                    pairs.append((dist, id(rec), rec, prev))
+
+        used_prev, used_rec = set(), set()
+        for _, _, rec, prev in sorted(pairs, key=lambda p: (p[0], p[1])):
+            if id(prev) in used_prev or id(rec) in used_rec:
+                continue
+            used_prev.add(id(prev))
+            used_rec.add(id(rec))
+
+            prev["last_frame"] = rec["last_frame"]
+            prev["last_time"] = rec["last_time"]
+            prev["last_box"] = rec["last_box"]
+            prev["frames"] += rec["frames"]
+            rec["merged_into"] = prev
+
+        next_open = []
+        for rec in chunk["tracks"]:
+            target = rec.get("merged_into")
+            if target is None:
+                merged.append(rec)
+                target = rec
+            next_open.append(target)
+        open_tracks = next_open
+
+    merged.sort(key=lambda r: (r["first_frame"], r["first_box"]))
+    return merged
+
+
+# ---------------------------------------------------------------------------
+# API chính
+# ---------------------------------------------------------------------------
+
+def plan_chunks(total_frames, chunk_frames):
+    """Chia [0, total_frames) thành các chunk [start, stop)."""
+    if not total_frames or chunk_frames <= 0 or chunk_frames >= total_frames:
+        return [(0, total_frames or None)]
+
+    return [
+        (start, min(start + chunk_frames, total_frames))
+        for start in range(0, total_frames, chunk_frames)
+    ]
+
+
+def process_video(path, colors, detection, tracker, workers=None,
+                  chunk_seconds=300.0, warmup_seconds=5.0, scale=1,
+                  min_frames=3, fps=None):
+    """
+    Xử lý 1 video / thư mục ảnh, trả về (tracks, summary).
+
+    colors   : list dict màu (giống colors.json)
+    detection: {"min_area": ...}
+    tracker  : {"max_lost", "max_history", "match_dist"}
+    """
+    source = open_file_source(path, fps=fps)
+    if source is None or not source.open():
+        raise FileNotFoundError(f"Cannot open video source: {path}")
+
+    source_fps = source.source_fps
+    total = source.frame_count
+    source.close()
+
+    chunk_frames = int(chunk_seconds * source_fps)
+    warmup = int(warmup_seconds * source_fps)
+    ranges = plan_chunks(total, chunk_frames)
+
+    task_base = {
+        "path": path,
+        "fps": fps,
+        "warmup": warmup,
+        "scale": scale,
+        "colors": colors,
+        "min_area": detection["min_area"],
+        "tracker": tracker,
+    }
+    tasks = [dict(task_base, start=start, stop=stop) for start, stop in ranges]
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+    logger.info(
+        f"Batch {path}: {total or '?'} frames @ {source_fps:.1f} fps, "
+        f"{len(tasks)} chunk(s), {workers} worker(s)"
+    )
+
+    t0 = time.perf_counter()
+    if workers == 1:
+        chunks = [process_chunk(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(process_chunk, tasks))
+    elapsed = time.perf_counter() - t0
+
+    max_gap = int(tracker.get("max_lost", 15) * source_fps)
+    tracks = [
+        rec for rec in stitch(chunks, tracker.get("match_dist", 80), max_gap)
+        if rec["frames"] >= min_frames
+    ]
+
+    frames = sum(chunk["frames"] for chunk in chunks)
+    counts = {}
+    for rec in tracks:
+        counts[rec["color"]] = counts.get(rec["color"], 0) + 1
+
+    summary = {
+        "source": path,
+        "fps": source_fps,
+        "frames": frames,
+        "chunks": len(tasks),
+        "workers": workers,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_fps": round(frames / elapsed, 1) if elapsed > 0 else None,
+        "tracks": len(tracks),
+        "counts": counts,
+    }
+    return tracks, summary
+
+
+# ---------------------------------------------------------------------------
+# Ghi kết quả
+# ---------------------------------------------------------------------------
+
+EVENT_FIELDS = ["track_id", "color", "event", "frame", "time", "x", "y", "w", "h"]
+
+
+def write_events_csv(tracks, path):
+    """1 dòng enter + 1 dòng exit cho mỗi track (track_id đánh số từ 1)."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(EVENT_FIELDS)
+
+        for track_id, rec in enumerate(tracks, start=1):
+            for event, prefix in (("enter", "first"), ("exit", "last")):
+                x, y, w, h = rec[f"{prefix}_box"]
+                writer.writerow([
+                    track_id, rec["color"], event,
+                    rec[f"{prefix}_frame"], round(rec[f"{prefix}_time"], 3),
+                    x, y, w, h,
+                ])
+
+
+def write_counts_json(summary, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
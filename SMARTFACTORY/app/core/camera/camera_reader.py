@@ -1,21 +1,43 @@
 import cv2
-import time
 import threading
+from app.core.camera.frame_ring import FrameRing
+from app.core.camera.scheduling import scheduler
+from app.core.metrics import registry
 from app.logging_config import init_logger
 
 logger = init_logger("CameraReader")
 
+CAPTURE_FRAMES = registry.counter(
+    "smartfactory_capture_frames_total", "Frames delivered by the capture source", ["source"]
+)
+CAPTURE_ERRORS = registry.counter(
+    "smartfactory_capture_errors_total", "Failed reads / reconnects of the capture source", ["source"]
+)
+
 
 class CameraReader:
     """
-    Low-level camera reader (USB or MJPEG IP stream).
+    Low-level camera reader (USB, MJPEG IP stream, video file or
+    image directory).
     Handles:
         - automatic reconnect
         - threaded frame grabbing
-        - thread-safe latest frame storage
+        - ring of preallocated frame slots with sequence numbers
+          and capture timestamps (see FrameRing)
+        - file / directory sources (see FileSource) with realtime,
+          fixed-fps or as-fast-as-possible playback, loop and seek,
+          paced by an injectable clock
+        - reduced-scale reads (scale = 1, 2, 4, 8): MJPEG frames are
+          decoded directly at that size, USB frames are downscaled
     """
 
-    def __init__(self, src=0, width=640, height=480, fps=60, reconnect_delay=2):
+    SCALES = (1, 2, 4, 8)
+
+    # USB: consecutive failed reads before the device is reopened
+    MAX_READ_FAILURES = 50
+
+    def __init__(self, src=0, width=640, height=480, fps=60, reconnect_delay=2, ring_size=4,
+                 decode_workers=0, decode_scale=1, clock=None, playback=None, start_seq=0):
         self.src = src
         self.width = width
         self.height = height
@@ -24,17 +46,28 @@ class CameraReader:
 
         # State
         self.cap = None
-        self.frame = None
         self.running = False
         self.is_mjpeg = False
+        self.ring_size = ring_size
+        self.start_seq = start_seq      # continue seq numbers of a replaced reader
+
+        # MJPEG only: decode frames eagerly on a worker pool (0 = lazy decode)
+        self.decode_workers = decode_workers
+        self.decode_scale = decode_scale
+
+        # File / directory sources: playback options + clock for pacing
+        self.clock = clock
+        self.playback = playback or {}
+        self.source = None
+        self.ring = FrameRing(ring_size, start_seq)
 
-        self.lock = threading.Lock()
         self.thread = None
+        self._stop_event = threading.Event()
 
-        # Detect MJPEG stream URL
+        # Detect MJPEG stream URL / recorded file / USB device
         if isinstance(src, str) and src.startswith("http"):
             self._init_mjpeg(src)
-        else:
+        elif not self._init_file(src):
             self._init_usb()
 
     # ----------------------------------------------------------------------
@@ -72,74 +105,232 @@ class CameraReader:
         from app.core.camera.mjpeg_reader import MJPEGReader
         self.is_mjpeg = True
 
-        self.reader = MJPEGReader(url)
+        self.reader = MJPEGReader(
+            url,
+            ring_size=self.ring_size,
+            decode_workers=self.decode_workers,
+            decode_scale=self.decode_scale,
+            start_seq=self.start_seq,
+        )
+        self.ring = self.reader.ring
         self.reader.start()
 
         self.running = True
         logger.info(f"Started MJPEG stream: url={url}")
 
+    # ----------------------------------------------------------------------
+    # Init video file / image directory
+    # ----------------------------------------------------------------------
+    def _init_file(self, src):
+        from app.core.camera.file_source import open_file_source
+
+        source = open_file_source(
+            src,
+            mode=self.playback.get("mode", "realtime"),
+            fps=self.playback.get("fps") or self.fps,
+            loop=self.playback.get("loop", False),
+            ring_size=self.ring_size,
+            clock=self.clock,
+            start_seq=self.start_seq,
+        )
+        if source is None:
+            return False
+
+        self.source = source
+        self.ring = source.ring
+        self.running = source.start()
+        if not self.running:
+            logger.error(f"CameraReader: cannot open file source {src}")
+        return True
+
+    def seek(self, index=None, seconds=None):
+        """
+        File sources only: jump to a frame index (or a time in seconds).
+        Returns False for live cameras.
+        """
+        if self.source is None:
+            return False
+        if seconds is not None:
+            self.source.seek_time(seconds)
+        else:
+            self.source.seek(index or 0)
+        return True
+
     # ----------------------------------------------------------------------
     # Worker Thread
     # ----------------------------------------------------------------------
     def _start_thread(self):
         self.running = True
-        self.thread = threading.Thread(target=self._update_loop, daemon=True)
+        self.thread = threading.Thread(target=self._update_loop, name="capture-usb", daemon=True)
         self.thread.start()
 
     def _update_loop(self):
-        """Background loop to read frames continuously."""
-        min_interval = 1.0 / max(self.fps, 1e-3)
+        """
+        Background loop to read frames continuously.
 
-        while self.running:
-            start = time.time()
+        cap.read() blocks until the driver delivers the next frame (paced
+        by CAP_PROP_FPS), so no extra sleep is added; every commit wakes
+        consumers blocked in wait_next().
+        """
+        scheduler.pin("capture")
+        captured = CAPTURE_FRAMES.labels("usb")
+        errors = CAPTURE_ERRORS.labels("usb")
+        failures = 0
 
+        while self.running:
             if self.cap is None or not self.cap.isOpened():
                 logger.warning("Camera offline → reconnecting...")
-                time.sleep(self.reconnect_delay)
+                errors.inc()
+                if self._stop_event.wait(self.reconnect_delay):
+                    break
                 self._open_camera()
                 continue
 
-            grabbed, frame = self.cap.read()
+            # Ghi thẳng vào slot cũ nhất của ring (không cấp phát mới)
+            buf = self.ring.next_buffer()
+            grabbed, frame = self.cap.read(buf) if buf is not None else self.cap.read()
 
             if grabbed:
-                with self.lock:
-                    self.frame = frame
+                self.ring.commit(frame)
+                captured.inc()
+                failures = 0
+                continue
 
-            elapsed = time.time() - start
-            time.sleep(max(0, min_interval - elapsed))
+            errors.inc()
+            failures += 1
+            if failures >= self.MAX_READ_FAILURES:
+                # Device still "opened" but returns nothing → reopen it
+                logger.warning(f"{failures} consecutive read failures → reopening camera")
+                failures = 0
+                self.cap.release()
+                continue
+
+            if self._stop_event.wait(0.01):
+                # Read failed: back off briefly instead of spinning
+                break
 
     # ----------------------------------------------------------------------
     # Read Frame
     # ----------------------------------------------------------------------
-    def read(self):
-        """Return latest frame (thread-safe)."""
+    def _scaled(self, packet, scale):
+        """Downscale a USB packet by 1/scale (new array, ring untouched)."""
+        if packet is None or scale == 1:
+            return packet
+        if scale not in self.SCALES:
+            raise ValueError(f"Unsupported read scale: {scale}")
+
+        h, w = packet.frame.shape[:2]
+        size = ((w + scale - 1) // scale, (h + scale - 1) // scale)
+        return packet._replace(
+            frame=cv2.resize(packet.frame, size, interpolation=cv2.INTER_AREA)
+        )
+
+    def read(self, scale=1):
+        """
+        Return latest frame as a read-only view (no copy), or None.
+        Copy it before drawing on it or keeping it beyond a few frames.
+        """
+        packet = self.read_packet(scale)
+        return packet.frame if packet is not None else None
+
+    def read_packet(self, scale=1):
+        """Return latest FramePacket(seq, timestamp, frame) or None."""
         if self.is_mjpeg:
-            return self.reader.read()
+            return self.reader.read_packet(scale)
+        return self._scaled(self.ring.latest(), scale)
+
+    def get_packet(self, seq, scale=1):
+        """
+        Return the FramePacket with this exact seq, or None once the
+        ring has overwritten it. Used to fetch the full-size frame
+        matching a detection done at reduced scale.
+        """
+        if self.is_mjpeg:
+            return self.reader.get_packet(seq, scale)
+        return self._scaled(self.ring.get(seq), scale)
+
+    def wait_next(self, after_seq, timeout=None, scale=1):
+        """
+        Block until a frame newer than after_seq is captured.
+        Returns FramePacket, or None on timeout. For MJPEG sources
+        packet.frame is None when the JPEG could not be decoded.
+        """
+        if self.is_mjpeg:
+            return self.reader.wait_next(after_seq, timeout, scale)
+        return self._scaled(self.ring.wait_next(after_seq, timeout), scale)
+
+    def wait_jpeg(self, after_seq, timeout=None):
+        """
+        MJPEG only: block until a frame newer than after_seq arrives and
+        return FramePacket whose frame is the camera's original JPEG bytes
+        (no decode). Returns None on timeout or for USB sources.
+        """
+        if not self.is_mjpeg:
+            return None
+        return self.ring.wait_next(after_seq, timeout)
 
-        with self.lock:
-            return self.frame.copy() if self.frame is not None else None
+    @property
+    def frames_captured(self):
+        return self.ring.seq
+
+    def decode_stats(self):
+        """DecodePool counters (MJPEG with decode_workers > 0), else None."""
+        if self.is_mjpeg and self.reader.pool is not None:
+            return dict(self.reader.pool.stats(), scale=self.reader.decode_scale)
+        return None
+
+    def set_decode_scale(self, scale):
+        """MJPEG: retarget the decode pool to 1/scale frames (no-op otherwise)."""
+        self.decode_scale = scale
+        if self.is_mjpeg:
+            self.reader.set_decode_scale(scale)
+
+    def frame_age(self):
+        """Seconds since the last captured frame (None before the first one)."""
+        return self.ring.age()
+
+    def memory_usage(self):
+        """Bytes held by the capture side (ring slots, MJPEG decode caches)."""
+        if self.is_mjpeg:
+            return self.reader.memory_usage()
+        return {"ring": self.ring.nbytes()}
 
     def is_opened(self):
-        """Check whether camera (USB or MJPEG) is opened successfully."""
+        """Check whether camera (USB, MJPEG or file) is opened successfully."""
+        if self.source is not None:
+            return self.source.is_opened()
+
         if self.is_mjpeg:
             # MJPEG stream = ok only when at least 1 frame received
-            return self.reader.frame is not None
+            return self.ring.last_commit > 0
 
         return self.cap is not None and self.cap.isOpened()
 
     def stop(self):
         """Stop the camera safely."""
         self.running = False
+        self._stop_event.set()
+
+        # File source stop
+        if self.source is not None:
+            self.source.stop()
+            return
 
         # MJPEG stop
         if self.is_mjpeg:
             self.reader.stop()
+            self.ring.wake_all()
             return
 
         # USB stop
         if self.thread:
             self.thread.join(timeout=1)
-        if self.cap:
+        if self.thread and self.thread.is_alive():
+            # Still blocked inside cap.read(): releasing the capture under
+            # it can crash the driver, leave it to the daemon thread
+            logger.warning("Capture thread still blocked in read(), abandoning it")
+        elif self.cap:
             self.cap.release()
 
+        self.ring.wake_all()
         logger.info("CameraReader stopped")
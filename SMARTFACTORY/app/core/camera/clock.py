@@ -0,0 +1,100 @@
+import threading
+import time
+
+
+class SystemClock:
+    """
+    Đồng hồ thật (mặc định). Mọi thành phần pipeline lấy thời gian qua
+    clock thay vì gọi time.time() trực tiếp → có thể thay bằng
+    ScaledClock / ManualClock khi replay video, test, benchmark.
+
+    API:
+        time()              → thời điểm hiện tại (giây, kiểu time.time())
+        sleep(seconds)      → ngủ theo thời gian của clock
+        wait(event, seconds)→ như event.wait() nhưng tính theo clock
+    """
+
+    speed = 1.0
+
+    def time(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def wait(self, event, seconds):
+        return event.wait(max(0.0, seconds))
+
+
+class ScaledClock(SystemClock):
+    """
+    Thời gian chạy nhanh / chậm hơn thực speed lần.
+
+    speed = 10 → 1 giây thật = 10 giây của clock: source phát video
+    nhanh gấp 10, còn TTL trajectory, max_lost của tracker, FPS... vẫn
+    tính theo thời gian clock nên hành vi pipeline giữ nguyên.
+    """
+
+    def __init__(self, speed=1.0, start=None):
+        self.speed = float(speed) if speed and speed > 0 else 1.0
+        self._real0 = time.time()
+        self._clock0 = self._real0 if start is None else float(start)
+
+    def time(self):
+        return self._clock0 + (time.time() - self._real0) * self.speed
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds / self.speed)
+
+    def wait(self, event, seconds):
+        return event.wait(max(0.0, seconds) / self.speed)
+
+
+class ManualClock(SystemClock):
+    """
+    Clock chỉ tiến khi được gọi advance() / sleep() → kết quả xác định
+    (deterministic) cho test và xử lý offline.
+
+    sleep(s) tiến clock s giây và trả về ngay; wait(event, s) tương tự
+    (trả True nếu event đã set).
+    """
+
+    speed = float("inf")
+
+    def __init__(self, start=0.0):
+        self._now = float(start)
+        self._lock = threading.Lock()
+
+    def time(self):
+        return self._now
+
+    def advance(self, seconds):
+        with self._lock:
+            self._now += max(0.0, seconds)
+        return self._now
+
+    def set(self, timestamp):
+        with self._lock:
+            self._now = float(timestamp)
+
+    def sleep(self, seconds):
+        self.advance(seconds)
+
+    def wait(self, event, seconds):
+        if event.is_set():
+            return True
+        self.advance(seconds)
+        return event.is_set()
+
+
+def make_clock(speed=1.0):
+    """speed = 1 → SystemClock, khác 1 → ScaledClock(speed)."""
+    if speed and speed > 0 and speed != 1:
+        return ScaledClock(speed)
+    return SystemClock()
+
+
+# Clock dùng chung khi không truyền clock
+system_clock = SystemClock()
@@ -21,14 +21,21 @@ class ColorDetector:
 
     # ----------------------------------------------------------------------
 
-    def detect(self, frame):
-        """Run HSV-based color detection."""
+    def detect(self, frame, scale=1):
+        """
+        Run HSV-based color detection.
+
+        scale: frame was reduced by 1/scale (CameraReader.read(scale=...)).
+        min_area is compared in full-resolution pixels and returned boxes
+        are mapped back to full-resolution coordinates.
+        """
         if frame is None:
             logger.warning("[ColorDetector] Empty frame")
             return []
 
         hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
         detections = []
+        min_area = self.min_area / (scale * scale)
 
         for obj in self.color_objects:
             # Create mask based on HSV threshold
@@ -45,10 +52,12 @@ class ColorDetector:
 
             for cnt in contours:
                 area = cv2.contourArea(cnt)
-                if area < self.min_area:
+                if area < min_area:
                     continue
 
                 x, y, w, h = cv2.boundingRect(cnt)
+                if scale != 1:
+                    x, y, w, h = x * scale, y * scale, w * scale, h * scale
 
                 # Copy ColorObject but PRESERVE metadata
                 detected_obj = ColorObject(
@@ -0,0 +1,110 @@
+import threading
+from collections import deque
+
+import cv2
+import numpy as np
+
+from app.core.camera.scheduling import scheduler
+from app.logging_config import init_logger
+
+logger = init_logger("DecodePool")
+
+
+class DecodePool:
+    """
+    Pool thread decode JPEG song song (cv2.imdecode nhả GIL).
+
+    - submit(seq, timestamp, jpg): đưa frame nén vào hàng chờ. Hàng chờ
+      tối đa = số worker; đầy thì bỏ frame cũ nhất chưa decode → độ trễ
+      capture không tăng dần khi camera nhanh hơn khả năng decode.
+    - Kết quả giao theo đúng thứ tự seq qua callback
+      on_frame(seq, timestamp, frame, flag). Worker xong 1 frame cũ hơn frame
+      đã giao → bỏ luôn (không giao ngược thứ tự).
+    - flag đổi được lúc chạy; callback nhận cờ imdecode thực tế của frame.
+    """
+
+    def __init__(self, workers, on_frame, flag=cv2.IMREAD_COLOR, name="decode"):
+        self.workers = max(1, int(workers))
+        self.on_frame = on_frame
+        self.flag = flag
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._deliver_lock = threading.Lock()
+        self._last_delivered = 0
+        self.running = False
+
+        # Thống kê
+        self.decoded = 0
+        self.dropped_queue = 0      # bỏ khi còn trong hàng chờ
+        self.dropped_late = 0       # decode xong nhưng đã có frame mới hơn
+        self.failed = 0
+
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"{name}-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+
+    # ----------------------------------------------------------------------
+
+    def start(self):
+        self.running = True
+        for t in self._threads:
+            t.start()
+        logger.info(f"DecodePool started with {self.workers} workers")
+
+    def stop(self):
+        with self._cond:
+            self.running = False
+            self._queue.clear()
+            self._cond.notify_all()
+
+    # ----------------------------------------------------------------------
+
+    def submit(self, seq, timestamp, jpg):
+        with self._cond:
+            if len(self._queue) >= self.workers:
+                self._queue.popleft()
+                self.dropped_queue += 1
+            self._queue.append((seq, timestamp, jpg))
+            self._cond.notify()
+
+    def _worker(self):
+        scheduler.pin("capture")
+
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or not self.running)
+                if not self.running:
+                    return
+                seq, timestamp, jpg = self._queue.popleft()
+
+            flag = self.flag
+            frame = cv2.imdecode(np.frombuffer(jpg, dtype=np.uint8), flag)
+            if frame is None:
+                self.failed += 1
+                continue
+            frame.flags.writeable = False
+
+            with self._deliver_lock:
+                if seq <= self._last_delivered:
+                    self.dropped_late += 1
+                    continue
+                self._last_delivered = seq
+                self.decoded += 1
+
+                try:
+                    self.on_frame(seq, timestamp, frame, flag)
+                except Exception as e:
+                    logger.exception(f"DecodePool callback error: {e}")
+
+    # ----------------------------------------------------------------------
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "decoded": self.decoded,
+            "dropped_queue": self.dropped_queue,
+            "dropped_late": self.dropped_late,
+            "failed": self.failed,
+        }
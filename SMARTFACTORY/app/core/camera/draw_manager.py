@@ -10,11 +10,18 @@ class DrawManager:
     Quản lý việc vẽ bounding box, nhãn, trajectory lên frame.
 
     - overlay riêng (alpha blending) → không làm hỏng frame gốc
-    - trajectory (đường chuyển động)
-    - gán ID + label
+    - chỉ xoá / blend vùng overlay thực sự được vẽ (dirty region)
+    - trajectory (đường chuyển động), 1 lệnh polyline / track
+    - gán ID + label (màu lấy từ label gắn trên track)
     - hỗ trợ hiển thị FPS
     """
 
+    # Lề cộng thêm quanh vùng vẽ (độ dày nét + anti-alias)
+    DIRTY_MARGIN = 3
+
+    # Nền label: gần đen nhưng gray khác 0 → vẫn nằm trong mask blend
+    LABEL_BG = (1, 1, 1)
+
     def __init__(self, tracker, show_fps=True, alpha=0.2, trajectory_ttl=3.0):
         self.tracker = tracker
         self.show_fps = show_fps
@@ -22,25 +29,63 @@ class DrawManager:
         self.traj_ttl = trajectory_ttl
         self.overlay = None
 
+        # Vùng overlay đã vẽ: [x0, y0, x1, y1] hoặc None
+        self._dirty = None
+
     # ----------------------------------------------------------------------
 
     def _ensure_overlay(self, frame):
-        """Reset overlay mỗi frame nếu kích thước không khớp."""
+        """Chỉ xoá lại vùng đã vẽ ở frame trước thay vì cả overlay."""
         if self.overlay is None or self.overlay.shape != frame.shape:
             self.overlay = np.zeros_like(frame)
+        elif self._clip_dirty(frame) is not None:
+            x0, y0, x1, y1 = self._dirty
+            self.overlay[y0:y1, x0:x1] = 0
+
+        self._dirty = None
+
+    # ----------------------------------------------------------------------
+
+    def _mark_dirty(self, x0, y0, x1, y1):
+        """Mở rộng vùng dirty để bao thêm hình chữ nhật (x0, y0) → (x1, y1)."""
+        m = self.DIRTY_MARGIN
+        x0, y0, x1, y1 = x0 - m, y0 - m, x1 + m + 1, y1 + m + 1
+
+        if self._dirty is None:
+            self._dirty = [x0, y0, x1, y1]
+        else:
+            d = self._dirty
+            d[0], d[1] = min(d[0], x0), min(d[1], y0)
+            d[2], d[3] = max(d[2], x1), max(d[3], y1)
+
+    def _clip_dirty(self, frame):
+        """Cắt vùng dirty theo kích thước frame. Rỗng → None."""
+        if self._dirty is None:
+            return None
+
+        frame_h, frame_w = frame.shape[:2]
+        x0, y0, x1, y1 = self._dirty
+        x0, y0 = max(0, x0), max(0, y0)
+        x1, y1 = min(frame_w, x1), min(frame_h, y1)
+
+        if x0 >= x1 or y0 >= y1:
+            self._dirty = None
         else:
-            self.overlay[:] = 0
+            self._dirty = [x0, y0, x1, y1]
+
+        return self._dirty
 
     # ----------------------------------------------------------------------
 
     def _draw_label(self, label, x, y, color):
         """Vẽ label nền đen + chữ trắng."""
         (tw, th), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
-        cv2.rectangle(self.overlay, (x, y - th - 8), (x + tw + 6, y), (0, 0, 0), -1)
+        cv2.rectangle(self.overlay, (x, y - th - 8), (x + tw + 6, y), self.LABEL_BG, -1)
         cv2.putText(
             self.overlay, label, (x + 3, y - 3),
             cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1
         )
+        self._mark_dirty(x, y - th - 8, x + tw + 6, y)
 
     # ----------------------------------------------------------------------
 
@@ -51,16 +96,51 @@ class DrawManager:
         if len(traj) < 2:
             return
 
-        for i in range(1, len(traj)):
-            cv2.line(self.overlay, traj[i - 1], traj[i], color, 2)
+        pts = np.array(traj, dtype=np.int32)
+
+        # Toàn bộ đường đi trong 1 lệnh vẽ
+        cv2.polylines(self.overlay, [pts.reshape(-1, 1, 2)], False, color, 2)
 
         # Mũi tên ở cuối đường đi
         cv2.arrowedLine(self.overlay, traj[-2], traj[-1], color, 2, tipLength=0.3)
 
+        # Đầu mũi tên có thể lệch khỏi đoạn thẳng tối đa tipLength * độ dài
+        (ax, ay), (bx, by) = traj[-2], traj[-1]
+        tip = int(0.3 * max(abs(bx - ax), abs(by - ay))) + 1
+
+        x, y, w, h = cv2.boundingRect(pts)
+        self._mark_dirty(x - tip, y - tip, x + w + tip, y + h + tip)
+
     # ----------------------------------------------------------------------
 
-    def render(self, frame, tracked, detections, fps=None):
-        """Vẽ tất cả thông tin lên frame."""
+    def _blend_dirty(self, frame):
+        """
+        Alpha-blend overlay vào frame, chỉ trong vùng dirty
+        và chỉ tại các pixel overlay khác 0.
+        """
+        region = self._clip_dirty(frame)
+        if region is None:
+            return
+
+        x0, y0, x1, y1 = region
+        roi = frame[y0:y1, x0:x1]
+        ov = self.overlay[y0:y1, x0:x1]
+
+        blended = cv2.addWeighted(ov, self.alpha, roi, 1 - self.alpha, 0)
+
+        # Mask = pixel overlay khác 0 (mọi màu vẽ đều có gray >= 1)
+        mask = cv2.cvtColor(ov, cv2.COLOR_BGR2GRAY)
+        cv2.copyTo(blended, mask, roi)
+
+    # ----------------------------------------------------------------------
+
+    def render(self, frame, tracked, detections=None, fps=None):
+        """
+        Vẽ tất cả thông tin lên frame.
+
+        detections được giữ lại cho tương thích; màu / tên của object
+        lấy từ label gắn trên track (Tracker.update(boxes, labels)).
+        """
         if frame is None:
             return None
 
@@ -70,24 +150,17 @@ class DrawManager:
             # ===================== VẼ ĐỐI TƯỢNG ======================
             for obj_id, box in tracked:
                 x, y, w, h = box
-                cx, cy = x + w // 2, y + h // 2
-
-                # Ghép với object màu (ColorObject)
-                color_obj = None
-                for dx, dy, dw, dh, obj in detections:
-                    dcx, dcy = dx + dw // 2, dy + dh // 2
-                    if abs(cx - dcx) < 5 and abs(cy - dcy) < 5:
-                        color_obj = obj
-                        break
 
+                color_obj = self.tracker.get_label(obj_id)
                 if color_obj is None:
                     continue
 
-                color = tuple(int(c) for c in color_obj.bgr)
+                color = color_obj.bgr
                 label = f"{color_obj.name} | ID:{obj_id}"
 
                 # Bounding box
                 cv2.rectangle(self.overlay, (x, y), (x + w, y + h), color, 2)
+                self._mark_dirty(x, y, x + w, y + h)
 
                 # Label
                 self._draw_label(label, x, y, color)
@@ -137,7 +210,7 @@ class DrawManager:
 
 
             # ===================== OVERLAY ======================
-            cv2.addWeighted(self.overlay, self.alpha, frame, 1 - self.alpha, 0, dst=frame)
+            self._blend_dirty(frame)
 
         except Exception as e:
             logger.exception(f"DrawManager render error: {e}")
@@ -0,0 +1,331 @@
+import os
+import threading
+
+import cv2
+
+from app.core.camera.camera_reader import CAPTURE_FRAMES
+from app.core.camera.clock import system_clock
+from app.core.camera.frame_ring import FrameRing, FramePacket
+from app.core.camera.scheduling import scheduler
+from app.logging_config import init_logger
+
+logger = init_logger("FileSource")
+
+
+class FileSource:
+    """
+    Nguồn frame từ dữ liệu ghi sẵn (video / thư mục ảnh) thay cho camera.
+
+    Chế độ phát (mode):
+        - "realtime": theo fps gốc của nguồn (tính bằng clock → ScaledClock
+          10x thì phát nhanh gấp 10)
+        - "fixed"   : theo fps cấu hình
+        - "fast"    : không chờ, nhanh nhất có thể (frame cũ bị ghi đè
+          trong ring nếu consumer chậm hơn)
+
+    Hỗ trợ loop (phát lại từ đầu khi hết) và seek(frame_index) lúc đang chạy.
+    Frame được đưa vào FrameRing giống CameraReader USB → pipeline
+    không phân biệt nguồn.
+    """
+
+    MODES = ("realtime", "fixed", "fast")
+
+    def __init__(self, path, mode="realtime", fps=None, loop=False,
+                 ring_size=4, clock=None, start_frame=0, start_seq=0):
+        self.path = path
+        self.mode = mode if mode in self.MODES else "realtime"
+        self.fps = fps
+        self.loop = loop
+        self.clock = clock or system_clock
+
+        self.ring = FrameRing(ring_size, start_seq)
+        self.position = 0           # index frame kế tiếp sẽ đọc
+        self.finished = False       # hết dữ liệu (không loop)
+        self.loops = 0
+
+        self.running = False
+        self.thread = None
+        self._stop_event = threading.Event()
+        self._seek_lock = threading.Lock()
+        self._seek_to = start_frame if start_frame else None
+
+    # ----------------------------------------------------------------------
+    # Lớp con cài đặt
+    # ----------------------------------------------------------------------
+
+    def open(self):
+        """Mở nguồn, trả về True nếu thành công."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def is_opened(self):
+        raise NotImplementedError
+
+    @property
+    def source_fps(self):
+        """fps gốc của nguồn."""
+        raise NotImplementedError
+
+    @property
+    def frame_count(self):
+        """Tổng số frame (0 nếu không biết)."""
+        raise NotImplementedError
+
+    def _seek(self, index):
+        raise NotImplementedError
+
+    def _read(self, buf=None):
+        """Đọc frame tại self.position (ghi vào buf nếu được), None khi hết."""
+        raise NotImplementedError
+
+    # ----------------------------------------------------------------------
+
+    @property
+    def interval(self):
+        """Khoảng cách giữa 2 frame theo mode (giây, 0 = không chờ)."""
+        if self.mode == "fast":
+            return 0.0
+        fps = self.fps if self.mode == "fixed" and self.fps else self.source_fps
+        return 1.0 / fps if fps and fps > 0 else 0.0
+
+    def seek(self, index):
+        """Nhảy tới frame index (áp dụng ở frame kế tiếp nếu đang chạy)."""
+        index = max(0, int(index))
+        if self.frame_count:
+            index = min(index, self.frame_count - 1)
+
+        with self._seek_lock:
+            self._seek_to = index
+
+        # Đã phát hết (không loop) → chạy lại từ vị trí mới
+        if self.finished:
+            self.finished = False
+            if not self._stop_event.is_set() and not self.running:
+                self.start()
+
+    def seek_time(self, seconds):
+        """Nhảy tới thời điểm (giây) tính theo fps gốc của nguồn."""
+        self.seek(seconds * (self.source_fps or 0))
+
+    def _apply_seek(self):
+        with self._seek_lock:
+            index, self._seek_to = self._seek_to, None
+        if index is not None:
+            self._seek(index)
+            self.position = index
+
+    # ----------------------------------------------------------------------
+
+    def start(self):
+        if self.running:
+            return True
+        if not self.is_opened() and not self.open():
+            return False
+
+        self.running = True
+        self._stop_event.clear()
+        self.thread = threading.Thread(target=self._loop, name="capture-file", daemon=True)
+        self.thread.start()
+        logger.info(f"{type(self).__name__} started → {self.path} (mode={self.mode}, loop={self.loop})")
+        return True
+
+    def _loop(self):
+        scheduler.pin("capture")
+        captured = CAPTURE_FRAMES.labels("file")
+
+        interval = self.interval
+        next_time = self.clock.time()
+
+        while self.running:
+            self._apply_seek()
+
+            frame = self._read(self.ring.next_buffer())
+            if frame is None:
+                if self.loop and self.position > 0:
+                    self.loops += 1
+                    self.seek(0)
+                    continue
+                self.finished = True
+                logger.info(f"{type(self).__name__} reached end → {self.path}")
+                break
+
+            self.position += 1
+            self.ring.commit(frame, self.clock.time())
+            captured.inc()
+
+            if not interval:
+                continue
+
+            # Giữ nhịp theo clock; chậm hơn 1 chu kỳ → không phát bù
+            next_time += interval
+            delay = next_time - self.clock.time()
+            if delay > 0:
+                if self.clock.wait(self._stop_event, delay):
+                    break
+            elif delay < -interval:
+                next_time = self.clock.time()
+
+        self.running = False
+        self.ring.wake_all()
+
+    def stop(self):
+        self.running = False
+        self._stop_event.set()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=1)
+        self.close()
+        self.ring.wake_all()
+
+    # ----------------------------------------------------------------------
+
+    def iter_frames(self, start=0, stop=None):
+        """
+        Đọc tuần tự không thread, không chờ (xử lý offline).
+        Yield FramePacket(index, timestamp theo fps gốc, frame).
+        """
+        if not self.is_opened() and not self.open():
+            return
+
+        fps = self.source_fps or 1.0
+        self._seek(start)
+        self.position = start
+
+        while stop is None or self.position < stop:
+            frame = self._read()
+            if frame is None:
+                break
+            yield FramePacket(self.position, self.position / fps, frame)
+            self.position += 1
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "mode": self.mode,
+            "position": self.position,
+            "frame_count": self.frame_count,
+            "loops": self.loops,
+            "finished": self.finished,
+        }
+
+
+# ---------------------------------------------------------------------------
+
+
+class VideoFileSource(FileSource):
+    """Phát file video (mp4, avi, mkv...) qua cv2.VideoCapture."""
+
+    def __init__(self, path, **kwargs):
+        super().__init__(path, **kwargs)
+        self.cap = None
+
+    def open(self):
+        self.cap = cv2.VideoCapture(self.path)
+        if not self.cap.isOpened():
+            logger.error(f"Cannot open video file: {self.path}")
+            return False
+        return True
+
+    def close(self):
+        if self.cap is not None:
+            self.cap.release()
+
+    def is_opened(self):
+        return self.cap is not None and self.cap.isOpened()
+
+    @property
+    def source_fps(self):
+        fps = self.cap.get(cv2.CAP_PROP_FPS) if self.cap is not None else 0
+        return fps if fps and fps > 0 else (self.fps or 30.0)
+
+    @property
+    def frame_count(self):
+        if self.cap is None:
+            return 0
+        return max(0, int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT)))
+
+    def _seek(self, index):
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+
+    def _read(self, buf=None):
+        grabbed, frame = self.cap.read(buf) if buf is not None else self.cap.read()
+        return frame if grabbed else None
+
+
+# ---------------------------------------------------------------------------
+
+
+class ImageDirSource(FileSource):
+    """Phát thư mục ảnh (sắp xếp theo tên file) như 1 video."""
+
+    EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+    def __init__(self, path, fps=10, **kwargs):
+        super().__init__(path, fps=fps, **kwargs)
+        self.files = None
+
+    def open(self):
+        try:
+            names = sorted(
+                name for name in os.listdir(self.path)
+                if name.lower().endswith(self.EXTENSIONS)
+            )
+        except OSError as e:
+            logger.error(f"Cannot read image directory {self.path}: {e}")
+            return False
+
+        if not names:
+            logger.error(f"No images found in {self.path}")
+            return False
+
+        self.files = [os.path.join(self.path, name) for name in names]
+        return True
+
+    def is_opened(self):
+        return bool(self.files)
+
+    @property
+    def source_fps(self):
+        return self.fps or 10.0
+
+    @property
+    def frame_count(self):
+        return len(self.files) if self.files else 0
+
+    def _seek(self, index):
+        pass    # position được đặt trong _apply_seek / iter_frames
+
+    def _read(self, buf=None):
+        # Ảnh hỏng → bỏ qua, đọc ảnh kế tiếp
+        while self.position < self.frame_count:
+            frame = cv2.imread(self.files[self.position], cv2.IMREAD_COLOR)
+            if frame is not None:
+                return frame
+            logger.warning(f"Cannot read image: {self.files[self.position]}")
+            self.position += 1
+        return None
+
+
+# ---------------------------------------------------------------------------
+
+
+def open_file_source(src, **kwargs):
+    """
+    src là đường dẫn file / thư mục (cho phép tiền tố file://)
+    → VideoFileSource / ImageDirSource; "synthetic://..." → SyntheticSource
+    (cảnh băng chuyền tổng hợp); ngược lại None.
+    """
+    if not isinstance(src, str):
+        return None
+
+    if src.startswith("synthetic://"):
+        from app.core.camera.synthetic_source import SyntheticSource
+        return SyntheticSource(src, **kwargs)
+
+    path = src[len("file://"):] if src.startswith("file://") else src
+    if os.path.isdir(path):
+        return ImageDirSource(path, **kwargs)
+    if os.path.isfile(path):
+        return VideoFileSource(path, **kwargs)
+    return None
@@ -0,0 +1,136 @@
+import time
+import threading
+from collections import namedtuple
+
+
+# seq: số thứ tự frame (tăng dần từ 1), timestamp: thời điểm capture,
+# frame: numpy view chỉ đọc (hoặc bytes JPEG nén với MJPEGReader)
+FramePacket = namedtuple("FramePacket", ["seq", "timestamp", "frame"])
+
+
+def frame_nbytes(frame):
+    """Số byte dữ liệu của 1 frame (ndarray / bytes JPEG / None)."""
+    if frame is None:
+        return 0
+    if hasattr(frame, "nbytes"):
+        return int(frame.nbytes)
+    return len(frame)
+
+
+class FrameRing:
+    """
+    Ring buffer frame cho capture thread (1 writer, nhiều reader).
+
+    - Slot được cấp phát 1 lần và tái sử dụng: writer lấy next_buffer()
+      để ghi thẳng vào (cap.read(buf)), rồi commit().
+    - Mỗi frame có seq tăng dần + timestamp capture → reader biết chính
+      xác frame bị bỏ qua (seq nhảy) hay bị đọc lại (seq trùng).
+    - last_commit (time.monotonic, 0 = chưa có frame) cho watchdog đo
+      capture có bị treo không; start_seq cho ring thay thế (restart
+      camera) tiếp tục seq của ring cũ.
+    - Reader nhận view chỉ đọc, không copy. View vẫn hợp lệ cho tới khi
+      writer quay vòng lại slot đó (size - 1 frame sau); reader giữ lâu
+      hơn cần copy, hoặc kiểm tra is_valid(seq) sau khi xử lý.
+    """
+
+    def __init__(self, size=4, start_seq=0):
+        self.size = max(2, int(size))
+
+        self._slots = [None] * self.size
+        self._seqs = [0] * self.size
+        self._times = [0.0] * self.size
+
+        self.seq = max(0, int(start_seq))
+        self.last_commit = 0.0
+        self.cond = threading.Condition()
+
+    # ----------------------------------------------------------------------
+
+    def next_buffer(self):
+        """
+        Slot sẽ được ghi ở lần commit tiếp theo (None nếu chưa cấp phát).
+        Chỉ writer được gọi.
+        """
+        return self._slots[(self.seq + 1) % self.size]
+
+    def commit(self, frame, timestamp=None, seq=None):
+        """
+        Publish frame vừa ghi (thường chính là next_buffer()).
+        seq: giữ seq của nguồn (phải > seq hiện tại), mặc định seq + 1.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        with self.cond:
+            if seq is None or seq <= self.seq:
+                seq = self.seq + 1
+            idx = seq % self.size
+
+            self._slots[idx] = frame
+            self._seqs[idx] = seq
+            self._times[idx] = timestamp
+
+            self.seq = seq
+            self.last_commit = time.monotonic()
+            self.cond.notify_all()
+
+        return seq
+
+    # ----------------------------------------------------------------------
+
+    def _packet(self, idx):
+        frame = self._slots[idx]
+        if frame is None:
+            return None
+
+        # bytes (JPEG chưa decode) vốn bất biến → trả nguyên
+        if hasattr(frame, "view"):
+            frame = frame.view()
+            frame.flags.writeable = False
+        return FramePacket(self._seqs[idx], self._times[idx], frame)
+
+    def latest(self):
+        """FramePacket mới nhất, hoặc None nếu chưa có frame."""
+        with self.cond:
+            if self.last_commit == 0.0:
+                return None
+            return self._packet(self.seq % self.size)
+
+    def wait_next(self, after_seq, timeout=None):
+        """
+        Chờ tới khi có frame seq > after_seq rồi trả frame mới nhất.
+        Hết timeout → None.
+        """
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.seq > after_seq, timeout=timeout):
+                return None
+            return self._packet(self.seq % self.size)
+
+    def get(self, seq):
+        """FramePacket đúng seq nếu còn trong ring, ngược lại None."""
+        with self.cond:
+            if not self.is_valid(seq):
+                return None
+            idx = seq % self.size
+            if self._seqs[idx] != seq:
+                return None
+            return self._packet(idx)
+
+    def is_valid(self, seq):
+        """Frame seq còn nằm trong ring (chưa bị ghi đè)?"""
+        return 0 < seq and self.seq - seq < self.size - 1
+
+    def age(self):
+        """Giây kể từ frame commit gần nhất (None nếu chưa có frame)."""
+        if self.last_commit == 0.0:
+            return None
+        return time.monotonic() - self.last_commit
+
+    def nbytes(self):
+        """Tổng byte frame đang giữ trong các slot."""
+        return sum(frame_nbytes(frame) for frame in self._slots)
+
+    def wake_all(self):
+        """Đánh thức các reader đang chờ (dùng khi dừng camera)."""
+        with self.cond:
+            self.cond.notify_all()
@@ -0,0 +1,214 @@
+import re
+
+
+class MJPEGParser:
+    """
+    Parser MJPEG dạng streaming: feed() từng chunk bytes → list JPEG bytes.
+
+    - Buffer là bytearray dùng lại; dữ liệu đã xử lý chỉ bị dồn (compact)
+      khi chiếm quá nửa buffer → không copy lại toàn bộ mỗi chunk.
+    - Multipart (boundary lấy từ header Content-Type):
+        + có Content-Length → cắt đúng số byte, không quét nội dung JPEG
+        + không có → tìm boundary kế tiếp
+    - Không có boundary → đi theo cấu trúc segment JPEG từ SOI: bỏ qua
+      các segment APPn theo độ dài (thumbnail EXIF nhúng bên trong không
+      làm cắt nhầm), chỉ tìm EOI sau SOS.
+    - Mọi phép tìm đều tiếp tục từ vị trí lần quét trước.
+    """
+
+    SOI = b"\xff\xd8"
+    EOI = b"\xff\xd9"
+
+    # Không tìm thấy boundary sau chừng này byte → chuyển sang quét marker
+    MAX_SEARCH = 4 * 1024 * 1024
+    COMPACT_THRESHOLD = 64 * 1024
+
+    _SEEK, _HEADERS, _BODY = range(3)
+    _CONTENT_LENGTH = re.compile(rb"content-length\s*:\s*(\d+)", re.IGNORECASE)
+
+    def __init__(self, boundary=None):
+        self.buf = bytearray()
+        self.pos = 0            # đầu phần chưa xử lý
+        self.scan = 0           # vị trí quét tiếp theo
+
+        self.delimiter = self._delimiter(boundary)
+        self.state = self._SEEK
+        self.body_start = 0
+        self.content_length = None
+
+        # Trạng thái quét segment JPEG (chế độ không boundary)
+        self._in_entropy = False
+
+        self.frames = 0
+        self.bytes_in = 0
+
+    # ----------------------------------------------------------------------
+
+    @staticmethod
+    def boundary_from_content_type(content_type):
+        """'multipart/x-mixed-replace; boundary=frame' → b'frame' (hoặc None)."""
+        if not content_type:
+            return None
+
+        match = re.search(r'boundary="?([^";]+)"?', content_type, re.IGNORECASE)
+        return match.group(1).strip().encode("latin-1") if match else None
+
+    @staticmethod
+    def _delimiter(boundary):
+        if not boundary:
+            return None
+        if isinstance(boundary, str):
+            boundary = boundary.encode("latin-1")
+        # Một số camera khai báo boundary đã kèm "--"
+        return boundary if boundary.startswith(b"--") else b"--" + boundary
+
+    # ----------------------------------------------------------------------
+
+    def feed(self, data):
+        """Thêm chunk mới, trả về list các JPEG hoàn chỉnh (bytes)."""
+        self.buf += data
+        self.bytes_in += len(data)
+
+        frames = []
+        while True:
+            if self.delimiter is not None:
+                jpg = self._next_multipart()
+            else:
+                jpg = self._next_marker()
+
+            if jpg is None:
+                break
+            if jpg:
+                frames.append(jpg)
+
+        self.frames += len(frames)
+        self._compact()
+        return frames
+
+    def _compact(self):
+        """Xoá phần đã xử lý khi đủ lớn (memmove 1 lần)."""
+        if self.pos > self.COMPACT_THRESHOLD and self.pos * 2 > len(self.buf):
+            shift = self.pos
+            del self.buf[:shift]
+            self.pos = 0
+            self.scan = max(0, self.scan - shift)
+            self.body_start = max(0, self.body_start - shift)
+
+    # ----------------------------------------------------------------------
+    # Multipart
+    # ----------------------------------------------------------------------
+
+    def _next_multipart(self):
+        buf = self.buf
+
+        if self.state == self._SEEK:
+            idx = buf.find(self.delimiter, self.scan)
+            if idx == -1:
+                self.scan = max(self.pos, len(buf) - len(self.delimiter) + 1)
+
+                # Camera không gửi boundary như khai báo → quét marker
+                if len(buf) - self.pos > self.MAX_SEARCH:
+                    self.delimiter = None
+                    self.scan = self.pos
+                return None
+
+            self.pos = self.scan = idx + len(self.delimiter)
+            self.state = self._HEADERS
+
+        if self.state == self._HEADERS:
+            end = buf.find(b"\r\n\r\n", self.scan)
+            if end == -1:
+                self.scan = max(self.pos, len(buf) - 3)
+                return None
+
+            headers = bytes(buf[self.pos:end])
+            match = self._CONTENT_LENGTH.search(headers)
+            self.content_length = int(match.group(1)) if match else None
+
+            self.body_start = self.pos = self.scan = end + 4
+            self.state = self._BODY
+
+        # BODY
+        if self.content_length is not None:
+            end = self.body_start + self.content_length
+            if len(buf) < end:
+                return None
+
+            jpg = bytes(buf[self.body_start:end])
+            self.pos = self.scan = end
+            self.state = self._SEEK
+            return jpg
+
+        idx = buf.find(self.delimiter, self.scan)
+        if idx == -1:
+            self.scan = max(self.body_start, len(buf) - len(self.delimiter) + 1)
+            return None
+
+        jpg = bytes(buf[self.body_start:idx]).rstrip(b"\r\n")
+        self.pos = self.scan = idx + len(self.delimiter)
+        self.state = self._HEADERS
+        return jpg
+
+    # ----------------------------------------------------------------------
+    # Raw JPEG (không boundary): SOI → segments → SOS → EOI
+    # ----------------------------------------------------------------------
+
+    def _next_marker(self):
+        buf = self.buf
+
+        if self.state != self._BODY:
+            idx = buf.find(self.SOI, self.scan)
+            if idx == -1:
+                self.pos = self.scan = max(self.pos, len(buf) - 1)
+                return None
+
+            self.body_start = self.pos = idx
+            self.scan = idx + 2
+            self._in_entropy = False
+            self.state = self._BODY
+
+        n = len(buf)
+
+        # Duyệt header segment theo độ dài cho tới SOS
+        while not self._in_entropy:
+            i = self.scan
+            if i + 2 > n:
+                return None
+
+            if buf[i] != 0xFF:
+                # Dữ liệu hỏng → bỏ SOI này, tìm SOI kế tiếp
+                self.scan = self.body_start + 2
+                self.state = self._SEEK
+                return b""
+
+            marker = buf[i + 1]
+            if marker == 0xFF:              # fill byte
+                self.scan = i + 1
+                continue
+            if marker == 0xD9:              # EOI không có dữ liệu ảnh
+                self.scan = i + 2
+                break
+            if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+                self.scan = i + 2
+                continue
+
+            if i + 4 > n:
+                return None
+            seg_len = (buf[i + 2] << 8) | buf[i + 3]
+            self.scan = i + 2 + seg_len
+
+            if marker == 0xDA:              # SOS → entropy-coded data
+                self._in_entropy = True
+
+        if self._in_entropy:
+            idx = buf.find(self.EOI, self.scan)
+            if idx == -1:
+                self.scan = max(self.scan, n - 1)
+                return None
+            self.scan = idx + 2
+
+        jpg = bytes(buf[self.body_start:self.scan])
+        self.pos = self.scan
+        self.state = self._SEEK
+        self._in_entropy = False
+        return jpg
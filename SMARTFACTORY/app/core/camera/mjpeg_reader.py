@@ -3,10 +3,24 @@ import cv2
 import requests
 import threading
 import numpy as np
+from app.core.camera.decode_pool import DecodePool
+from app.core.camera.frame_ring import FrameRing, frame_nbytes
+from app.core.camera.mjpeg_parser import MJPEGParser
+from app.core.camera.scheduling import scheduler
+from app.core.camera.camera_reader import CAPTURE_FRAMES, CAPTURE_ERRORS
 from app.logging_config import init_logger
 
 logger = init_logger("MJPEGReader")
 
+# scale → cờ imdecode (libjpeg chỉ giải IDCT cần thiết cho kích thước đích)
+DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+SCALE_BY_FLAG = {flag: scale for scale, flag in DECODE_FLAGS.items()}
+
 
 class MJPEGReader:
     """
@@ -14,19 +28,49 @@ class MJPEGReader:
     Đọc luồng ảnh JPEG liên tục qua HTTP stream.
 
     Features:
-        - Thread-safe frame storage
-        - Tự tách frame theo marker 0xFFD8 - 0xFFD9
+        - Ring chỉ giữ JPEG nén (seq + timestamp); thread nhận stream
+          không decode. Frame được decode lazy khi có consumer cần,
+          mỗi (seq, scale) tối đa 1 lần.
+        - Decode thu nhỏ ngay trong libjpeg (DCT scaling 1/2, 1/4, 1/8)
+          → detect ở độ phân giải thấp không tốn chi phí decode full
+        - decode_workers > 0: decode sẵn mọi frame ở decode_scale trên
+          DecodePool (nhiều thread), giao theo thứ tự seq vào ring riêng;
+          camera nhanh hơn khả năng decode → bỏ frame cũ, không trễ dần.
+          set_decode_scale() đổi scale của pool lúc chạy
+        - Tách frame bằng MJPEGParser (multipart boundary / Content-Length,
+          fallback theo cấu trúc segment JPEG)
         - Tự reconnect khi mất kết nối
     """
 
-    def __init__(self, url, reconnect_delay=2.0):
+    def __init__(self, url, reconnect_delay=2.0, ring_size=4, chunk_size=64 * 1024,
+                 decode_workers=0, decode_scale=1, start_seq=0):
         self.url = url
         self.reconnect_delay = reconnect_delay
+        self.chunk_size = chunk_size
 
         self.running = False
-        self.frame = None
+        self.ring = FrameRing(ring_size, start_seq)
+
+        # scale → (seq, frame đã decode); lock theo scale để 2 consumer
+        # cùng cần 1 frame không decode 2 lần
+        self._decoded = {}
+        self._decode_locks = {scale: threading.Lock() for scale in DECODE_FLAGS}
+        self.frames_decoded = 0
+
+        # Decode song song (tuỳ chọn): ring frame đã decode ở decode_scale
+        self.pool = None
+        self.decode_scale = decode_scale
+        if decode_workers > 0:
+            self.decoded_ring = FrameRing(ring_size, start_seq)
+            # (seq, scale) theo slot của decoded_ring: scale thực tế của frame pool
+            self._pool_scales = [(0, 0)] * self.decoded_ring.size
+            self.pool = DecodePool(
+                decode_workers,
+                on_frame=self._on_pool_frame,
+                flag=DECODE_FLAGS[decode_scale],
+                name="mjpeg-decode",
+            )
 
-        self.lock = threading.Lock()
         self.thread = None
 
     # ----------------------------------------------------------------------
@@ -37,7 +81,9 @@ class MJPEGReader:
             return
 
         self.running = True
-        self.thread = threading.Thread(target=self._loop, daemon=True)
+        if self.pool is not None:
+            self.pool.start()
+        self.thread = threading.Thread(target=self._loop, name="capture-mjpeg", daemon=True)
         self.thread.start()
 
         logger.info(f"MJPEGReader started → {self.url}")
@@ -46,53 +92,157 @@ class MJPEGReader:
 
     def _loop(self):
         """Luồng chính: nhận stream JPEG liên tục."""
+        scheduler.pin("capture")
+        captured = CAPTURE_FRAMES.labels("mjpeg")
+        errors = CAPTURE_ERRORS.labels("mjpeg")
+
         while self.running:
             try:
                 logger.info(f"Connecting to MJPEG stream: {self.url}")
                 response = requests.get(self.url, stream=True, timeout=5)
 
                 if response.status_code != 200:
+                    errors.inc()
                     logger.error(f"Failed to connect ({response.status_code}) → retry...")
                     time.sleep(self.reconnect_delay)
                     continue
 
-                bytes_buffer = b""
+                boundary = MJPEGParser.boundary_from_content_type(
+                    response.headers.get("Content-Type")
+                )
+                parser = MJPEGParser(boundary)
+
+                # read1: trả ngay phần đã nhận (tối đa chunk_size),
+                # không chờ đủ chunk → không cộng thêm độ trễ
+                read = getattr(response.raw, "read1", None)
+                if read is not None:
+                    chunks = iter(lambda: read(self.chunk_size), b"")
+                else:
+                    chunks = response.iter_content(chunk_size=self.chunk_size)
 
-                for chunk in response.iter_content(chunk_size=1024):
+                for chunk in chunks:
                     if not self.running:
                         break
-                    if chunk is None:
+                    if not chunk:
                         continue
 
-                    bytes_buffer += chunk
+                    # Chỉ lưu bytes nén, decode khi có người đọc
+                    for jpg in parser.feed(chunk):
+                        ts = time.time()
+                        seq = self.ring.commit(jpg, ts)
+                        captured.inc()
+                        if self.pool is not None:
+                            self.pool.submit(seq, ts, jpg)
 
-                    # tìm marker JPEG
-                    start = bytes_buffer.find(b'\xff\xd8')
-                    end = bytes_buffer.find(b'\xff\xd9')
-
-                    if start != -1 and end != -1 and end > start:
-                        jpg = bytes_buffer[start:end + 2]
-                        bytes_buffer = bytes_buffer[end + 2:]
-
-                        frame = cv2.imdecode(np.frombuffer(jpg, dtype=np.uint8), cv2.IMREAD_COLOR)
-                        if frame is not None:
-                            with self.lock:
-                                self.frame = frame
+                response.close()
 
             except Exception as e:
+                errors.inc()
                 logger.error(f"MJPEG reader error: {e}")
                 time.sleep(self.reconnect_delay)
 
     # ----------------------------------------------------------------------
 
-    def read(self):
-        """Trả về frame mới nhất (copy)."""
-        with self.lock:
-            return self.frame.copy() if self.frame is not None else None
+    def _decode(self, packet, scale=1):
+        """
+        FramePacket chứa JPEG → FramePacket chứa frame BGR (view chỉ đọc)
+        ở 1/scale kích thước. Kết quả cache theo (seq, scale).
+        """
+        if packet is None:
+            return None
+
+        flag = DECODE_FLAGS.get(scale)
+        if flag is None:
+            raise ValueError(f"Unsupported decode scale: {scale}")
+
+        with self._decode_locks[scale]:
+            cached = self._decoded.get(scale)
+            if cached is not None and cached[0] == packet.seq:
+                frame = cached[1]
+            else:
+                frame = cv2.imdecode(np.frombuffer(packet.frame, dtype=np.uint8), flag)
+                if frame is None:
+                    logger.warning(f"Cannot decode JPEG frame seq={packet.seq}")
+                    return packet._replace(frame=None)
+                frame.flags.writeable = False
+                self._decoded[scale] = (packet.seq, frame)
+                self.frames_decoded += 1
+
+        return packet._replace(frame=frame)
+
+    def memory_usage(self):
+        """Byte đang giữ: ring JPEG, ring đã decode (pool), cache decode lazy."""
+        usage = {
+            "ring": self.ring.nbytes(),
+            "decode_cache": sum(frame_nbytes(frame) for _, frame in list(self._decoded.values())),
+        }
+        if self.pool is not None:
+            usage["decoded_ring"] = self.decoded_ring.nbytes()
+        return usage
+
+    def read(self, scale=1):
+        """Trả về frame mới nhất (decode khi cần, view chỉ đọc)."""
+        packet = self.read_packet(scale)
+        return packet.frame if packet is not None else None
+
+    def set_decode_scale(self, scale):
+        """
+        Đổi scale decode của pool (vd. detect chuyển sang 1/2). Frame
+        đang decode dở ở scale cũ không được giao cho consumer scale mới.
+        """
+        if scale not in DECODE_FLAGS:
+            raise ValueError(f"Unsupported decode scale: {scale}")
+        if scale == self.decode_scale:
+            return
+        if self.pool is not None:
+            self.pool.flag = DECODE_FLAGS[scale]
+        self.decode_scale = scale
+        logger.info(f"Decode pool scale → 1/{scale}")
+
+    def _on_pool_frame(self, seq, ts, frame, flag):
+        # Ghi scale trước commit → consumer thấy frame là thấy đúng scale
+        self._pool_scales[seq % self.decoded_ring.size] = (seq, SCALE_BY_FLAG[flag])
+        self.decoded_ring.commit(frame, ts, seq)
+
+    def _pooled(self, scale):
+        return self.pool is not None and scale == self.decode_scale
+
+    def _from_pool(self, packet, scale):
+        """Frame pool khác scale cần (vừa đổi set_decode_scale) → decode lazy."""
+        if packet is None or self._pool_scales[packet.seq % self.decoded_ring.size] == (packet.seq, scale):
+            return packet
+        return self._decode(self.ring.get(packet.seq), scale)
+
+    def read_packet(self, scale=1):
+        """FramePacket(seq, timestamp, frame) mới nhất đã decode, hoặc None."""
+        if self._pooled(scale):
+            return self._from_pool(self.decoded_ring.latest(), scale)
+        return self._decode(self.ring.latest(), scale)
+
+    def read_jpeg(self):
+        """FramePacket mới nhất với frame = bytes JPEG gốc (không decode)."""
+        return self.ring.latest()
+
+    def get_packet(self, seq, scale=1):
+        """Frame đúng seq (nếu còn trong ring) decode ở 1/scale."""
+        if self._pooled(scale):
+            packet = self.decoded_ring.get(seq)
+            if packet is not None:
+                return self._from_pool(packet, scale)
+        return self._decode(self.ring.get(seq), scale)
+
+    def wait_next(self, after_seq, timeout=None, scale=1):
+        """Chờ JPEG mới hơn after_seq rồi decode ở 1/scale (hết giờ → None)."""
+        if self._pooled(scale):
+            return self._from_pool(self.decoded_ring.wait_next(after_seq, timeout), scale)
+        return self._decode(self.ring.wait_next(after_seq, timeout), scale)
 
     # ----------------------------------------------------------------------
 
     def stop(self):
         """Dừng đọc stream."""
         self.running = False
+        if self.pool is not None:
+            self.pool.stop()
+            self.decoded_ring.wake_all()
         logger.info("MJPEGReader stopped")
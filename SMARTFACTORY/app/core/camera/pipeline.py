@@ -3,6 +3,8 @@
 import threading
 import time
 
+import cv2
+
 from app.core.camera import (
     CameraReader,
     ColorObject,
@@ -11,7 +13,35 @@ from app.core.camera import (
     DrawManager,
 )
 
+from app.core.camera.clock import make_clock
+from app.core.camera.frame_ring import frame_nbytes
+from app.core.camera.snapshot import FrameSnapshot
+from app.core.camera.scheduling import scheduler
+from app.core.camera.stages import LatestQueue, Stage, StageStats
 from app.core.config import config_service
+from app.core.metrics import registry
+from app.logging_config import init_logger
+
+logger = init_logger("CameraPipeline")
+
+FRAME_AGE = registry.histogram(
+    "smartfactory_frame_age_seconds",
+    "Delay between capture and detection of a frame",
+    buckets=(0.005, 0.01, 0.02, 0.033, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0),
+)
+PIPELINE_FRAMES = registry.counter(
+    "smartfactory_pipeline_frames_total",
+    "Captured frames by detect-stage outcome (processed / dropped)",
+    ["outcome"],
+)
+DETECT_WAIT_TIMEOUTS = registry.counter(
+    "smartfactory_detect_wait_timeouts_total",
+    "Detect stage waits that timed out without a new camera frame",
+)
+DETECT_TORN = registry.counter(
+    "smartfactory_detect_torn_frames_total",
+    "Detections discarded because the capture overwrote the ring slot during detect",
+)
 
 
 class CameraPipeline:
@@ -22,18 +52,60 @@ class CameraPipeline:
     - ColorDetector: detect vật thể theo HSV
     - Tracker: gán ID & theo dõi vị trí
     - DrawManager: vẽ bounding box / label / trajectory
+
+    Các bước chạy thành stage trên thread riêng, nối bằng LatestQueue:
+        detect → track (+ snapshot, listener) → render → encode
+    → detect frame N+1 chồng lên render / encode frame N. Độ sâu queue
+    và thời gian xử lý từng stage: stage_stats().
+
+    overlay_mode:
+    - "server": vẽ overlay vào frame trước khi encode (mặc định)
+    - "client": stream frame gốc, metadata track (box, ID, màu,
+      trajectory, seq) lấy qua get_tracks() / wait_tracks()
+      để browser tự vẽ lên canvas
+
+    passthrough (camera MJPEG + overlay "client"): stream gửi thẳng JPEG
+    gốc của camera, không decode / render / encode; viewer gần như không
+    tốn CPU. Detect vẫn decode riêng ở det_scale.
+
+    det_scale: detect trên frame 1/scale (MJPEG decode thẳng ở kích thước
+    nhỏ); frame full chỉ được lấy (decode) khi có viewer cần render.
+
+    clock: mọi mốc thời gian (nhịp detect, FPS, timestamp snapshot, TTL
+    và max_lost của tracker, nhịp phát file) lấy từ 1 clock chung →
+    playback.speed = 10 chạy toàn pipeline nhanh gấp 10 một cách nhất quán.
+
+    Mỗi frame detect publish 1 FrameSnapshot bất biến (detections +
+    tracks có ID, vận tốc, tuổi); mọi reader dùng chung snapshot này.
     """
 
-    def __init__(self, config):
+    def __init__(self, config, clock=None):
+        playback = getattr(config, "playback", {}) or {}
+        self.clock = clock or make_clock(playback.get("speed", 1.0))
+
         # -------------------------------------------------
         # CAMERA READER
         # -------------------------------------------------
-        self.camera = CameraReader(
+        overlay_mode = getattr(config, "overlay_mode", "server")
+        det_scale = getattr(config, "det_scale", 1)
+
+        # Decode pool (MJPEG): decode sẵn ở scale mà consumer chính cần —
+        # passthrough chỉ còn detect đọc frame, còn lại stream cần frame full
+        passthrough_cfg = overlay_mode == "client" and getattr(config, "passthrough", True)
+        # Pool decode theo scale detect → đổi scale detect lúc chạy thì đổi theo
+        self._decode_follows_detect = passthrough_cfg
+
+        self._camera_args = dict(
             src=config.src,
             width=config.width,
             height=config.height,
             fps=config.fps,
+            decode_workers=getattr(config, "decode_workers", 0),
+            decode_scale=det_scale if passthrough_cfg else 1,
+            clock=self.clock,
+            playback=playback,
         )
+        self.camera = CameraReader(**self._camera_args)
 
         # -------------------------------------------------
         # LOAD COLOR CONFIG (external colors.json)
@@ -67,6 +139,7 @@ class CameraPipeline:
             max_lost=config.max_lost,
             max_history=config.max_history,
             match_dist=config.match_dist,
+            clock=self.clock,
         )
 
         # -------------------------------------------------
@@ -76,6 +149,8 @@ class CameraPipeline:
             tracker=self.tracker,
             show_fps=config.show_fps,
         )
+        self.overlay_mode = overlay_mode
+        self.passthrough = self.camera.is_mjpeg and passthrough_cfg
 
         # -------------------------------------------------
         # INTERNAL STATE
@@ -83,92 +158,549 @@ class CameraPipeline:
         self.frame = None
         self.frame_lock = threading.Lock()
 
+        # Frame mới được render → báo cho các stream client đang chờ
+        self.frame_cond = threading.Condition(self.frame_lock)
+        self.frame_seq = 0
+
+        # JPEG do stage encode tạo 1 lần / frame, dùng chung cho mọi viewer
+        self._jpeg = None
+        self._jpeg_seq = -1
+
+        # Số client đang xem /api/camera/stream.
+        # = 0 → bỏ qua render + encode, chỉ chạy detect/track.
+        self.viewers = 0
+        self._viewers_lock = threading.Lock()
+
         self.running = True
+        self._stop_event = threading.Event()
+        self.max_det_fps = config.max_det_fps
         self.det_interval = 1.0 / max(config.max_det_fps, 1e-3)
+        self.det_scale = det_scale
+        self.jpeg_quality = getattr(config, "jpeg_quality", 95)
+
+        # Tuổi frame lúc detect (giây, trung bình trượt) cho QualityController
+        self.frame_age_avg = 0.0
+
+        # Giảm tải khi nóng (ThermalGovernor): giới hạn FPS stream, tắt overlay,
+        # scale detect tối thiểu (detect dùng max(det_scale, det_scale_floor))
+        self.stream_max_fps = None
+        self._last_render_at = 0.0
+        self.overlays_enabled = True
+        self.det_scale_floor = 1
 
         self.detections = []
         self.tracked = []
 
+        # Snapshot theo từng frame đã detect
+        self.det_seq = 0
+        self.det_lock = threading.Lock()
+        self.det_cond = threading.Condition(self.det_lock)
+        self.snapshot = FrameSnapshot()
+
+        # Callback gọi sau mỗi frame detect: fn(pipeline)
+        self.listeners = []
+
+        # Đếm frame theo seq của CameraReader
+        self.last_frame_seq = 0
+        self.frames_processed = 0
+        self.frames_dropped = 0      # capture có nhưng detect bỏ qua
+        self.wait_timeouts = 0       # detect chờ 0.5s không có frame mới (camera đứng)
+        self.frames_torn = 0         # slot ring bị ghi đè trong lúc detect → bỏ kết quả
+        self.detect_copy = False     # bật sau frame torn đầu tiên: copy khỏi ring rồi mới detect
+
         # --- FPS state ---
         self._fps = 0.0
         self._fps_frame_count = 0
-        self._fps_last_time = time.time()
+        self._fps_last_time = self.clock.time()
+        self.capture_fps = 0.0
+        self._fps_last_captured = 0
+
+        # -------------------------------------------------
+        # STAGES: detect → [queue] → track → [queue] → render → [queue] → encode
+        # Queue latest-wins 1 phần tử: stage sau chậm thì frame cũ bị bỏ,
+        # không dồn độ trễ. Mỗi stage 1 thread (OpenCV nhả GIL khi xử lý).
+        # -------------------------------------------------
+        self.track_queue = LatestQueue(1)
+        self.render_queue = LatestQueue(1)
+        self.encode_queue = LatestQueue(1)
+
+        is_running = lambda: self.running
+        self.detect_stats = StageStats("detect")
+        self.stages = [
+            Stage("track", self._track_stage, self.track_queue, is_running),
+            Stage("render", self._render_stage, self.render_queue, is_running),
+            Stage("encode", self._encode_stage, self.encode_queue, is_running),
+        ]
+        self.frames_render_skipped = 0
+        self._detect_thread = None
+
+        # Watchdog: nhịp sống của detect loop (time.monotonic), số lần restart
+        self.started_at = time.monotonic()
+        self.detect_heartbeat = 0.0
+        self._detect_generation = 0
+        self.camera_restarts = 0
+        self.detect_restarts = 0
 
     # ---------------------------------------------------------
 
     def start(self):
-        """Start background detection loop."""
-        threading.Thread(target=self._detection_loop, daemon=True).start()
+        """Start các stage: detect → track → render → encode."""
+        for stage in self.stages:
+            stage.start()
+        self._start_detection()
+
+    def _start_detection(self):
+        self._detect_thread = threading.Thread(
+            target=self._detection_loop, args=(self._detect_generation,),
+            name="stage-detect", daemon=True,
+        )
+        self._detect_thread.start()
 
     # ---------------------------------------------------------
+    # RECOVERY (gọi từ watchdog)
+    # ---------------------------------------------------------
 
-    def _detection_loop(self):
-        last_time = 0
+    def restart_camera(self):
+        """
+        Thay CameraReader bị treo / mất frame bằng reader mới cùng cấu hình.
+        Ring mới tiếp tục seq của ring cũ → các stage không phải reset
+        và frames_captured vẫn tăng liên tục.
+        """
+        old = self.camera
+        old.stop()
+        self.camera = CameraReader(start_seq=old.frames_captured, **self._camera_args)
+        self.camera_restarts += 1
+        logger.warning(f"Camera reader restarted (#{self.camera_restarts})")
+        return self.camera.running
+
+    def restart_detection(self):
+        """
+        Chạy detect loop mới. Thread cũ (chết hoặc kẹt trong OpenCV) thấy
+        generation đổi sẽ tự thoát ở vòng lặp kế tiếp.
+        """
+        self._detect_generation += 1
+        self.detect_restarts += 1
+        self.detect_heartbeat = 0.0
+        self._start_detection()
+        logger.warning(f"Detection loop restarted (#{self.detect_restarts})")
+        return True
+
+    def frame_age(self):
+        """Giây kể từ frame capture gần nhất (None nếu chưa có)."""
+        return self.camera.frame_age()
 
-        while self.running:
-            now = time.time()
+    # ---------------------------------------------------------
+    # TUNING LÚC CHẠY (QualityController / ThermalGovernor)
+    # ---------------------------------------------------------
 
-            if now - last_time < self.det_interval:
-                time.sleep(0.001)
-                continue
+    def set_detection_fps(self, fps):
+        """Đổi max_detection_fps, có hiệu lực từ frame detect kế tiếp."""
+        self.max_det_fps = max(float(fps), 1e-3)
+        self.det_interval = 1.0 / self.max_det_fps
+
+    def set_detection_scale(self, scale):
+        """Detect trên frame 1/scale (1, 2, 4, 8)."""
+        if scale not in CameraReader.SCALES:
+            raise ValueError(f"Unsupported detection scale: {scale}")
+        self.det_scale = scale
+        self._sync_decode_scale()
+
+    @property
+    def effective_det_scale(self):
+        """Scale detect thực tế: det_scale, nhưng không nhỏ hơn det_scale_floor."""
+        return max(self.det_scale, self.det_scale_floor)
+
+    def set_stream_fps(self, fps):
+        """Giới hạn FPS render / encode cho stream (None = theo FPS detect)."""
+        self.stream_max_fps = float(fps) if fps else None
+
+    def set_overlays(self, enabled):
+        """Bật / tắt vẽ overlay phía server (mode "server")."""
+        self.overlays_enabled = bool(enabled)
+
+    def set_detection_scale_floor(self, scale):
+        """Scale detect tối thiểu, áp dụng trên det_scale hiện tại (1 = không ép)."""
+        if scale not in CameraReader.SCALES:
+            raise ValueError(f"Unsupported detection scale: {scale}")
+        self.det_scale_floor = scale
+        self._sync_decode_scale()
+
+    def _sync_decode_scale(self):
+        """
+        Passthrough: decode pool (MJPEG) giải mã sẵn cho detect → theo
+        effective_det_scale, nếu không detect tự decode còn pool vẫn decode
+        mọi frame ở scale cũ mà không ai đọc.
+        """
+        if not self._decode_follows_detect:
+            return
+        scale = self.effective_det_scale
+        self._camera_args["decode_scale"] = scale      # reader mới khi restart_camera
+        self.camera.set_decode_scale(scale)
+
+    def set_jpeg_quality(self, quality):
+        """Chất lượng JPEG của stream (không áp dụng cho passthrough)."""
+        self.jpeg_quality = min(max(int(quality), 1), 100)
 
-            last_time = now
+    # ---------------------------------------------------------
+    # STAGE 1: DETECT (nguồn của pipeline, lấy frame từ CameraReader)
+    # ---------------------------------------------------------
 
-            frame = self.camera.read()
+    def _detection_loop(self, generation=0):
+        """
+        Chờ frame mới từ CameraReader (không polling).
+        Giới hạn max_detection_fps bằng deadline: ngủ 1 lần tới deadline
+        kế tiếp rồi lấy frame mới nhất, không busy-wait.
+
+        Detect xong đẩy sang stage track rồi lấy frame kế tiếp ngay →
+        detect frame N+1 chạy song song với render / encode frame N.
+        """
+        scheduler.pin("detect")
+        next_deadline = 0.0
+
+        processed = PIPELINE_FRAMES.labels("processed")
+        dropped = PIPELINE_FRAMES.labels("dropped")
+
+        while self.running and generation == self._detect_generation:
+            self.detect_heartbeat = time.monotonic()
+
+            delay = next_deadline - self.clock.time()
+            if delay > 0 and self.clock.wait(self._stop_event, delay):
+                break
+
+            scale = self.effective_det_scale
+            packet = self.camera.wait_next(self.last_frame_seq, timeout=0.5, scale=scale)
+            if packet is None:
+                self.wait_timeouts += 1
+                DETECT_WAIT_TIMEOUTS.inc()
+                continue
+
+            now = self.clock.time()
+
+            # Giữ nhịp det_interval; bị trễ hơn 1 chu kỳ → không chạy bù
+            next_deadline = max(next_deadline + self.det_interval, now)
+
+            if self.last_frame_seq:
+                skipped = max(0, packet.seq - self.last_frame_seq - 1)
+                self.frames_dropped += skipped
+                if skipped:
+                    dropped.inc(skipped)
+            self.last_frame_seq = packet.seq
+            self.frames_processed += 1
+            processed.inc()
+            age = max(0.0, now - packet.timestamp)
+            FRAME_AGE.observe(age)
+            self.frame_age_avg += 0.2 * (age - self.frame_age_avg)
+
+            # View chỉ đọc trong ring của CameraReader (không copy),
+            # đã thu nhỏ 1/scale; None = JPEG hỏng
+            frame = packet.frame
             if frame is None:
                 continue
 
-            # --------- CẬP NHẬT FPS ----------
-            self._fps_frame_count += 1
-            elapsed = now - self._fps_last_time
-            if elapsed >= 1.0:  # cập nhật mỗi ~1 giây
-                self._fps = self._fps_frame_count / elapsed
-                self._fps_frame_count = 0
-                self._fps_last_time = now
-            # ---------------------------------
-
-            # Detect objects
-            detections = self.detector.detect(frame)
-            self.detections = detections
-
-            boxes = [(x, y, w, h) for x, y, w, h, _ in detections]
-            tracked = self.tracker.update(boxes)
+            # USB / file ở scale 1: frame là view trong ring, capture ghi đè
+            # slot sau size-1 frame. Detect đã từng chậm hơn thế → copy trước
+            in_ring = not self.camera.is_mjpeg and scale == 1
+            if in_ring and self.detect_copy:
+                frame = frame.copy()
+                in_ring = False
+                if self._torn(packet.seq):
+                    continue
+
+            t0 = time.perf_counter()
+            try:
+                detections = self.detector.detect(frame, scale=scale)
+            except Exception as e:
+                self.detect_stats.errors += 1
+                logger.exception(f"Detection error: {e}")
+                continue
+            self.detect_stats.record(time.perf_counter() - t0)
+
+            # Detect trên view mà slot bị ghi đè giữa chừng → box không tin được
+            if in_ring and self._torn(packet.seq):
+                continue
+
+            height, width = frame.shape[:2]
+            self.track_queue.put(
+                (packet.seq, now, (height * scale, width * scale), scale, detections)
+            )
+
+    def _torn(self, seq):
+        """Slot ring của seq đã bị capture ghi đè? → đếm, chuyển sang copy trước detect."""
+        if self.camera.ring.is_valid(seq):
+            return False
+
+        self.frames_torn += 1
+        DETECT_TORN.inc()
+        if not self.detect_copy:
+            self.detect_copy = True
+            logger.warning("Detect slower than the frame ring, copying frames before detect")
+        return True
+
+    # ---------------------------------------------------------
+    # STAGE 2: TRACK + SNAPSHOT
+    # ---------------------------------------------------------
+
+    def _track_stage(self, item):
+        cam_seq, now, shape, scale, detections = item
+        self.detections = detections
+
+        # --------- CẬP NHẬT FPS ----------
+        self._fps_frame_count += 1
+        elapsed = now - self._fps_last_time
+        if elapsed >= 1.0:  # cập nhật mỗi ~1 giây
+            self._fps = self._fps_frame_count / elapsed
+            self._fps_frame_count = 0
+            self._fps_last_time = now
+
+            captured = self.camera.frames_captured
+            self.capture_fps = (captured - self._fps_last_captured) / elapsed
+            self._fps_last_captured = captured
+        # ---------------------------------
+
+        boxes = [(x, y, w, h) for x, y, w, h, _ in detections]
+        labels = [obj for _, _, _, _, obj in detections]
+        tracked = self.tracker.update(boxes, labels)
+
+        snapshot = FrameSnapshot.build(
+            self.det_seq + 1, now, shape, self._fps,
+            detections, tracked,
+            self.tracker.get_tracks(
+                [obj_id for obj_id, _ in tracked], self.drawer.traj_ttl
+            ),
+            camera_seq=cam_seq,
+        )
+
+        with self.det_cond:
             self.tracked = tracked
+            self.snapshot = snapshot
+            self.det_seq = snapshot.seq
+            self.det_cond.notify_all()
 
-            # Draw overlay + TRUYỀN FPS VÀO ĐÂY
-            frame_drawn = self.drawer.render(frame, tracked, detections, fps=self._fps)
+        self._notify_listeners()
 
-            # Save to buffer
-            with self.frame_lock:
-                self.frame = frame_drawn
+        # Không ai xem stream → không cần vẽ overlay.
+        # Passthrough: stream lấy JPEG gốc từ camera, không cần frame ở đây
+        if self.viewers <= 0 or self.passthrough:
+            return
+
+        # Giới hạn FPS stream → bỏ render + encode của frame dư
+        if self.stream_max_fps:
+            if now - self._last_render_at < 1.0 / self.stream_max_fps:
+                return
+            self._last_render_at = now
+
+        self.render_queue.put((snapshot.seq, cam_seq, scale, tracked, detections, self._fps))
+
+    # ---------------------------------------------------------
+    # STAGE 3: RENDER
+    # ---------------------------------------------------------
+
+    def _render_stage(self, item):
+        seq, cam_seq, scale, tracked, detections, fps = item
+
+        # Frame full cùng seq với lần detect (scale nhỏ → decode lúc này);
+        # slot đã bị ring ghi đè → bỏ frame
+        packet = self.camera.get_packet(cam_seq)
+        if packet is None or packet.frame is None:
+            self.frames_render_skipped += 1
+            return
+
+        # Copy khỏi ring: frame giữ cho stream lâu hơn vòng đời slot,
+        # và mode "server" vẽ trực tiếp lên frame
+        frame = packet.frame.copy()
+
+        # USB / file: slot có thể bị ghi đè ngay trong lúc copy
+        if not self.camera.is_mjpeg and not self.camera.ring.is_valid(cam_seq):
+            self.frames_render_skipped += 1
+            return
+
+        if self.overlay_mode != "client" and self.overlays_enabled:
+            frame = self.drawer.render(frame, tracked, detections, fps=fps)
+
+        self.encode_queue.put((seq, frame))
+
+    # ---------------------------------------------------------
+    # STAGE 4: ENCODE
+    # ---------------------------------------------------------
+
+    def _encode_stage(self, item):
+        seq, frame = item
+
+        ret, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, int(self.jpeg_quality)])
+        if not ret:
+            return
+
+        # Save to buffer + đánh thức các stream client
+        with self.frame_cond:
+            self.frame = frame
+            self._jpeg = jpeg.tobytes()
+            self._jpeg_seq = seq
+            self.frame_seq = seq
+            self.frame_cond.notify_all()
+
+    # ---------------------------------------------------------
+
+    def stage_stats(self):
+        """
+        Độ sâu / số frame bị bỏ của queue trước mỗi stage và thời gian
+        xử lý (avg / p95 / max, ms) trên ~200 frame gần nhất.
+        """
+        stats = {"detect": self.detect_stats.summary()}
+        for stage in self.stages:
+            stats[stage.name] = stage.summary()
+        stats["render"]["skipped"] = self.frames_render_skipped
+        return stats
+
+    def memory_usage(self):
+        """
+        Ước lượng byte đang giữ theo thành phần (không tính bản copy
+        tạm trong lúc render / encode):
+        - capture.*: ring capture, ring / cache decode MJPEG
+        - overlay:  buffer overlay của DrawManager (1 frame full-size)
+        - frame:    frame đã vẽ của lần encode gần nhất
+        - jpeg:     JPEG dùng chung cho mọi client stream
+        - snapshot: JSON / binary đã serialize của snapshot hiện tại
+        """
+        usage = {f"capture.{name}": n for name, n in self.camera.memory_usage().items()}
+        usage["overlay"] = frame_nbytes(self.drawer.overlay)
+        usage["frame"] = frame_nbytes(self.frame)
+        usage["jpeg"] = frame_nbytes(self._jpeg)
+        usage["snapshot"] = self.snapshot.nbytes()
+        return usage
+
+    # ---------------------------------------------------------
+
+    def add_listener(self, fn):
+        """Đăng ký callback fn(pipeline) chạy sau mỗi frame detect."""
+        self.listeners.append(fn)
+
+    def _notify_listeners(self):
+        for fn in self.listeners:
+            try:
+                fn(self)
+            except Exception as e:
+                logger.exception(f"Pipeline listener error: {e}")
 
     # ---------------------------------------------------------
 
     def stop(self):
         self.running = False
+        self._stop_event.set()
         self.camera.stop()
 
+        for queue in (self.track_queue, self.render_queue, self.encode_queue):
+            queue.close()
+
+        # Chờ các stage thoát khỏi lời gọi OpenCV đang chạy
+        threads = [self._detect_thread] + [stage.thread for stage in self.stages]
+        for thread in threads:
+            if thread is not None and thread is not threading.current_thread():
+                thread.join(timeout=1.0)
+
+        # Giải phóng các stream client / overlay client đang chờ
+        with self.frame_cond:
+            self.frame_cond.notify_all()
+        with self.det_cond:
+            self.det_cond.notify_all()
+
+    # ---------------------------------------------------------
+
+    def add_viewer(self):
+        """Đăng ký 1 client stream → bật render overlay."""
+        with self._viewers_lock:
+            self.viewers += 1
+            return self.viewers
+
+    def remove_viewer(self):
+        """Huỷ đăng ký client stream. Hết viewer → ngừng render."""
+        with self._viewers_lock:
+            self.viewers = max(0, self.viewers - 1)
+            remaining = self.viewers
+
+        if remaining == 0:
+            self.render_queue.clear()
+            self.encode_queue.clear()
+            with self.frame_lock:
+                self.frame = None
+                self._jpeg = None
+                self._jpeg_seq = -1
+
+        return remaining
+
     # ---------------------------------------------------------
 
     def get_frame(self):
-        """Return current frame as JPEG."""
+        """
+        Return current frame as JPEG.
+
+        Stage encode tạo JPEG 1 lần / frame; mọi viewer nhận lại
+        bytes đó, không encode trong request.
+        Passthrough → JPEG gốc mới nhất của camera.
+        """
+        if self.passthrough:
+            packet = self.camera.reader.read_jpeg()
+            return packet.frame if packet is not None else None
+
         with self.frame_lock:
-            if self.frame is None:
-                return None
+            return self._jpeg
+
+    def wait_frame(self, last_seq, timeout=1.0):
+        """
+        Chờ tới khi có frame mới hơn last_seq.
+
+        Return:
+            (seq, jpeg_bytes) → jpeg_bytes = None nếu hết timeout
+            hoặc pipeline đã dừng.
+
+        Passthrough: seq là seq capture của camera, frame gửi theo nhịp
+        camera (không phụ thuộc max_detection_fps).
+        """
+        if self.passthrough:
+            packet = self.camera.wait_jpeg(last_seq, timeout)
+            if packet is None or not self.running:
+                return last_seq, None
+            return packet.seq, packet.frame
+
+        with self.frame_cond:
+            self.frame_cond.wait_for(
+                lambda: self.frame_seq != last_seq or not self.running,
+                timeout=timeout,
+            )
+            seq = self.frame_seq
+
+        if seq == last_seq or not self.running:
+            return last_seq, None
 
-            import cv2
-            ret, jpeg = cv2.imencode(".jpg", self.frame)
-            return jpeg.tobytes() if ret else None
+        return seq, self.get_frame()
 
     # ---------------------------------------------------------
 
+    def get_snapshot(self):
+        """FrameSnapshot của frame detect gần nhất (bất biến, có cache JSON)."""
+        return self.snapshot
+
     def get_detections(self):
-        """Return last detection objects."""
-        with self.frame_lock:
-            if not self.detector.last_detections:
-                return []
+        """Return last detections (list dict đã chuẩn hoá, kèm track_id)."""
+        return list(self.snapshot.detections)
 
-            return [
-                color_obj.to_dict()
-                for x, y, w, h, color_obj in self.detector.last_detections
-            ]
+    # ---------------------------------------------------------
+
+    def get_tracks(self):
+        """
+        Metadata của frame detect gần nhất cho client-side overlay.
+        Trả về FrameSnapshot (seq, kích thước frame, fps, tracks kèm
+        trajectory); dùng to_json() để lấy bytes đã cache.
+        """
+        return self.snapshot
+
+    def wait_tracks(self, last_seq, timeout=1.0):
+        """
+        Long-poll: chờ tới khi có frame detect mới hơn last_seq
+        rồi trả snapshot. Hết timeout → trả snapshot hiện tại.
+        """
+        with self.det_cond:
+            self.det_cond.wait_for(
+                lambda: self.det_seq != last_seq or not self.running,
+                timeout=timeout,
+            )
+            return self.snapshot
@@ -0,0 +1,202 @@
+import threading
+import time
+from collections import deque
+
+from app.core.metrics import registry
+from app.logging_config import init_logger
+
+try:
+    import psutil
+except ImportError:     # pragma: no cover - psutil có trong requirements
+    psutil = None
+
+logger = init_logger("QualityController")
+
+ADJUSTMENTS = registry.counter(
+    "smartfactory_quality_adjustments_total",
+    "Adaptive quality changes by knob and direction (degrade / restore)", ["knob", "direction"]
+)
+
+
+class _Knob:
+    """
+    1 tham số điều chỉnh được của pipeline, giữa mức trần (cấu hình)
+    và mức sàn. degrade() / restore() trả về giá trị mới, None nếu đã
+    chạm giới hạn.
+    """
+
+    def __init__(self, name, get, set, degrade, restore, applicable=None):
+        self.name = name
+        self.get = get
+        self.set = set
+        self._degrade = degrade
+        self._restore = restore
+        self.applicable = applicable or (lambda: True)
+
+    def degrade(self):
+        return self._degrade(self.get()) if self.applicable() else None
+
+    def restore(self):
+        return self._restore(self.get())
+
+
+class QualityController:
+    """
+    Vòng điều khiển giữ độ trễ detect quanh target_latency_ms và CPU
+    dưới cpu_high bằng cách đổi tham số pipeline lúc chạy.
+
+    Đo mỗi interval_s:
+        - latency = tuổi frame lúc detect (trung bình trượt)
+                    + thời gian detect trung bình 20 frame gần nhất
+        - cpu     = psutil.cpu_percent() toàn hệ thống
+
+    Quá tải (latency > target hoặc cpu > cpu_high) → hạ 1 bậc, theo thứ tự:
+        1. jpeg_quality   -10 (tới min_jpeg_quality; chỉ khi có viewer)
+        2. detection_fps  x0.75 (tới min_detection_fps)
+        3. detection_scale x2 (tới max_scale)
+    Dư tải (latency < 0.7 x target và cpu < cpu_low) liên tục
+    restore_after lần đo → trả lại 1 bậc theo thứ tự ngược lại, không
+    vượt giá trị cấu hình ban đầu. Mọi thay đổi đều được log.
+    """
+
+    RESTORE_RATIO = 0.7
+    FPS_FACTOR = 0.75
+    JPEG_STEP = 10
+
+    def __init__(self, pipeline, config, cpu_percent=None):
+        self.pipeline = pipeline
+        self.config = dict(config)
+        self._cpu_percent = cpu_percent or (psutil.cpu_percent if psutil is not None else lambda: 0.0)
+
+        # Mức trần = cấu hình lúc start
+        base_fps = pipeline.max_det_fps
+        base_scale = pipeline.det_scale
+        base_quality = pipeline.jpeg_quality
+
+        min_fps = min(float(self.config["min_detection_fps"]), base_fps)
+        max_scale = max(int(self.config["max_scale"]), base_scale)
+        min_quality = min(int(self.config["min_jpeg_quality"]), base_quality)
+
+        self.knobs = [
+            _Knob(
+                "jpeg_quality",
+                lambda: pipeline.jpeg_quality, pipeline.set_jpeg_quality,
+                degrade=lambda q: max(q - self.JPEG_STEP, min_quality) if q > min_quality else None,
+                restore=lambda q: min(q + self.JPEG_STEP, base_quality) if q < base_quality else None,
+                applicable=lambda: pipeline.viewers > 0 and not pipeline.passthrough,
+            ),
+            _Knob(
+                "detection_fps",
+                lambda: pipeline.max_det_fps, pipeline.set_detection_fps,
+                degrade=lambda f: round(max(f * self.FPS_FACTOR, min_fps), 2) if f > min_fps else None,
+                restore=lambda f: round(min(f / self.FPS_FACTOR, base_fps), 2) if f < base_fps else None,
+            ),
+            _Knob(
+                "detection_scale",
+                lambda: pipeline.det_scale, pipeline.set_detection_scale,
+                degrade=lambda s: s * 2 if s < max_scale else None,
+                restore=lambda s: s // 2 if s > base_scale else None,
+            ),
+        ]
+
+        self.latency_ms = None
+        self.cpu = None
+        self._calm = 0
+        self.history = deque(maxlen=50)
+
+        self.running = False
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    # ----------------------------------------------------------------------
+
+    def start(self):
+        self.running = True
+        self._cpu_percent()             # mốc đầu cho cpu_percent(interval=None)
+        self._thread = threading.Thread(target=self._loop, name="quality", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"Adaptive quality: target {self.config['target_latency_ms']} ms, "
+            f"CPU {self.config['cpu_low']}-{self.config['cpu_high']}%"
+        )
+
+    def stop(self):
+        self.running = False
+        self._stop_event.set()
+
+    def _loop(self):
+        while not self._stop_event.wait(max(0.5, float(self.config["interval_s"]))):
+            try:
+                self.step()
+            except Exception as e:
+                logger.exception(f"Quality controller error: {e}")
+
+    # ----------------------------------------------------------------------
+
+    def measure(self):
+        """(latency_ms, cpu_percent); latency None khi chưa có frame detect."""
+        detect = self.pipeline.detect_stats.recent(20)
+        latency = None
+        if detect is not None:
+            latency = (self.pipeline.frame_age_avg + detect) * 1000.0
+        return latency, float(self._cpu_percent())
+
+    def step(self):
+        """1 lần đo + điều chỉnh (tối đa 1 bậc)."""
+        self.latency_ms, self.cpu = self.measure()
+        if self.latency_ms is None:
+            return None
+
+        target = float(self.config["target_latency_ms"])
+        reason = f"latency {self.latency_ms:.0f} ms, cpu {self.cpu:.0f}%"
+
+        if self.latency_ms > target or self.cpu > self.config["cpu_high"]:
+            self._calm = 0
+            for knob in self.knobs:
+                value = knob.degrade()
+                if value is not None:
+                    return self._apply(knob, value, "degrade", reason)
+            return None
+
+        if self.latency_ms < target * self.RESTORE_RATIO and self.cpu < self.config["cpu_low"]:
+            self._calm += 1
+            if self._calm < self.config["restore_after"]:
+                return None
+            self._calm = 0
+            for knob in reversed(self.knobs):
+                value = knob.restore()
+                if value is not None:
+                    return self._apply(knob, value, "restore", reason)
+            return None
+
+        self._calm = 0
+        return None
+
+    def _apply(self, knob, value, direction, reason):
+        old = knob.get()
+        knob.set(value)
+        ADJUSTMENTS.labels(knob.name, direction).inc()
+
+        change = {
+            "time": time.time(),
+            "knob": knob.name,
+            "from": old,
+            "to": value,
+            "direction": direction,
+            "reason": reason,
+        }
+        self.history.append(change)
+        logger.info(f"[adaptive] {direction} {knob.name}: {old} → {value} ({reason})")
+        return change
+
+    # ----------------------------------------------------------------------
+
+    def stats(self):
+        return {
+            "enabled": self.running,
+            "latency_ms": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            "cpu_percent": self.cpu,
+            "target_latency_ms": self.config["target_latency_ms"],
+            "current": {knob.name: knob.get() for knob in self.knobs},
+            "recent_changes": list(self.history)[-10:],
+        }
@@ -0,0 +1,202 @@
+import os
+import queue
+import threading
+
+import cv2
+
+from app.logging_config import init_logger
+
+logger = init_logger("Scheduler")
+
+
+class Scheduler:
+    """
+    Scheduling profile cho board nhiều core (Raspberry Pi...).
+
+    Mỗi thread tự gọi pin(<role>) khi bắt đầu chạy:
+        - "capture": CameraReader / MJPEGReader / FileSource / DecodePool
+        - "detect", "track", "render", "encode": các stage của pipeline
+        - "web": thread xử lý request Flask (gọi từ before_request)
+
+    Profile (camera config → "scheduling"):
+        {
+            "enabled": true,
+            "opencv_threads": 2,
+            "cpus": {"capture": [0], "detect": [1, 2], "encode": [3]},
+            "nice": {"web": 5}
+        }
+
+    - cpus: os.sched_setaffinity cho đúng thread đó (Linux: affinity
+      tính theo thread).
+    - opencv_threads: cv2.setNumThreads — thread pool của OpenCV là
+      chung cho cả process nên chỉ có 1 giá trị.
+    - nice: nice của riêng thread (setpriority theo native id).
+      Role không cấu hình được đưa về affinity / nice mặc định của
+      process; hạ nice lại cần quyền (CAP_SYS_NICE).
+    - call(fn): chạy fn trên thread launcher (tạo trong configure(), giữ
+      mặc định của process, không mang role nào). Thread pipeline tạo từ
+      request web (đã nice "web") phải start qua đây, nếu không sẽ thừa
+      hưởng ưu tiên thấp của web và không hạ lại được nếu thiếu quyền.
+
+    Role không có trong profile / OS không hỗ trợ → bỏ qua, không lỗi.
+    """
+
+    ROLES = ("capture", "detect", "track", "render", "encode", "web")
+
+    def __init__(self):
+        self.enabled = False
+        self.cpus = {}
+        self.nice = {}
+        self.opencv_threads = None
+        self._base_cpus = None
+        self._base_nice = None
+
+        self._lock = threading.Lock()
+        self._local = threading.local()     # role đã áp dụng cho thread này
+        self._roles = {}                    # role → {"cpus", "nice"}
+        self._members = {}                  # role → {Thread} đã pin (lọc thread chết khi đếm)
+        self.errors = 0
+
+        self._launcher = None
+        self._jobs = queue.Queue()
+
+    # ----------------------------------------------------------------------
+
+    def configure(self, profile):
+        """Nạp profile (dict) và áp dụng cv2.setNumThreads."""
+        profile = profile or {}
+        self.enabled = bool(profile.get("enabled", False))
+
+        self.cpus = {
+            role: sorted({int(c) for c in cpus})
+            for role, cpus in (profile.get("cpus") or {}).items()
+            if role in self.ROLES and cpus
+        }
+        self.nice = {
+            role: int(value)
+            for role, value in (profile.get("nice") or {}).items()
+            if role in self.ROLES and value
+        }
+        self.opencv_threads = profile.get("opencv_threads")
+
+        with self._lock:
+            self._roles = {}
+            self._members = {}
+
+        if not self.enabled:
+            return
+
+        # Mặc định của process (đọc từ thread đang cấu hình, thường là main)
+        if hasattr(os, "sched_getaffinity"):
+            self._base_cpus = set(os.sched_getaffinity(0))
+        if hasattr(os, "getpriority"):
+            self._base_nice = os.getpriority(os.PRIO_PROCESS, 0)
+
+        if self.opencv_threads is not None:
+            cv2.setNumThreads(int(self.opencv_threads))
+
+        # Tạo từ thread đang cấu hình → mang affinity / nice mặc định
+        if self._launcher is None:
+            self._launcher = threading.Thread(
+                target=self._launcher_loop, name="sched-launcher", daemon=True
+            )
+            self._launcher.start()
+
+        logger.info(
+            f"Scheduling profile: cpus={self.cpus}, nice={self.nice}, "
+            f"opencv_threads={self.opencv_threads}"
+        )
+
+    # ----------------------------------------------------------------------
+
+    def pin(self, role):
+        """Áp dụng affinity / nice của role cho thread hiện tại (1 lần / thread)."""
+        if not self.enabled:
+            return
+
+        if getattr(self._local, "role", None) == role:
+            return
+        self._local.role = role
+
+        tid = threading.get_native_id()
+
+        # Thread mới thừa hưởng affinity / nice của thread tạo ra nó (vd.
+        # pipeline được start từ 1 thread web đã hạ ưu tiên) → role không
+        # cấu hình thì đưa về mặc định của process thay vì giữ nguyên.
+        cpus = nice = None
+
+        if self._base_cpus:
+            wanted = sorted(c for c in self.cpus.get(role, self._base_cpus) if c in self._base_cpus)
+            cpus = wanted or sorted(self._base_cpus)
+            try:
+                os.sched_setaffinity(0, cpus)
+            except OSError as e:
+                self.errors += 1
+                cpus = None
+                logger.warning(f"sched_setaffinity({role}) failed: {e}")
+
+        if self._base_nice is not None:
+            nice = self.nice.get(role, self._base_nice)
+            try:
+                if os.getpriority(os.PRIO_PROCESS, tid) != nice:
+                    os.setpriority(os.PRIO_PROCESS, tid, nice)
+            except OSError as e:
+                # Hạ nice (tăng ưu tiên) cần CAP_SYS_NICE / RLIMIT_NICE
+                self.errors += 1
+                nice = None
+                logger.warning(f"setpriority({role}) failed: {e}")
+
+        with self._lock:
+            self._roles[role] = {"cpus": cpus, "nice": nice}
+            members = self._members.setdefault(role, set())
+            members.difference_update([t for t in members if not t.is_alive()])
+            members.add(threading.current_thread())
+
+    # ----------------------------------------------------------------------
+
+    def call(self, fn, *args, **kwargs):
+        """
+        Chạy fn(*args, **kwargs) trên thread launcher, chờ và trả kết quả
+        (exception được raise lại ở thread gọi). Profile tắt → gọi thẳng.
+        """
+        launcher = self._launcher
+        if not self.enabled or launcher is None or threading.current_thread() is launcher:
+            return fn(*args, **kwargs)
+
+        done = threading.Event()
+        result = {}
+        self._jobs.put((fn, args, kwargs, done, result))
+        done.wait()
+        if "error" in result:
+            raise result["error"]
+        return result.get("value")
+
+    def _launcher_loop(self):
+        while True:
+            fn, args, kwargs, done, result = self._jobs.get()
+            try:
+                result["value"] = fn(*args, **kwargs)
+            except BaseException as e:
+                result["error"] = e
+            finally:
+                done.set()
+
+    # ----------------------------------------------------------------------
+
+    def stats(self):
+        with self._lock:
+            roles = {
+                role: dict(entry, threads=sum(t.is_alive() for t in self._members.get(role, ())))
+                for role, entry in self._roles.items()
+            }
+
+        return {
+            "enabled": self.enabled,
+            "opencv_threads": cv2.getNumThreads(),
+            "roles": roles,
+            "errors": self.errors,
+        }
+
+
+# Singleton instance
+scheduler = Scheduler()
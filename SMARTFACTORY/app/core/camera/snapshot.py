@@ -0,0 +1,186 @@
+import json
+import struct
+import threading
+
+
+class FrameSnapshot:
+    """
+    Kết quả detect + track của 1 frame, bất biến sau khi tạo.
+
+    Pipeline tạo 1 snapshot / frame; mọi reader (API, SSE, overlay)
+    dùng chung. JSON / binary được serialize 1 lần khi có reader đầu
+    tiên rồi cache lại → chi phí mỗi request không phụ thuộc số object.
+
+    Dữ liệu (to_dict):
+        {
+            "seq", "timestamp", "width", "height", "fps",
+            "detections": [{"x", "y", "w", "h", "name", "bgr",
+                            "action_id", "duration_ms", "track_id"}],
+            "tracks": [{"id", "x", "y", "w", "h", "name", "bgr",
+                        "vx", "vy", "age", "trajectory"}]
+        }
+
+    Binary (to_binary, little-endian):
+        header  : "SFS1" seq:u32 timestamp:f64 width:u16 height:u16
+                  fps:f32 n_detections:u16 n_tracks:u16
+        detection: x,y,w,h:u16  b,g,r:u8  action_id:u8  duration_ms:u32
+                   name:str8  track_id:str8
+        track   : id:str8  x,y,w,h:u16  b,g,r:u8  vx,vy,age:f32
+                  name:str8  n_points:u16  (cx,cy:u16) * n_points
+        str8 = length:u8 + utf-8 bytes
+
+    camera_seq: seq của frame camera đã detect (FrameRing), chỉ dùng nội
+    bộ (đối chiếu ground truth của nguồn tổng hợp...), không serialize.
+    """
+
+    __slots__ = (
+        "seq", "timestamp", "width", "height", "fps",
+        "detections", "tracks", "camera_seq",
+        "_json", "_binary", "_lock",
+    )
+
+    MAGIC = b"SFS1"
+    _HEADER = struct.Struct("<4sIdHHfHH")
+    _DET = struct.Struct("<HHHHBBBBI")
+    _TRACK = struct.Struct("<HHHHBBBfff")
+    _POINT = struct.Struct("<HH")
+
+    def __init__(self, seq=0, timestamp=0.0, width=0, height=0, fps=0.0,
+                 detections=(), tracks=(), camera_seq=0):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.detections = tuple(detections)
+        self.tracks = tuple(tracks)
+        self.camera_seq = camera_seq
+
+        self._json = None
+        self._binary = None
+        self._lock = threading.Lock()
+
+    # ----------------------------------------------------------------------
+
+    @classmethod
+    def build(cls, seq, timestamp, shape, fps, detections, tracked, track_infos, camera_seq=0):
+        """
+        Tạo snapshot từ output của ColorDetector / Tracker.
+
+        detections : [(x, y, w, h, ColorObject)]
+        tracked    : [(id, box)] cùng thứ tự với detections
+        track_infos: Tracker.get_tracks(...)
+        """
+        height, width = shape[:2] if shape is not None else (0, 0)
+
+        dets = []
+        for i, (x, y, w, h, obj) in enumerate(detections):
+            dets.append({
+                "x": x, "y": y, "w": w, "h": h,
+                "name": obj.name,
+                "bgr": list(obj.bgr),
+                "action_id": obj.action_id,
+                "duration_ms": obj.duration_ms,
+                "track_id": tracked[i][0] if i < len(tracked) else None,
+            })
+
+        tracks = []
+        for obj_id, x, y, w, h, label, vx, vy, age, traj in track_infos:
+            tracks.append({
+                "id": obj_id,
+                "x": x, "y": y, "w": w, "h": h,
+                "name": label.name if label is not None else "unknown",
+                "bgr": list(label.bgr) if label is not None else [200, 200, 200],
+                "vx": round(vx, 1),
+                "vy": round(vy, 1),
+                "age": round(age, 2),
+                "trajectory": [list(p) for p in traj],
+            })
+
+        return cls(seq, timestamp, width, height, round(fps, 1), dets, tracks, camera_seq)
+
+    # ----------------------------------------------------------------------
+
+    def to_dict(self):
+        return {
+            "seq": self.seq,
+            "timestamp": self.timestamp,
+            "width": self.width,
+            "height": self.height,
+            "fps": self.fps,
+            "detections": list(self.detections),
+            "tracks": list(self.tracks),
+        }
+
+    def to_json(self):
+        """JSON bytes (cache sau lần gọi đầu)."""
+        if self._json is None:
+            with self._lock:
+                if self._json is None:
+                    self._json = json.dumps(
+                        self.to_dict(), separators=(",", ":")
+                    ).encode("utf-8")
+        return self._json
+
+    def nbytes(self):
+        """Byte của JSON / binary đã serialize (cache)."""
+        return len(self._json or b"") + len(self._binary or b"")
+
+    def to_binary(self):
+        """Dạng binary gọn (xem layout ở docstring class), có cache."""
+        if self._binary is None:
+            with self._lock:
+                if self._binary is None:
+                    self._binary = self._pack()
+        return self._binary
+
+    # ----------------------------------------------------------------------
+
+    @staticmethod
+    def _str8(value):
+        data = str(value if value is not None else "").encode("utf-8")[:255]
+        return bytes((len(data),)) + data
+
+    @staticmethod
+    def _u16(value):
+        return min(max(int(value), 0), 0xFFFF)
+
+    def _pack(self):
+        u16 = self._u16
+        parts = [self._HEADER.pack(
+            self.MAGIC, self.seq & 0xFFFFFFFF, self.timestamp,
+            u16(self.width), u16(self.height), self.fps,
+            len(self.detections), len(self.tracks),
+        )]
+
+        for d in self.detections:
+            b, g, r = d["bgr"]
+            parts.append(self._DET.pack(
+                u16(d["x"]), u16(d["y"]), u16(d["w"]), u16(d["h"]),
+                b, g, r, d["action_id"] & 0xFF, max(0, d["duration_ms"]),
+            ))
+            parts.append(self._str8(d["name"]))
+            parts.append(self._str8(d["track_id"]))
+
+        for t in self.tracks:
+            b, g, r = t["bgr"]
+            parts.append(self._str8(t["id"]))
+            parts.append(self._TRACK.pack(
+                u16(t["x"]), u16(t["y"]), u16(t["w"]), u16(t["h"]),
+                b, g, r, t["vx"], t["vy"], t["age"],
+            ))
+            parts.append(self._str8(t["name"]))
+
+            points = t["trajectory"]
+            parts.append(struct.pack("<H", len(points)))
+            parts.extend(self._POINT.pack(u16(cx), u16(cy)) for cx, cy in points)
+
+        return b"".join(parts)
+
+    # ----------------------------------------------------------------------
+
+    def __repr__(self):
+        return (
+            f"<FrameSnapshot seq={self.seq}, detections={len(self.detections)}, "
+            f"tracks={len(self.tracks)}>"
+        )
@@ -0,0 +1,140 @@
+import threading
+import time
+from collections import deque
+
+from app.core.camera.scheduling import scheduler
+from app.core.metrics import registry
+from app.logging_config import init_logger
+
+logger = init_logger("PipelineStage")
+
+STAGE_SECONDS = registry.histogram(
+    "smartfactory_stage_seconds", "Service time of each pipeline stage", ["stage"]
+)
+
+
+class LatestQueue:
+    """
+    Hàng đợi có giới hạn, kiểu latest-wins giữa 2 stage.
+
+    put() không bao giờ block: đầy thì bỏ item cũ nhất (đếm vào drops)
+    → stage sau chậm không kéo stage trước chậm theo, và luôn xử lý
+    dữ liệu mới nhất. get() block tới khi có item hoặc hết timeout.
+    """
+
+    def __init__(self, maxsize=1):
+        self.maxsize = max(1, int(maxsize))
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self.puts = 0
+        self.drops = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.drops += 1
+            self._items.append(item)
+            self.puts += 1
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Item cũ nhất còn lại, hoặc None nếu hết timeout / đã đóng."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items or self._closed, timeout=timeout):
+                return None
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def clear(self):
+        with self._cond:
+            self._items.clear()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class StageStats:
+    """
+    Thời gian xử lý của 1 stage trên window mẫu gần nhất
+    (đồng thời ghi vào histogram smartfactory_stage_seconds).
+    """
+
+    def __init__(self, name, window=200):
+        self.samples = deque(maxlen=window)
+        self.processed = 0
+        self.errors = 0
+        self._histogram = STAGE_SECONDS.labels(name)
+
+    def record(self, seconds):
+        self.samples.append(seconds)
+        self.processed += 1
+        self._histogram.observe(seconds)
+
+    def recent(self, n=20):
+        """Thời gian xử lý trung bình (giây) của n mẫu gần nhất, None nếu chưa có."""
+        samples = list(self.samples)[-n:]
+        return sum(samples) / len(samples) if samples else None
+
+    def summary(self):
+        samples = sorted(self.samples)
+        n = len(samples)
+        return {
+            "processed": self.processed,
+            "errors": self.errors,
+            "service_ms_avg": round(sum(samples) / n * 1000, 2) if n else 0.0,
+            "service_ms_p95": round(samples[min(n - 1, int(n * 0.95))] * 1000, 2) if n else 0.0,
+            "service_ms_max": round(samples[-1] * 1000, 2) if n else 0.0,
+        }
+
+
+class Stage:
+    """
+    1 stage của pipeline chạy trên thread riêng:
+    lấy item từ in_queue → handler(item) → (tuỳ handler) đẩy sang stage sau.
+
+    handler tự put sang queue kế tiếp để có thể bỏ qua item (vd. không có
+    viewer thì không cần render). Lỗi trong handler được log, stage vẫn chạy.
+    """
+
+    def __init__(self, name, handler, in_queue, running):
+        self.name = name
+        self.handler = handler
+        self.queue = in_queue
+        self.running = running      # callable → False khi pipeline dừng
+        self.stats = StageStats(name)
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._loop, name=f"stage-{self.name}", daemon=True)
+        self.thread.start()
+
+    def _loop(self):
+        scheduler.pin(self.name)
+
+        while self.running():
+            item = self.queue.get(timeout=0.5)
+            if item is None:
+                continue
+
+            t0 = time.perf_counter()
+            try:
+                self.handler(item)
+            except Exception as e:
+                self.stats.errors += 1
+                logger.exception(f"Stage '{self.name}' error: {e}")
+            self.stats.record(time.perf_counter() - t0)
+
+    def summary(self):
+        data = self.stats.summary()
+        data["queue_depth"] = len(self.queue)
+        data["queue_drops"] = self.queue.drops
+        return data
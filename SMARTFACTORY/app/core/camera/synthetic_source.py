@@ -0,0 +1,308 @@
+"""
+Nguồn camera tổng hợp: băng chuyền có vật thể màu chạy qua, kèm ground
+truth (box + ID) cho từng frame → test / benchmark detect + track không
+cần camera.
+
+    synthetic://conveyor?width=640&height=480&fps=30&rate=1.5&speed=150
+                        &colors=red,green,blue,yellow&noise=4&drift=0.15
+                        &occlusion=1&seed=7&duration=60
+
+Tham số (đều tuỳ chọn):
+    width, height   kích thước frame (640x480)
+    fps             fps gốc của cảnh (mặc định fps cấu hình camera / 30)
+    rate            số vật thể xuất hiện / giây (1.0)
+    speed           tốc độ băng chuyền, px / giây (120)
+    speed_jitter    lệch tốc độ từng vật (tỉ lệ, 0 = cùng tốc độ băng)
+    size            cạnh vật thể, px (60; mỗi vật ±20%)
+    lanes           số làn trên băng (3)
+    colors          tên màu trong bảng màu mặc định (ColorConfig.DEFAULT)
+    noise           độ lệch chuẩn nhiễu cảm biến (4)
+    drift           biên độ dao động độ sáng (0.15 = ±15%)
+    drift_period    chu kỳ dao động độ sáng, giây (20)
+    occlusion       1 → có thanh chắn ngang băng che vật thể (0)
+    seed            seed ngẫu nhiên (0)
+    duration        độ dài cảnh, giây (0 = vô hạn)
+
+Cảnh hoàn toàn xác định theo (tham số, index frame): render(i) luôn ra
+cùng ảnh + ground truth → seek, loop, chạy lại đều so sánh được.
+"""
+
+import math
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlsplit
+
+import cv2
+import numpy as np
+
+from app.core.camera.file_source import FileSource
+from app.core.config.color_config import ColorConfig
+
+class ConveyorScene:
+    """Vẽ frame băng chuyền + ground truth theo index frame."""
+
+    DEFAULTS = {
+        "width": 640,
+        "height": 480,
+        "fps": 30.0,
+        "rate": 1.0,
+        "speed": 120.0,
+        "speed_jitter": 0.0,
+        "size": 60,
+        "lanes": 3,
+        "colors": "red,green,blue,yellow",
+        "noise": 4.0,
+        "drift": 0.15,
+        "drift_period": 20.0,
+        "occlusion": 0,
+        "seed": 0,
+        "duration": 0.0,
+    }
+
+    NOISE_TILES = 8
+    SLAT_PERIOD = 40        # khoảng cách vân băng chuyền (px)
+
+    def __init__(self, **params):
+        p = dict(self.DEFAULTS)
+        p.update({k: v for k, v in params.items() if k in self.DEFAULTS and v is not None})
+        for key, default in self.DEFAULTS.items():
+            if isinstance(default, int):
+                p[key] = int(float(p[key]))
+            elif isinstance(default, float):
+                p[key] = float(p[key])
+        self.params = p
+
+        self.width, self.height = max(64, p["width"]), max(64, p["height"])
+        self.fps = p["fps"] if p["fps"] > 0 else self.DEFAULTS["fps"]
+        self.rate = max(0.01, p["rate"])
+        self.speed = max(1.0, p["speed"])
+        self.seed = p["seed"]
+
+        palette = {c["name"]: c for c in ColorConfig.DEFAULT}
+        names = [n.strip() for n in p["colors"].split(",") if n.strip() in palette]
+        self.colors = [(name, self._fill_bgr(palette[name])) for name in names or ["red"]]
+
+        # Băng chuyền chiếm giữa frame, 2 thanh ray ở trên / dưới
+        self.belt_top = self.height // 10
+        self.belt_bottom = self.height - self.height // 10
+        lanes = max(1, p["lanes"])
+        lane_h = (self.belt_bottom - self.belt_top) / lanes
+        self.lane_centers = [int(self.belt_top + lane_h * (i + 0.5)) for i in range(lanes)]
+
+        # Thanh chắn che ngang băng (vd. cảm biến / tay robot)
+        self.occluder = None
+        if p["occlusion"]:
+            x0 = int(self.width * 0.6)
+            self.occluder = (x0, x0 + max(8, self.width // 16))
+
+        self._background = None
+        self._noise = None
+        self._parts = {}
+
+    @staticmethod
+    def _fill_bgr(color):
+        """Màu BGR giữa dải HSV của màu → detector với dải mặc định bắt được."""
+        h = (int(color["lower"][0]) + int(color["upper"][0])) // 2
+        hsv = np.uint8([[[h, 210, 210]]])
+        return tuple(int(c) for c in cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)[0, 0])
+
+    # ----------------------------------------------------------------------
+
+    @property
+    def frame_count(self):
+        return int(self.params["duration"] * self.fps) if self.params["duration"] > 0 else 0
+
+    def prepare(self):
+        """Dựng nền băng chuyền (rộng thêm 1 chu kỳ vân để trượt) + các tile nhiễu."""
+        w, h = self.width + self.SLAT_PERIOD, self.height
+        bg = np.full((h, w, 3), 110, dtype=np.uint8)
+        bg[self.belt_top:self.belt_bottom] = 62
+        for x in range(0, w, self.SLAT_PERIOD):
+            bg[self.belt_top:self.belt_bottom, x:x + 3] = 52
+        bg[self.belt_top - 4:self.belt_top] = 150
+        bg[self.belt_bottom:self.belt_bottom + 4] = 150
+        self._background = bg
+
+        rng = np.random.default_rng(self.seed)
+        sigma = self.params["noise"]
+        self._noise = [
+            rng.normal(0, sigma, (self.height, self.width, 3)).astype(np.int16) if sigma > 0 else None
+            for _ in range(self.NOISE_TILES)
+        ]
+        return True
+
+    @property
+    def ready(self):
+        return self._background is not None
+
+    # ----------------------------------------------------------------------
+
+    def _part(self, k):
+        """Thuộc tính cố định của vật thứ k (xác định theo seed)."""
+        part = self._parts.get(k)
+        if part is None:
+            rng = np.random.default_rng((self.seed, k))
+            size = self.params["size"]
+            w = int(size * rng.uniform(0.8, 1.2))
+            h = int(size * rng.uniform(0.8, 1.2))
+            jitter = self.params["speed_jitter"]
+            part = {
+                "id": k + 1,
+                "spawn": (k + rng.uniform(0.0, 0.3)) / self.rate,
+                "lane": int(rng.integers(len(self.lane_centers))),
+                "color": int(rng.integers(len(self.colors))),
+                "w": w, "h": h,
+                "speed": self.speed * (1.0 + rng.uniform(-jitter, jitter)),
+                "round": bool(rng.integers(2)),
+            }
+            if len(self._parts) > 4096:
+                self._parts.clear()
+            self._parts[k] = part
+        return part
+
+    def _active(self, t):
+        """[(part, x, y)] các vật đang (một phần) trong frame tại thời điểm t."""
+        slowest = self.speed * (1.0 - self.params["speed_jitter"])
+        travel = (self.width + 2 * self.params["size"] * 1.2) / max(1.0, slowest)
+        first = max(0, int(math.floor((t - travel) * self.rate)) - 1)
+        last = int(math.floor(t * self.rate))
+
+        active = []
+        for k in range(first, last + 1):
+            part = self._part(k)
+            if part["spawn"] > t:
+                continue
+            x = int(round(-part["w"] + part["speed"] * (t - part["spawn"])))
+            if x >= self.width:
+                continue
+            y = self.lane_centers[part["lane"]] - part["h"] // 2
+            active.append((part, x, y))
+        return active
+
+    def truth(self, index):
+        """
+        Ground truth của frame index:
+        [{"id", "color", "box": (x, y, w, h) phần nằm trong frame, "visible", "area"}]
+        visible = tỉ lệ diện tích vật nhìn thấy (bị cắt mép frame / thanh chắn),
+        area    = diện tích nhìn thấy theo box (px).
+        """
+        t = index / self.fps
+        objects = []
+        for part, x, y in self._active(t):
+            x0, x1 = max(0, x), min(self.width, x + part["w"])
+            if x1 <= x0:
+                continue
+            seen = x1 - x0
+            if self.occluder is not None:
+                o0, o1 = self.occluder
+                seen -= max(0, min(x1, o1) - max(x0, o0))
+            objects.append({
+                "id": part["id"],
+                "color": self.colors[part["color"]][0],
+                "box": (x0, y, x1 - x0, part["h"]),
+                "visible": round(seen / float(part["w"]), 3),
+                "area": seen * part["h"],
+            })
+        return objects
+
+    def render(self, index, out=None):
+        """Frame BGR thứ index (ghi vào out nếu đúng kích thước)."""
+        if not self.ready:
+            self.prepare()
+
+        t = index / self.fps
+        offset = int(self.speed * t) % self.SLAT_PERIOD
+        view = self._background[:, self.SLAT_PERIOD - offset:self.SLAT_PERIOD - offset + self.width]
+
+        if out is None or out.shape != (self.height, self.width, 3) or out.dtype != np.uint8:
+            out = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        np.copyto(out, view)
+
+        for part, x, y in self._active(t):
+            color = self.colors[part["color"]][1]
+            if part["round"]:
+                cv2.ellipse(out, (x + part["w"] // 2, y + part["h"] // 2),
+                            (part["w"] // 2, part["h"] // 2), 0, 0, 360, color, -1)
+            else:
+                cv2.rectangle(out, (x, y), (x + part["w"] - 1, y + part["h"] - 1), color, -1)
+
+        if self.occluder is not None:
+            o0, o1 = self.occluder
+            out[:, o0:o1] = 40
+
+        # Độ sáng dao động chậm (đèn, nắng qua cửa sổ) + nhiễu cảm biến
+        drift = self.params["drift"]
+        gain = 1.0 + drift * math.sin(2 * math.pi * t / max(0.1, self.params["drift_period"]))
+        noise = self._noise[index % self.NOISE_TILES]
+        if noise is not None or gain != 1.0:
+            frame = out.astype(np.int16)
+            if gain != 1.0:
+                frame = (frame * gain).astype(np.int16)
+            if noise is not None:
+                frame += noise
+            np.clip(frame, 0, 255, out=frame)
+            out[...] = frame
+        return out
+
+
+# ---------------------------------------------------------------------------
+
+
+class SyntheticSource(FileSource):
+    """
+    ConveyorScene dưới dạng FileSource → CameraReader / pipeline / batch
+    dùng như video ghi sẵn (mode realtime / fixed / fast, loop, seek).
+
+    Ghi nhớ seq FrameRing → index frame của ~1000 frame gần nhất để đối
+    chiếu snapshot của pipeline (FrameSnapshot.camera_seq) với ground truth.
+    """
+
+    SEQ_HISTORY = 1024
+
+    def __init__(self, url, fps=None, **kwargs):
+        params = dict(parse_qsl(urlsplit(url).query))
+        params.setdefault("fps", fps)
+        self.scene = ConveyorScene(**params)
+        super().__init__(url, fps=self.scene.fps, **kwargs)
+        self._seq_index = OrderedDict()
+
+    def open(self):
+        return self.scene.prepare()
+
+    def is_opened(self):
+        return self.scene.ready
+
+    @property
+    def source_fps(self):
+        return self.scene.fps
+
+    @property
+    def frame_count(self):
+        return self.scene.frame_count
+
+    def _seek(self, index):
+        pass    # cảnh tính theo index, không có trạng thái đọc
+
+    def _read(self, buf=None):
+        if self.frame_count and self.position >= self.frame_count:
+            return None
+
+        # Chỉ thread capture commit vào ring → frame này sẽ mang seq + 1
+        self._seq_index[self.ring.seq + 1] = self.position
+        while len(self._seq_index) > self.SEQ_HISTORY:
+            self._seq_index.popitem(last=False)
+        return self.scene.render(self.position, out=buf)
+
+    # ----------------------------------------------------------------------
+
+    def index_for_seq(self, seq):
+        """Index frame của seq trong ring, None nếu đã quá cũ."""
+        return self._seq_index.get(seq)
+
+    def truth_for_seq(self, seq):
+        index = self.index_for_seq(seq)
+        return self.scene.truth(index) if index is not None else None
+
+    def stats(self):
+        data = super().stats()
+        data["scene"] = dict(self.scene.params)
+        return data
@@ -1,49 +1,60 @@
 from collections import deque
-import time
 import math
 import uuid
 import threading
 
+from app.core.camera.clock import system_clock
+
 
 class Tracker:
     """
     Đơn vị theo dõi vật thể theo bounding box.
 
     Lưu trữ:
-        id → [x, y, w, h, last_seen_timestamp, trajectory_deque]
+        id → [x, y, w, h, last_seen_timestamp, trajectory_deque, label, first_seen]
 
     Các chức năng:
         - update(): gán ID cho box mới
         - giữ history vị trí (trajectory)
         - loại bỏ object mất dấu
         - trả về quỹ đạo (trajectory) theo TTL
+
+    Thời gian (max_lost, TTL, vận tốc, tuổi) lấy từ clock → replay
+    nhanh / chậm (ScaledClock) hay offline (ManualClock) vẫn nhất quán.
     """
 
-    def __init__(self, max_lost=15, max_history=20, match_dist=80.0):
-        # Object map: id → [x, y, w, h, last_time, trajectory]
+    def __init__(self, max_lost=15, max_history=20, match_dist=80.0, clock=None):
+        # Object map: id → [x, y, w, h, last_time, trajectory, label, first_time]
         self.objects = {}
 
         # Settings
         self.max_lost = max_lost        # thời gian tối đa bị mất dấu
         self.max_history = max_history  # số điểm lưu trong lịch sử
         self.match_dist = match_dist    # khoảng cách tối đa để match object
+        self.clock = clock or system_clock
 
         # Thread-safety
         self.lock = threading.Lock()
 
     # ----------------------------------------------------------------------
 
-    def update(self, boxes):
+    def update(self, boxes, labels=None):
         """
         Nhận danh sách bounding box mới → trả về danh sách (id, box).
 
         boxes format: [(x, y, w, h), ...]
+        labels: (tuỳ chọn) dữ liệu gắn theo từng box, ví dụ ColorObject.
+                Label được lưu trên track → DrawManager lấy màu trực tiếp,
+                không phải ghép lại với detections.
         """
-        now = time.time()
+        now = self.clock.time()
         updated_ids = []
 
+        if labels is None:
+            labels = [None] * len(boxes)
+
         with self.lock:
-            for x, y, w, h in boxes:
+            for (x, y, w, h), label in zip(boxes, labels):
                 cx, cy = x + w // 2, y + h // 2   # tâm box
 
                 best_id = None
@@ -51,7 +62,7 @@ class Tracker:
 
                 # Tìm object có vị trí gần nhất
                 for obj_id, info in self.objects.items():
-                    ox, oy, ow, oh, last_time, traj = info
+                    ox, oy, ow, oh = info[0], info[1], info[2], info[3]
                     ocx, ocy = ox + ow // 2, oy + oh // 2
 
                     dist = math.hypot(cx - ocx, cy - ocy)
@@ -66,7 +77,9 @@ class Tracker:
                     self.objects[obj_id] = [
                         x, y, w, h,
                         now,
-                        deque(maxlen=self.max_history)
+                        deque(maxlen=self.max_history),
+                        label,
+                        now
                     ]
                     self.objects[obj_id][5].append((cx, cy, now))
 
@@ -78,6 +91,8 @@ class Tracker:
                     obj[0], obj[1], obj[2], obj[3] = x, y, w, h
                     obj[4] = now
                     obj[5].append((cx, cy, now))
+                    if label is not None:
+                        obj[6] = label
 
                     updated_ids.append((best_id, (x, y, w, h)))
 
@@ -93,11 +108,58 @@ class Tracker:
 
     # ----------------------------------------------------------------------
 
+    def get_label(self, obj_id):
+        """Trả về label (ColorObject) gắn với track, None nếu không có."""
+        with self.lock:
+            info = self.objects.get(obj_id)
+            return info[6] if info is not None else None
+
+    # ----------------------------------------------------------------------
+
+    def get_tracks(self, obj_ids, ttl=3.0, velocity_window=5):
+        """
+        Thông tin đầy đủ của các track (1 lần lock cho cả danh sách).
+
+        Return list (id, x, y, w, h, label, vx, vy, age, trajectory):
+            - vx, vy: vận tốc tâm box (pixel/giây) trên velocity_window
+              điểm gần nhất
+            - age: thời gian (giây) từ lúc track xuất hiện
+            - trajectory: [(cx, cy)] trong ttl giây gần nhất
+        """
+        now = self.clock.time()
+        result = []
+
+        with self.lock:
+            for obj_id in obj_ids:
+                info = self.objects.get(obj_id)
+                if info is None:
+                    continue
+
+                history = info[5]
+                vx = vy = 0.0
+                if len(history) >= 2:
+                    x0, y0, t0 = history[max(0, len(history) - velocity_window)]
+                    x1, y1, t1 = history[-1]
+                    if t1 > t0:
+                        vx = (x1 - x0) / (t1 - t0)
+                        vy = (y1 - y0) / (t1 - t0)
+
+                traj = [(cx, cy) for cx, cy, t in history if now - t <= ttl]
+
+                result.append((
+                    obj_id, info[0], info[1], info[2], info[3], info[6],
+                    vx, vy, now - info[7], traj,
+                ))
+
+        return result
+
+    # ----------------------------------------------------------------------
+
     def get_trajectory(self, obj_id, ttl=3.0):
         """
         Trả về quỹ đạo của object trong vòng ttl giây gần nhất.
         """
-        now = time.time()
+        now = self.clock.time()
 
         with self.lock:
             if obj_id not in self.objects:
@@ -10,7 +10,24 @@ class AppConfig:
         "debug": True,
         "camera_config": "config/config_camera.json",
         "mqtt_config": "config/config_mqtt.json",
-        "color_config": "config/colors.json"
+        "color_config": "config/colors.json",
+        "memory": {
+            "enabled": True,
+            "sample_interval_s": 30,
+            "history": 2880,
+            "growth_alert_mb": 64,
+            "growth_window_s": 3600,
+            "tracemalloc_frames": 10
+        },
+        "watchdog": {
+            "enabled": True,
+            "interval_s": 1.0,
+            "capture_timeout_s": 5.0,
+            "detect_timeout_s": 10.0,
+            "mqtt_timeout_s": 60.0,
+            "backoff_initial_s": 2.0,
+            "backoff_max_s": 60.0
+        }
     }
 
     def __init__(self, path="config/config_app.json"):
@@ -26,6 +43,34 @@ class AppConfig:
         # --- APP LEVEL ---
         self.debug = ConfigValidator.require(cfg, "debug", True)
 
+        # --- MEMORY MONITOR ---
+        # Lấy mẫu RSS mỗi sample_interval_s, giữ `history` mẫu; cảnh báo khi
+        # RSS tăng > growth_alert_mb trong growth_window_s. Xem app/core/memory.py
+        default_mem = self.DEFAULT["memory"]
+        mem = ConfigValidator.require(cfg, "memory", default_mem, expected_type=dict)
+        self.memory = {
+            "enabled": ConfigValidator.require(mem, "enabled", default_mem["enabled"], expected_type=bool),
+            "sample_interval_s": ConfigValidator.require(mem, "sample_interval_s", default_mem["sample_interval_s"], expected_type=(int, float)),
+            "history": ConfigValidator.require(mem, "history", default_mem["history"], expected_type=int),
+            "growth_alert_mb": ConfigValidator.require(mem, "growth_alert_mb", default_mem["growth_alert_mb"], expected_type=(int, float)),
+            "growth_window_s": ConfigValidator.require(mem, "growth_window_s", default_mem["growth_window_s"], expected_type=(int, float)),
+            "tracemalloc_frames": ConfigValidator.require(mem, "tracemalloc_frames", default_mem["tracemalloc_frames"], expected_type=int),
+        }
+
+        # --- WATCHDOG ---
+        # Không tiến triển quá *_timeout_s → restart thành phần (capture / detect /
+        # MQTT loop), thử lại với backoff x2. Xem app/core/watchdog.py
+        default_wd = self.DEFAULT["watchdog"]
+        wd = ConfigValidator.require(cfg, "watchdog", default_wd, expected_type=dict)
+        self.watchdog = {
+            "enabled": ConfigValidator.require(wd, "enabled", default_wd["enabled"], expected_type=bool),
+            **{
+                key: ConfigValidator.require(wd, key, default_wd[key], expected_type=(int, float))
+                for key in ("interval_s", "capture_timeout_s", "detect_timeout_s", "mqtt_timeout_s",
+                            "backoff_initial_s", "backoff_max_s")
+            },
+        }
+
         # --- CHILD CONFIG PATHS ---
         camera_path = cfg.get("camera_config", self.DEFAULT["camera_config"])
         mqtt_path = cfg.get("mqtt_config", self.DEFAULT["mqtt_config"])
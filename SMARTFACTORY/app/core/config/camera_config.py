@@ -1,5 +1,6 @@
 from .loader import ConfigLoader
 from .validator import ConfigValidator
+from app.core.thermal import THROTTLE_C
 
 
 class CameraConfig:
@@ -8,11 +9,19 @@ class CameraConfig:
             "src": 0,
             "width": 640,
             "height": 480,
-            "fps": 30
+            "fps": 30,
+            "passthrough": True,
+            "decode_workers": 0,
+            "playback": {
+                "mode": "realtime",
+                "loop": True,
+                "speed": 1.0
+            }
         },
         "detection": {
             "min_contour_area": 1500,
-            "max_detection_fps": 30
+            "max_detection_fps": 30,
+            "scale": 1
         },
         "tracker": {
             "max_lost": 15,
@@ -20,7 +29,36 @@ class CameraConfig:
             "match_dist": 80
         },
         "drawing": {
-            "show_fps": True
+            "show_fps": True,
+            "overlay_mode": "server",
+            "jpeg_quality": 95
+        },
+        "adaptive": {
+            "enabled": False,
+            "interval_s": 2.0,
+            "target_latency_ms": 150,
+            "cpu_high": 85,
+            "cpu_low": 60,
+            "restore_after": 3,
+            "min_detection_fps": 5,
+            "max_scale": 4,
+            "min_jpeg_quality": 50
+        },
+        "thermal": {
+            "enabled": True,
+            "sysfs_root": "/sys",
+            "zone": None,
+            "interval_s": 5.0,
+            # Bậc cuối < THROTTLE_C (app/core/thermal.py, ~80°C trên Pi)
+            "levels_c": [65, 70, 75],
+            "hysteresis_c": 5,
+            "stream_fps": 10
+        },
+        "scheduling": {
+            "enabled": False,
+            "opencv_threads": None,
+            "cpus": {},
+            "nice": {}
         }
         # Colors are loaded separately via ColorConfig
     }
@@ -35,11 +73,37 @@ class CameraConfig:
         self.height = ConfigValidator.require(cam, "height", self.DEFAULT["camera"]["height"])
         self.fps = ConfigValidator.require(cam, "fps", self.DEFAULT["camera"]["fps"])
 
+        # MJPEG + overlay "client" → stream nguyên JPEG của camera (không decode/encode)
+        self.passthrough = ConfigValidator.require(cam, "passthrough", self.DEFAULT["camera"]["passthrough"], expected_type=bool)
+
+        # Số thread decode JPEG song song cho camera MJPEG (0 = decode lazy khi cần)
+        self.decode_workers = max(0, ConfigValidator.require(cam, "decode_workers", self.DEFAULT["camera"]["decode_workers"], expected_type=int))
+
+        # Nguồn là file video / thư mục ảnh (src = đường dẫn):
+        # mode "realtime" | "fixed" (theo fps) | "fast", loop, speed (clock x speed)
+        default_playback = self.DEFAULT["camera"]["playback"]
+        playback = ConfigValidator.require(cam, "playback", default_playback, expected_type=dict)
+        self.playback = {
+            "mode": ConfigValidator.require(playback, "mode", default_playback["mode"], expected_type=str),
+            "loop": ConfigValidator.require(playback, "loop", default_playback["loop"], expected_type=bool),
+            "speed": ConfigValidator.require(playback, "speed", default_playback["speed"], expected_type=(int, float)),
+        }
+        if self.playback["mode"] not in ("realtime", "fixed", "fast"):
+            self.playback["mode"] = default_playback["mode"]
+        if self.playback["speed"] <= 0:
+            self.playback["speed"] = default_playback["speed"]
+
         # --- DETECTION ---
         det = cfg.get("detection", {})
         self.min_area = ConfigValidator.require(det, "min_contour_area", self.DEFAULT["detection"]["min_contour_area"])
         self.max_det_fps = ConfigValidator.require(det, "max_detection_fps", self.DEFAULT["detection"]["max_detection_fps"])
 
+        # Detect trên frame thu nhỏ 1/scale (MJPEG: decode thẳng ở kích thước
+        # nhỏ bằng DCT scaling). Chỉ nhận 1, 2, 4, 8.
+        self.det_scale = ConfigValidator.require(det, "scale", self.DEFAULT["detection"]["scale"], expected_type=int)
+        if self.det_scale not in (1, 2, 4, 8):
+            self.det_scale = self.DEFAULT["detection"]["scale"]
+
         # --- TRACKER ---
         trk = cfg.get("tracker", {})
         self.max_lost = ConfigValidator.require(trk, "max_lost", self.DEFAULT["tracker"]["max_lost"])
@@ -50,5 +114,64 @@ class CameraConfig:
         draw = cfg.get("drawing", {})
         self.show_fps = ConfigValidator.require(draw, "show_fps", self.DEFAULT["drawing"]["show_fps"])
 
+        # "server" → vẽ overlay vào frame trên Pi
+        # "client" → stream frame gốc, browser tự vẽ từ /api/camera/tracks
+        self.overlay_mode = ConfigValidator.require(draw, "overlay_mode", self.DEFAULT["drawing"]["overlay_mode"], expected_type=str)
+        if self.overlay_mode not in ("server", "client"):
+            self.overlay_mode = self.DEFAULT["drawing"]["overlay_mode"]
+
+        self.jpeg_quality = ConfigValidator.require(draw, "jpeg_quality", self.DEFAULT["drawing"]["jpeg_quality"], expected_type=int)
+        self.jpeg_quality = min(max(self.jpeg_quality, 1), 100)
+
+        # --- ADAPTIVE QUALITY ---
+        # Giữ độ trễ detect quanh target_latency_ms / CPU dưới cpu_high bằng cách
+        # hạ chất lượng JPEG → FPS detect → tăng scale detect (và trả lại khi dư tải).
+        # Giá trị cấu hình ở trên là mức trần. Xem app/core/camera/quality.py
+        default_adaptive = self.DEFAULT["adaptive"]
+        adaptive = ConfigValidator.require(cfg, "adaptive", default_adaptive, expected_type=dict)
+        self.adaptive = {
+            "enabled": ConfigValidator.require(adaptive, "enabled", default_adaptive["enabled"], expected_type=bool),
+            **{
+                key: ConfigValidator.require(adaptive, key, default_adaptive[key], expected_type=(int, float))
+                for key in ("interval_s", "target_latency_ms", "cpu_high", "cpu_low",
+                            "restore_after", "min_detection_fps", "max_scale", "min_jpeg_quality")
+            },
+        }
+        if self.adaptive["max_scale"] not in (1, 2, 4, 8):
+            self.adaptive["max_scale"] = default_adaptive["max_scale"]
+
+        # --- THERMAL ---
+        # Đọc nhiệt độ CPU qua sysfs, giảm tải theo bậc trước khi kernel throttle:
+        # FPS stream → overlay → scale detect. Xem app/core/thermal.py
+        default_thermal = self.DEFAULT["thermal"]
+        thermal = ConfigValidator.require(cfg, "thermal", default_thermal, expected_type=dict)
+        self.thermal = {
+            "enabled": ConfigValidator.require(thermal, "enabled", default_thermal["enabled"], expected_type=bool),
+            "sysfs_root": ConfigValidator.require(thermal, "sysfs_root", default_thermal["sysfs_root"], expected_type=str),
+            "zone": ConfigValidator.require(thermal, "zone", default_thermal["zone"], expected_type=str),
+            "levels_c": ConfigValidator.require(thermal, "levels_c", default_thermal["levels_c"], expected_type=list),
+            **{
+                key: ConfigValidator.require(thermal, key, default_thermal[key], expected_type=(int, float))
+                for key in ("interval_s", "hysteresis_c", "stream_fps")
+            },
+        }
+        # 3 mức, đều dưới ngưỡng throttle mềm → giảm tải xong trước khi firmware hạ tần số
+        if len(self.thermal["levels_c"]) != 3 or not all(
+            isinstance(t, (int, float)) and t < THROTTLE_C for t in self.thermal["levels_c"]
+        ):
+            self.thermal["levels_c"] = default_thermal["levels_c"]
+
+        # --- SCHEDULING ---
+        # Ghim core cho từng stage (capture / detect / track / render / encode / web),
+        # số thread OpenCV, nice cho thread web. Xem app/core/camera/scheduling.py
+        default_sched = self.DEFAULT["scheduling"]
+        sched = ConfigValidator.require(cfg, "scheduling", default_sched, expected_type=dict)
+        self.scheduling = {
+            "enabled": ConfigValidator.require(sched, "enabled", default_sched["enabled"], expected_type=bool),
+            "opencv_threads": ConfigValidator.require(sched, "opencv_threads", default_sched["opencv_threads"], expected_type=int),
+            "cpus": ConfigValidator.require(sched, "cpus", default_sched["cpus"], expected_type=dict),
+            "nice": ConfigValidator.require(sched, "nice", default_sched["nice"], expected_type=dict),
+        }
+
         # --- COLORS (always empty here, loaded via ColorConfig) ---
         self.colors = []
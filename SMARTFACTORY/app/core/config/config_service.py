@@ -13,5 +13,11 @@ class ConfigService:
     def get_color_config(self):
         return self.app_cfg.color_config
 
+    def get_memory_config(self):
+        return self.app_cfg.memory
+
+    def get_watchdog_config(self):
+        return self.app_cfg.watchdog
+
 
 config_service = ConfigService()
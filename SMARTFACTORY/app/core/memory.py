@@ -0,0 +1,298 @@
+"""
+Theo dõi bộ nhớ cho service chạy nhiều ngày liền.
+
+- Ước lượng byte theo thành phần: mỗi thành phần đăng ký 1 hàm trả
+  {tên con: byte} (ring capture, overlay, JPEG, last_messages MQTT...).
+- RSS của process lấy mẫu định kỳ (psutil, fallback /proc/self/statm)
+  → xu hướng MB/giờ trên toàn bộ lịch sử.
+- Cảnh báo khi RSS tăng quá growth_alert_mb trong growth_window_s
+  (so với mức thấp nhất trong cửa sổ); hết cảnh báo khi mức tăng
+  xuống dưới 1/2 ngưỡng.
+- tracemalloc bật / tắt theo yêu cầu (tốn CPU + RAM khi đang bật):
+  diff() so snapshot hiện tại với snapshot lúc bật → dòng code nào
+  đang cấp phát thêm.
+"""
+
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+from app.core.metrics import registry
+from app.logging_config import init_logger
+
+try:
+    import psutil
+except ImportError:     # pragma: no cover - psutil có trong requirements
+    psutil = None
+
+logger = init_logger("MemoryMonitor")
+
+MB = 1024 * 1024
+
+RSS_BYTES = registry.gauge("smartfactory_process_rss_bytes", "Resident set size of the process")
+COMPONENT_BYTES = registry.gauge(
+    "smartfactory_memory_component_bytes", "Estimated bytes held per component", ["component"]
+)
+GROWTH_ALERTS = registry.counter(
+    "smartfactory_memory_growth_alerts_total", "RSS growth alerts raised"
+)
+
+
+def process_rss():
+    """RSS hiện tại (byte), None nếu không đọc được."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class MemoryMonitor:
+    DEFAULTS = {
+        "enabled": True,
+        "sample_interval_s": 30,
+        "history": 2880,            # 24 giờ với chu kỳ 30 s
+        "growth_alert_mb": 64,
+        "growth_window_s": 3600,
+        "tracemalloc_frames": 10,
+    }
+
+    def __init__(self):
+        self.config = dict(self.DEFAULTS)
+        self._components = {}
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+        self.history = deque(maxlen=self.config["history"])    # (time, rss, components_total)
+        self.alerts = deque(maxlen=20)
+        self.alerting = False
+
+        self._tracemalloc_baseline = None
+        self._thread = None
+        self._stop_event = threading.Event()
+
+        RSS_BYTES.set_function(process_rss)
+        COMPONENT_BYTES.set_function(
+            lambda: {(name,): n for name, n in self.components().items()}
+        )
+
+    # ----------------------------------------------------------------------
+
+    def configure(self, config):
+        self.config.update({k: v for k, v in (config or {}).items() if k in self.DEFAULTS})
+        with self._lock:
+            self.history = deque(self.history, maxlen=max(2, int(self.config["history"])))
+
+    def register(self, name, fn):
+        """fn() → {tên con: byte} (hoặc 1 số byte) của thành phần `name`."""
+        self._components[name] = fn
+
+    def on_alert(self, fn):
+        """Callback fn(alert_dict) khi vượt ngưỡng tăng RSS."""
+        self._callbacks.append(fn)
+
+    def components(self):
+        """{"<thành phần>.<con>": byte}, thành phần lỗi thì bỏ qua."""
+        usage = {}
+        for name, fn in list(self._components.items()):
+            try:
+                value = fn()
+            except Exception as e:
+                logger.debug(f"Memory estimate '{name}' failed: {e}")
+                continue
+            if isinstance(value, dict):
+                for sub, n in value.items():
+                    usage[f"{name}.{sub}"] = int(n)
+            elif value is not None:
+                usage[name] = int(value)
+        return usage
+
+    # ----------------------------------------------------------------------
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="memory-monitor", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"Memory monitor: every {self.config['sample_interval_s']}s, alert when RSS grows "
+            f">{self.config['growth_alert_mb']} MB in {self.config['growth_window_s']}s"
+        )
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                logger.exception(f"Memory sample failed: {e}")
+            self._stop_event.wait(max(1.0, float(self.config["sample_interval_s"])))
+
+    def sample(self, now=None):
+        now = time.time() if now is None else now
+        rss = process_rss()
+        if rss is None:
+            return None
+
+        total = sum(self.components().values())
+        with self._lock:
+            self.history.append((now, rss, total))
+        self._check_growth(now, rss)
+        return rss
+
+    def _check_growth(self, now, rss):
+        window = float(self.config["growth_window_s"])
+        threshold = float(self.config["growth_alert_mb"]) * MB
+
+        with self._lock:
+            recent = [r for t, r, _ in self.history if t >= now - window]
+        if len(recent) < 2:
+            return
+
+        growth = rss - min(recent)
+        if growth >= threshold and not self.alerting:
+            self.alerting = True
+            top = sorted(self.components().items(), key=lambda kv: kv[1], reverse=True)[:5]
+            alert = {
+                "time": now,
+                "rss_mb": round(rss / MB, 1),
+                "growth_mb": round(growth / MB, 1),
+                "window_s": window,
+                "top_components": {name: n for name, n in top},
+            }
+            self.alerts.append(alert)
+            GROWTH_ALERTS.inc()
+            logger.warning(
+                f"RSS grew {alert['growth_mb']} MB in the last {window:g}s "
+                f"(now {alert['rss_mb']} MB)"
+            )
+            for fn in self._callbacks:
+                try:
+                    fn(alert)
+                except Exception as e:
+                    logger.exception(f"Memory alert callback error: {e}")
+
+        elif growth < threshold / 2 and self.alerting:
+            self.alerting = False
+            logger.info(f"RSS growth back to {growth / MB:.1f} MB, alert cleared")
+
+    # ----------------------------------------------------------------------
+
+    def trend(self):
+        """RSS đầu / cuối / đỉnh và độ dốc (MB / giờ, bình phương tối thiểu)."""
+        with self._lock:
+            samples = list(self.history)
+        if not samples:
+            return {"samples": 0}
+
+        times = [t for t, _, _ in samples]
+        values = [r for _, r, _ in samples]
+        n = len(samples)
+
+        slope = 0.0
+        if n >= 2:
+            mean_t = sum(times) / n
+            mean_r = sum(values) / n
+            var = sum((t - mean_t) ** 2 for t in times)
+            if var > 0:
+                slope = sum((t - mean_t) * (r - mean_r) for t, r in zip(times, values)) / var
+
+        return {
+            "samples": n,
+            "span_s": round(times[-1] - times[0], 1),
+            "first_mb": round(values[0] / MB, 1),
+            "last_mb": round(values[-1] / MB, 1),
+            "peak_mb": round(max(values) / MB, 1),
+            "slope_mb_per_hour": round(slope * 3600 / MB, 2),
+        }
+
+    def series(self, limit=None):
+        """[(time, rss_mb, components_mb)] để vẽ biểu đồ."""
+        with self._lock:
+            samples = list(self.history)
+        if limit:
+            samples = samples[-limit:]
+        return [(round(t, 1), round(r / MB, 2), round(c / MB, 2)) for t, r, c in samples]
+
+    # ----------------------------------------------------------------------
+
+    def tracemalloc_start(self, frames=None):
+        """Bật tracemalloc và chụp snapshot gốc (đã bật thì giữ nguyên)."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(int(frames or self.config["tracemalloc_frames"]))
+            logger.info("tracemalloc started")
+        if self._tracemalloc_baseline is None:
+            self._tracemalloc_baseline = self._snapshot()
+        return True
+
+    def tracemalloc_stop(self):
+        self._tracemalloc_baseline = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            logger.info("tracemalloc stopped")
+
+    @staticmethod
+    def _snapshot():
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ))
+
+    def tracemalloc_diff(self, limit=20, reset=False, group_by="lineno"):
+        """
+        Top `limit` vị trí cấp phát tăng nhiều nhất so với baseline.
+        reset=True → snapshot hiện tại thành baseline mới.
+        None nếu tracemalloc chưa bật.
+        """
+        if not tracemalloc.is_tracing() or self._tracemalloc_baseline is None:
+            return None
+
+        snapshot = self._snapshot()
+        stats = snapshot.compare_to(self._tracemalloc_baseline, group_by)
+        current, peak = tracemalloc.get_traced_memory()
+
+        if reset:
+            self._tracemalloc_baseline = snapshot
+
+        return {
+            "traced_mb": round(current / MB, 2),
+            "traced_peak_mb": round(peak / MB, 2),
+            "top": [
+                {
+                    "location": str(stat.traceback[0]) if stat.traceback else "?",
+                    "size_kb": round(stat.size / 1024, 1),
+                    "size_diff_kb": round(stat.size_diff / 1024, 1),
+                    "count": stat.count,
+                    "count_diff": stat.count_diff,
+                }
+                for stat in stats[:max(1, int(limit))]
+            ],
+        }
+
+    # ----------------------------------------------------------------------
+
+    def status(self):
+        rss = process_rss()
+        components = self.components()
+        return {
+            "rss_mb": round(rss / MB, 1) if rss is not None else None,
+            "components": components,
+            "components_total_mb": round(sum(components.values()) / MB, 2),
+            "trend": self.trend(),
+            "alerting": self.alerting,
+            "alerts": list(self.alerts),
+            "tracemalloc": tracemalloc.is_tracing(),
+            "config": dict(self.config),
+        }
+
+
+# Singleton instance
+memory_monitor = MemoryMonitor()
@@ -0,0 +1,258 @@
+"""
+Metrics runtime (Counter / Gauge / Histogram) xuất ra Prometheus text format.
+
+Chi phí thấp: mỗi lần inc / observe chỉ là 1 lock + vài phép cộng,
+không cấp phát. Giá trị "kéo" (số viewer, độ sâu queue...) dùng
+set_function() → chỉ được đọc khi Prometheus scrape /api/metrics.
+
+    from app.core.metrics import registry
+
+    FRAMES = registry.counter("smartfactory_frames_total", "Frames", ["source"])
+    FRAMES.labels("usb").inc()
+
+    STAGE = registry.histogram("smartfactory_stage_seconds", "Stage time", ["stage"])
+    STAGE.labels("detect").observe(0.012)
+"""
+
+import bisect
+import math
+import threading
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _labels_text(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+# ---------------------------------------------------------------------------
+
+
+class _Child:
+    """Giá trị của 1 bộ label (counter / gauge)."""
+
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value):
+        self.value = float(value)
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            if idx < len(self.counts):
+                self.counts[idx] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Metric:
+    """Base: quản lý các child theo bộ giá trị label."""
+
+    TYPE = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        self._function = None
+
+        # Không label → dùng luôn 1 child, gọi inc() / observe() trực tiếp
+        self._default = self._new_child() if not self.labelnames else None
+
+    def _new_child(self):
+        return _Child()
+
+    def labels(self, *values, **kwargs):
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        key = tuple(str(v) for v in values)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {key}")
+
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def set_function(self, fn):
+        """
+        Giá trị tính lúc scrape. fn() trả về số (metric không label)
+        hoặc dict {tuple label: số}. Lỗi / None → bỏ qua.
+        """
+        self._function = fn
+        return self
+
+    def _samples(self):
+        """[(suffix, label_values, extra_label, value)]"""
+        if self._function is not None:
+            try:
+                result = self._function()
+            except Exception:
+                return []
+            if result is None:
+                return []
+            if isinstance(result, dict):
+                return [("", tuple(k) if isinstance(k, tuple) else (k,), None, v)
+                        for k, v in result.items()]
+            return [("", (), None, result)]
+
+        if self._default is not None:
+            return [("", (), None, self._default.value)]
+        return [("", key, None, child.value) for key, child in list(self._children.items())]
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.TYPE}",
+        ]
+        for suffix, values, extra, value in self._samples():
+            lines.append(
+                f"{self.name}{suffix}{_labels_text(self.labelnames, values, extra)} "
+                f"{_format_value(value)}"
+            )
+        return lines
+
+
+class Counter(Metric):
+    TYPE = "counter"
+
+    def inc(self, amount=1.0):
+        self._default.inc(amount)
+
+
+class Gauge(Metric):
+    TYPE = "gauge"
+
+    def inc(self, amount=1.0):
+        self._default.inc(amount)
+
+    def dec(self, amount=1.0):
+        self._default.dec(amount)
+
+    def set(self, value):
+        self._default.set(value)
+
+
+class Histogram(Metric):
+    TYPE = "histogram"
+
+    # Mặc định cho thời gian xử lý (giây): 1 ms → 5 s
+    DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    def __init__(self, name, documentation, labelnames=(), buckets=None):
+        self.buckets = tuple(sorted(buckets or self.DEFAULT_BUCKETS))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def _samples(self):
+        children = (
+            [((), self._default)] if self._default is not None
+            else list(self._children.items())
+        )
+
+        samples = []
+        for key, child in children:
+            with child._lock:
+                counts = list(child.counts)
+                total, count = child.sum, child.count
+
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                samples.append(("_bucket", key, f'le="{_format_value(float(bound))}"', cumulative))
+            samples.append(("_bucket", key, 'le="+Inf"', count))
+            samples.append(("_sum", key, None, total))
+            samples.append(("_count", key, None, count))
+        return samples
+
+
+# ---------------------------------------------------------------------------
+
+
+class MetricsRegistry:
+    """Tập metric của process; counter() / gauge() / histogram() idempotent theo tên."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as {metric.TYPE}")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=None):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        """Toàn bộ metric ở Prometheus text format (version 0.0.4)."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Singleton registry
+registry = MetricsRegistry()
@@ -0,0 +1,205 @@
+"""
+Sampling profiler chạy trong process (không cần restart / cài thêm gì).
+
+Mỗi interval đọc sys._current_frames() → stack Python hiện tại của
+mọi thread (capture, stage-detect/track/render/encode, generator stream,
+thread loop của paho...), cộng dồn theo (tên thread, stack).
+
+- Chi phí chỉ nằm ở thread gọi run() (thread request): ~vài chục µs
+  mỗi lần lấy mẫu, các thread khác không bị chèn hook như cProfile.
+- Đo theo wall-clock: thread đang chờ (Condition.wait, queue.get...)
+  cũng được đếm → nhìn được thread nào đang bận / rảnh.
+- Code C (cv2.imdecode, findContours...) không có frame Python → được
+  tính vào hàm Python đã gọi nó.
+
+    profile = profiler.run(seconds=10)
+    profile.collapsed()                  # "thread;f1;f2;leaf 42" → flamegraph.pl / speedscope
+    profile.hot_functions("stage-detect")
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from app.logging_config import init_logger
+
+logger = init_logger("Profiler")
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Lá của stack khi thread đang chờ (Condition / Event / LatestQueue.get...)
+_IDLE_PREFIX = "wait (threading.py"
+
+
+class ProfilerBusy(RuntimeError):
+    """Đang có 1 phiên profile khác chạy."""
+
+
+def _short_path(filename):
+    if filename.startswith(_ROOT + os.sep):
+        return os.path.relpath(filename, _ROOT)
+    marker = "site-packages" + os.sep
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    return os.path.basename(filename)
+
+
+class Profile:
+    """Kết quả 1 phiên lấy mẫu."""
+
+    def __init__(self, stacks, samples, duration, interval, overhead):
+        self.stacks = stacks            # Counter {(thread, (frame, ...)): count}
+        self.samples = samples
+        self.duration = duration
+        self.interval = interval
+        self.overhead = overhead        # giây CPU dùng để lấy mẫu
+        self.created = time.time()
+
+    def _match(self, name, thread):
+        return thread is None or name.startswith(thread)
+
+    def threads(self):
+        counts = Counter()
+        for (name, _), n in self.stacks.items():
+            counts[name] += n
+        return dict(counts.most_common())
+
+    def collapsed(self, thread=None):
+        """Collapsed stacks (Brendan Gregg format), gốc → lá, 1 dòng / stack."""
+        lines = [
+            f"{';'.join((name,) + frames)} {n}"
+            for (name, frames), n in self.stacks.items()
+            if self._match(name, thread)
+        ]
+        lines.sort()
+        return "\n".join(lines) + "\n"
+
+    def hot_functions(self, thread, limit=15):
+        """
+        Hàm tốn thời gian nhất của các thread có tên bắt đầu bằng `thread`.
+        - self:  mẫu mà hàm đang ở đỉnh stack
+        - total: mẫu mà hàm có mặt trong stack (tính 1 lần / mẫu)
+        - idle_pct: tỉ lệ mẫu thread đang chờ (threading wait)
+        """
+        own = Counter()
+        total = Counter()
+        samples = 0
+        idle = 0
+
+        for (name, frames), n in self.stacks.items():
+            if not self._match(name, thread):
+                continue
+            samples += n
+            if frames:
+                own[frames[-1]] += n
+                if frames[-1].startswith(_IDLE_PREFIX):
+                    idle += n
+            for frame in set(frames):
+                total[frame] += n
+
+        def pct(n):
+            return round(100.0 * n / samples, 1) if samples else 0.0
+
+        return {
+            "thread": thread,
+            "samples": samples,
+            "idle_pct": pct(idle),
+            "functions": [
+                {
+                    "function": frame,
+                    "self": n,
+                    "self_pct": pct(n),
+                    "total": total[frame],
+                    "total_pct": pct(total[frame]),
+                }
+                for frame, n in own.most_common(limit)
+            ],
+        }
+
+    def summary(self, focus=None, limit=15):
+        data = {
+            "duration_s": round(self.duration, 3),
+            "interval_ms": round(self.interval * 1000, 2),
+            "samples": self.samples,
+            "overhead_ms": round(self.overhead * 1000, 1),
+            "threads": self.threads(),
+        }
+        if focus:
+            data["hot"] = self.hot_functions(focus, limit)
+        return data
+
+
+class SamplingProfiler:
+    """Chỉ cho 1 phiên chạy cùng lúc; giữ lại kết quả gần nhất trong `last`."""
+
+    MAX_SECONDS = 60.0
+    MIN_INTERVAL = 0.001
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._labels = {}               # code object → "func (path:line)"
+        self.last = None
+
+    def busy(self):
+        return self._lock.locked()
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _walk(self, frame):
+        stack = []
+        while frame is not None:
+            stack.append(self._label(frame.f_code))
+            frame = frame.f_back
+        stack.reverse()
+        return tuple(stack)
+
+    def run(self, seconds=10.0, interval=0.005):
+        """Lấy mẫu mọi thread (trừ thread gọi) trong `seconds` giây."""
+        seconds = min(max(float(seconds), 0.1), self.MAX_SECONDS)
+        interval = max(float(interval), self.MIN_INTERVAL)
+
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("A profiling session is already running")
+
+        try:
+            logger.info(f"Profiling all threads for {seconds:g}s every {interval * 1000:g}ms")
+            own = threading.get_ident()
+            stacks = Counter()
+            samples = 0
+            overhead = 0.0
+
+            start = time.perf_counter()
+            end = start + seconds
+            while True:
+                t0 = time.perf_counter()
+                if t0 >= end:
+                    break
+
+                names = {t.ident: t.name for t in threading.enumerate()}
+                frames = sys._current_frames()
+                for ident, frame in frames.items():
+                    if ident == own:
+                        continue
+                    stacks[(names.get(ident, f"thread-{ident}"), self._walk(frame))] += 1
+                frames = frame = None       # không giữ frame của thread khác
+
+                samples += 1
+                spent = time.perf_counter() - t0
+                overhead += spent
+                time.sleep(max(0.0, interval - spent))
+
+            self.last = Profile(stacks, samples, time.perf_counter() - start, interval, overhead)
+            return self.last
+        finally:
+            self._lock.release()
+
+
+# Singleton instance
+profiler = SamplingProfiler()
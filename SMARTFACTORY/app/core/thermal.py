@@ -0,0 +1,249 @@
+"""
+Nhiệt độ / tần số CPU qua sysfs (Linux thermal + cpufreq) và giảm tải
+trước khi kernel throttle (Raspberry Pi throttle mềm ~80°C, cứng 85°C).
+
+    <root>/class/thermal/thermal_zone*/{type,temp}          (milli °C)
+    <root>/devices/system/cpu/cpu*/cpufreq/scaling_cur_freq (kHz)
+    <root>/devices/system/cpu/cpu*/cpufreq/cpuinfo_max_freq (kHz)
+
+root mặc định "/sys"; đổi sang cây giả để thử (benchmarks/fake_sysfs.py).
+
+Tần số chỉ xuất ra metrics: governor ondemand cũng hạ tần số khi rảnh
+nên tần số thấp không đồng nghĩa với đang throttle.
+"""
+
+import glob
+import os
+import threading
+import time
+from collections import deque
+
+from app.core.metrics import registry
+from app.logging_config import init_logger
+
+logger = init_logger("Thermal")
+
+# Raspberry Pi firmware bắt đầu hạ tần số (throttle mềm) từ ~80°C →
+# mọi bậc trong levels_c phải thấp hơn, bậc cuối có tác dụng trước throttle
+THROTTLE_C = 80.0
+
+LEVEL_CHANGES = registry.counter(
+    "smartfactory_thermal_level_changes_total", "Load shedding level changes", ["direction"]
+)
+
+
+def _read_int(path):
+    try:
+        with open(path) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def _read_text(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+class ThermalSensors:
+    """Đọc thermal zone + cpufreq dưới 1 sysfs root (không cache giá trị)."""
+
+    # Thứ tự ưu tiên chọn zone của CPU khi không cấu hình
+    CPU_ZONE_TYPES = ("cpu-thermal", "cpu_thermal", "soc_thermal", "x86_pkg_temp")
+
+    def __init__(self, root="/sys", zone=None):
+        self.root = root
+        self.zone = zone
+
+    def zones(self):
+        """{type: đường dẫn file temp} của mọi thermal zone."""
+        found = {}
+        pattern = os.path.join(self.root, "class", "thermal", "thermal_zone*")
+        for path in sorted(glob.glob(pattern)):
+            name = _read_text(os.path.join(path, "type")) or os.path.basename(path)
+            found.setdefault(name, os.path.join(path, "temp"))
+        return found
+
+    def temperatures(self):
+        """{zone: °C}"""
+        temps = {}
+        for name, path in self.zones().items():
+            value = _read_int(path)
+            if value is not None:
+                temps[name] = value / 1000.0
+        return temps
+
+    def cpu_temperature(self, temps=None):
+        """Nhiệt độ zone CPU (zone cấu hình → zone CPU quen thuộc → zone nóng nhất)."""
+        temps = self.temperatures() if temps is None else temps
+        if not temps:
+            return None
+        if self.zone:
+            return temps.get(self.zone)
+        for name in self.CPU_ZONE_TYPES:
+            if name in temps:
+                return temps[name]
+        return max(temps.values())
+
+    def frequencies(self):
+        """{cpu: (cur_hz, max_hz)}"""
+        freqs = {}
+        pattern = os.path.join(self.root, "devices", "system", "cpu", "cpu[0-9]*", "cpufreq")
+        for path in sorted(glob.glob(pattern)):
+            cpu = os.path.basename(os.path.dirname(path))
+            cur = _read_int(os.path.join(path, "scaling_cur_freq"))
+            top = _read_int(os.path.join(path, "cpuinfo_max_freq"))
+            if cur is not None:
+                freqs[cpu] = (cur * 1000, top * 1000 if top is not None else None)
+        return freqs
+
+
+class ThermalGovernor:
+    """
+    Giảm tải theo bậc khi CPU nóng, trả lại khi nguội (có hysteresis).
+
+    levels_c = [t1, t2, t3] (< THROTTLE_C): nhiệt độ ≥ t_i → bậc i, theo thứ tự:
+        1. giới hạn FPS stream (stream_fps)
+        2. tắt overlay phía server
+        3. ép scale detect tối thiểu x2 (so với scale cấu hình)
+    Bậc chỉ giảm khi nhiệt độ < t_i - hysteresis_c; mỗi lần đo chỉ
+    đổi 1 bậc để tránh dao động.
+
+    get_pipeline(): pipeline hiện tại (None nếu camera dừng). Bậc được
+    áp lại mỗi lần đo → pipeline mới start cũng nhận đúng bậc.
+    """
+
+    def __init__(self, sensors, config, get_pipeline):
+        self.sensors = sensors
+        self.config = dict(config)
+        self.get_pipeline = get_pipeline
+
+        self.levels = sorted(float(t) for t in self.config["levels_c"])
+        self.level = 0
+        self.temperature = None
+        self.history = deque(maxlen=50)
+
+        self._callbacks = []
+        self._pipeline = None
+        self._shed_scale = 2
+        self._thread = None
+        self._stop_event = threading.Event()
+
+        registry.gauge(
+            "smartfactory_cpu_temperature_celsius", "Temperature per thermal zone", ["zone"]
+        ).set_function(lambda: {(zone,): t for zone, t in self.sensors.temperatures().items()})
+        registry.gauge(
+            "smartfactory_cpu_frequency_hz", "Current CPU frequency (scaling_cur_freq)", ["cpu"]
+        ).set_function(lambda: {(cpu,): cur for cpu, (cur, _) in self.sensors.frequencies().items()})
+        registry.gauge(
+            "smartfactory_cpu_max_frequency_hz", "Maximum CPU frequency (cpuinfo_max_freq)", ["cpu"]
+        ).set_function(lambda: {(cpu,): top for cpu, (_, top) in self.sensors.frequencies().items()
+                                if top is not None})
+        registry.gauge(
+            "smartfactory_thermal_shed_level", "Current load shedding level (0 = none)"
+        ).set_function(lambda: self.level)
+
+    # ----------------------------------------------------------------------
+
+    def on_change(self, fn):
+        """Callback fn(change_dict) mỗi khi đổi bậc."""
+        self._callbacks.append(fn)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        if self.sensors.cpu_temperature() is None:
+            logger.warning(f"No thermal zone under {self.sensors.root}, thermal shedding disabled")
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="thermal", daemon=True)
+        self._thread.start()
+        logger.info(f"Thermal governor: levels {self.levels} °C, hysteresis {self.config['hysteresis_c']} °C")
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            try:
+                self.step()
+            except Exception as e:
+                logger.exception(f"Thermal governor error: {e}")
+            self._stop_event.wait(max(0.5, float(self.config["interval_s"])))
+
+    # ----------------------------------------------------------------------
+
+    def target_level(self, temperature):
+        """Bậc mong muốn từ nhiệt độ, có hysteresis so với bậc hiện tại."""
+        hysteresis = float(self.config["hysteresis_c"])
+        level = self.level
+
+        while level < len(self.levels) and temperature >= self.levels[level]:
+            level += 1
+        while level > 0 and temperature < self.levels[level - 1] - hysteresis:
+            level -= 1
+        return level
+
+    def step(self):
+        self.temperature = self.sensors.cpu_temperature()
+        if self.temperature is not None:
+            target = self.target_level(self.temperature)
+            if target != self.level:
+                # 1 bậc / lần đo
+                new = self.level + (1 if target > self.level else -1)
+                direction = "shed" if new > self.level else "restore"
+                change = {
+                    "time": time.time(),
+                    "temperature_c": self.temperature,
+                    "from": self.level,
+                    "to": new,
+                }
+                LEVEL_CHANGES.labels(direction).inc()
+                self.history.append(change)
+                logger.warning(
+                    f"[thermal] {self.temperature:.1f} °C → {direction} level {self.level} → {new}"
+                )
+                self.level = new
+                self.apply(self.get_pipeline())
+
+                for fn in self._callbacks:
+                    try:
+                        fn(change)
+                    except Exception as e:
+                        logger.exception(f"Thermal change callback error: {e}")
+                return self.level
+
+        self.apply(self.get_pipeline())
+        return self.level
+
+    def apply(self, pipeline):
+        """Áp bậc hiện tại lên pipeline (idempotent)."""
+        if pipeline is None:
+            self._pipeline = None
+            return
+
+        if pipeline is not self._pipeline:
+            # Scale khi giảm tải = x2 scale cấu hình của pipeline này
+            self._pipeline = pipeline
+            self._shed_scale = min(pipeline.det_scale * 2, 8)
+
+        pipeline.set_stream_fps(self.config["stream_fps"] if self.level >= 1 else None)
+        pipeline.set_overlays(self.level < 2)
+        pipeline.set_detection_scale_floor(self._shed_scale if self.level >= 3 else 1)
+
+    # ----------------------------------------------------------------------
+
+    def stats(self):
+        freqs = self.sensors.frequencies()
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "temperature_c": self.temperature,
+            "level": self.level,
+            "levels_c": self.levels,
+            "frequencies_mhz": {cpu: round(cur / 1e6) for cpu, (cur, _) in freqs.items()},
+            "recent_changes": list(self.history)[-10:],
+        }
@@ -0,0 +1,230 @@
+"""
+Watchdog: phát hiện thành phần bị treo và tự khôi phục (không restart Flask).
+
+Mỗi thành phần đăng ký:
+    - probe():   thời điểm (time.monotonic) thành phần tiến triển lần cuối
+                 (frame capture gần nhất, nhịp detect loop...), None = không
+                 áp dụng lúc này (camera chưa start...).
+    - recover(): thử khôi phục, trả về True nếu thao tác thành công.
+    - timeout:   quá bao nhiêu giây không tiến triển thì coi là sự cố.
+
+Vòng kiểm tra:
+    - Không tiến triển quá timeout → mở incident, gọi recover() ngay.
+    - Vẫn treo → gọi lại recover() với backoff tăng gấp đôi
+      (backoff_initial_s → backoff_max_s).
+    - Có tiến triển sau thời điểm mở incident → đóng incident, ghi
+      thời gian khôi phục (MTTR = trung bình các lần khôi phục).
+
+Metrics: smartfactory_watchdog_{incidents_total, recoveries_total,
+recovery_seconds, healthy}.
+"""
+
+import threading
+import time
+from collections import deque
+
+from app.core.metrics import registry
+from app.logging_config import init_logger
+
+logger = init_logger("Watchdog")
+
+INCIDENTS = registry.counter(
+    "smartfactory_watchdog_incidents_total", "Stalls detected by the watchdog", ["component"]
+)
+RECOVERIES = registry.counter(
+    "smartfactory_watchdog_recoveries_total",
+    "Recovery attempts by result (ok / failed / error)", ["component", "result"]
+)
+RECOVERY_SECONDS = registry.histogram(
+    "smartfactory_watchdog_recovery_seconds",
+    "Time from stall detection to recovery (mean = MTTR)", ["component"],
+    buckets=(1, 2, 5, 10, 30, 60, 120, 300, 600),
+)
+
+
+class _Component:
+    def __init__(self, name, probe, recover, timeout):
+        self.name = name
+        self.probe = probe
+        self.recover = recover
+        self.timeout = float(timeout)
+
+        self.active = False             # probe đang trả về giá trị
+        self.watch_since = 0.0          # lúc bắt đầu theo dõi / lần recover gần nhất
+        self.incident_at = None         # incident đang mở
+        self.next_attempt = 0.0
+        self.backoff = 0.0
+        self.attempts = 0               # số lần recover trong incident hiện tại
+
+        self.incidents = 0
+        self.recoveries = []            # thời gian khôi phục (giây), tối đa 100
+        self.last_progress = None
+
+
+class Watchdog:
+    DEFAULTS = {
+        "enabled": True,
+        "interval_s": 1.0,
+        "backoff_initial_s": 2.0,
+        "backoff_max_s": 60.0,
+    }
+
+    def __init__(self):
+        self.config = dict(self.DEFAULTS)
+        self._components = {}
+        self._lock = threading.Lock()
+        self.incidents = deque(maxlen=50)       # lịch sử incident gần đây
+
+        self._thread = None
+        self._stop_event = threading.Event()
+
+        registry.gauge(
+            "smartfactory_watchdog_healthy", "1 when the component is making progress", ["component"]
+        ).set_function(
+            lambda: {(c.name,): 0 if c.incident_at is not None else 1
+                     for c in self._components.values() if c.active}
+        )
+
+    # ----------------------------------------------------------------------
+
+    def configure(self, config):
+        self.config.update({k: v for k, v in (config or {}).items() if k in self.DEFAULTS})
+
+    def register(self, name, probe, recover, timeout):
+        with self._lock:
+            self._components[name] = _Component(name, probe, recover, timeout)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="watchdog", daemon=True)
+        self._thread.start()
+        logger.info(
+            "Watchdog started: " + ", ".join(
+                f"{c.name} ({c.timeout:g}s)" for c in self._components.values()
+            )
+        )
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _loop(self):
+        while not self._stop_event.wait(max(0.1, float(self.config["interval_s"]))):
+            self.check()
+
+    # ----------------------------------------------------------------------
+
+    def check(self, now=None):
+        """1 vòng kiểm tra mọi thành phần (gọi từ thread watchdog hoặc test)."""
+        with self._lock:
+            components = list(self._components.values())
+
+        for comp in components:
+            try:
+                self._check(comp, time.monotonic() if now is None else now)
+            except Exception as e:
+                logger.exception(f"Watchdog check '{comp.name}' failed: {e}")
+
+    def _check(self, comp, now):
+        last = comp.probe()
+
+        if last is None:
+            # Không áp dụng (vd. camera đã dừng) → bỏ incident đang mở
+            if comp.incident_at is not None:
+                logger.info(f"[{comp.name}] no longer active, incident dropped")
+                self._record(comp, now, recovered=False)
+            comp.active = False
+            return
+
+        if not comp.active:
+            comp.active = True
+            comp.watch_since = now
+        comp.last_progress = last
+
+        if comp.incident_at is not None and last > comp.incident_at:
+            self._record(comp, now, recovered=True)
+            return
+
+        stalled_for = now - max(last, comp.watch_since)
+        if stalled_for <= comp.timeout:
+            return
+
+        if comp.incident_at is None:
+            comp.incident_at = now
+            comp.incidents += 1
+            comp.attempts = 0
+            comp.backoff = float(self.config["backoff_initial_s"])
+            comp.next_attempt = now
+            INCIDENTS.labels(comp.name).inc()
+            logger.error(f"[{comp.name}] stalled for {stalled_for:.1f}s → recovering")
+
+        if now >= comp.next_attempt:
+            self._attempt(comp, now)
+
+    def _attempt(self, comp, now):
+        comp.attempts += 1
+        t0 = time.monotonic()
+        try:
+            result = "ok" if comp.recover() else "failed"
+        except Exception as e:
+            result = "error"
+            logger.exception(f"[{comp.name}] recovery error: {e}")
+
+        RECOVERIES.labels(comp.name, result).inc()
+        logger.warning(
+            f"[{comp.name}] recovery attempt #{comp.attempts}: {result}, "
+            f"next attempt in {comp.backoff:g}s if still stalled"
+        )
+
+        # Đếm thời gian treo lại từ lúc recover() xong (restart camera có thể mất ~1 s)
+        comp.watch_since = now + (time.monotonic() - t0)
+        comp.next_attempt = now + comp.backoff
+        comp.backoff = min(comp.backoff * 2, float(self.config["backoff_max_s"]))
+
+    def _record(self, comp, now, recovered):
+        duration = now - comp.incident_at
+        self.incidents.append({
+            "component": comp.name,
+            "started": time.time() - duration,
+            "duration_s": round(duration, 2),
+            "attempts": comp.attempts,
+            "recovered": recovered,
+        })
+
+        if recovered:
+            comp.recoveries = (comp.recoveries + [duration])[-100:]
+            RECOVERY_SECONDS.labels(comp.name).observe(duration)
+            logger.info(f"[{comp.name}] recovered after {duration:.1f}s ({comp.attempts} attempts)")
+
+        comp.incident_at = None
+        comp.attempts = 0
+
+    # ----------------------------------------------------------------------
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            components = list(self._components.values())
+
+        data = {}
+        for comp in components:
+            data[comp.name] = {
+                "active": comp.active,
+                "healthy": comp.incident_at is None,
+                "timeout_s": comp.timeout,
+                "since_progress_s": round(now - comp.last_progress, 2)
+                if comp.active and comp.last_progress else None,
+                "incidents": comp.incidents,
+                "stalled_for_s": round(now - comp.incident_at, 1) if comp.incident_at is not None else None,
+                "mttr_s": round(sum(comp.recoveries) / len(comp.recoveries), 2) if comp.recoveries else None,
+            }
+        return {
+            "enabled": bool(self.config["enabled"]),
+            "components": data,
+            "recent_incidents": list(self.incidents),
+        }
+
+
+# Singleton instance
+watchdog = Watchdog()
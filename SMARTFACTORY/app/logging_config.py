@@ -1,6 +1,268 @@
+"""
+Logging của project: init_logger(name) ở đầu mỗi module.
+
+Mặc định (LOG_ASYNC=1) logger chỉ đẩy record vào 1 queue chung; 1 thread
+nền (QueueListener) format và ghi ra console / file → thread detect,
+thread network của paho... không bao giờ chờ I/O console. Queue đầy →
+record bị bỏ (đếm trong log_stats()), không block.
+
+Biến môi trường (đọc lại khi gọi configure_logging(), create_app gọi sau
+load_dotenv):
+    LOG_ASYNC         1 | 0 (0 = ghi đồng bộ như trước, tiện debug)
+    LOG_LEVEL         DEBUG | INFO | WARNING ... (trống = level truyền vào init_logger)
+    LOG_FORMAT        text | json (1 dòng JSON / record)
+    LOG_FILE          file log xoay vòng (trống = chỉ console)
+    LOG_MAX_BYTES     kích thước mỗi file (mặc định 10 MB)
+    LOG_BACKUP_COUNT  số file cũ giữ lại (mặc định 5)
+    LOG_RATE_LIMIT    số record / giây tối đa cho mỗi dòng code gọi log
+                      (0 = không giới hạn, mặc định 20)
+    LOG_RATE_LIMITS   giới hạn riêng theo logger: "SmartFactory=5,CameraPipeline=50"
+
+Record bị giới hạn không mất hẳn: record kế tiếp được ghi từ cùng dòng
+code mang thêm "(+N suppressed)".
+"""
+
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
 import os
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s [in %(pathname)s:%(lineno)d]'
+
+QUEUE_SIZE = 10000
+
+_queue = queue.Queue(maxsize=QUEUE_SIZE)
+_listener = None
+_settings = None
+_sinks_current = []     # handler ghi thật (console / file)
+_front = []             # handler gắn vào từng logger (QueueHandler hoặc chính sink)
+_rate_filter = None
+_loggers = {}           # name → (level, log_file, max_bytes, backup_count)
+_lock = threading.RLock()
+
+_stats = {"dropped": 0, "suppressed": 0}
+
+
+# ---------------------------------------------------------------------------
+# Formatter / filter / handler
+# ---------------------------------------------------------------------------
+
+class JsonFormatter(logging.Formatter):
+    """1 dòng JSON / record: time, level, logger, message, thread, source (+ exc, extra)."""
+
+    # Thuộc tính có sẵn của LogRecord (phần còn lại là extra={...} của người gọi)
+    _RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+    def format(self, record):
+        data = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+            "source": f"{record.pathname}:{record.lineno}",
+        }
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exc"] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in self._RESERVED and not key.startswith("_"):
+                data[key] = value
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket theo dòng code gọi log (logger, file, dòng): tối đa
+    `rate` record / giây, burst = 1 giây. Chạy trong thread gọi log →
+    chỉ 1 lock + vài phép tính.
+    """
+
+    def __init__(self, rate, overrides=None):
+        super().__init__()
+        self.rate = float(rate)
+        self.overrides = dict(overrides or {})
+        self._buckets = {}          # key → [tokens, last, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        rate = self.overrides.get(record.name, self.rate)
+        if rate <= 0:
+            return True
+
+        key = (record.name, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [rate, now, 0]
+            bucket[0] = min(rate, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+
+            if bucket[0] < 1.0:
+                bucket[2] += 1
+                _stats["suppressed"] += 1
+                return False
+
+            bucket[0] -= 1.0
+            suppressed, bucket[2] = bucket[2], 0
+
+        if suppressed:
+            record.msg = f"{record.getMessage()} (+{suppressed} suppressed)"
+            record.args = None
+        return True
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """Chỉ enqueue: không format trên thread gọi log, queue đầy thì bỏ record."""
+
+    def prepare(self, record):
+        # Ghép msg % args ngay (args có thể đổi sau khi hàm trả về);
+        # exc_info giữ nguyên cho listener format.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _stats["dropped"] += 1
+
+
+# ---------------------------------------------------------------------------
+# Cấu hình
+# ---------------------------------------------------------------------------
+
+def _env_settings():
+    overrides = {}
+    for item in os.getenv("LOG_RATE_LIMITS", "").split(","):
+        name, _, value = item.partition("=")
+        try:
+            overrides[name.strip()] = float(value)
+        except ValueError:
+            continue
+
+    level = logging.getLevelName(os.getenv("LOG_LEVEL", "").strip().upper())
+    return {
+        "async": os.getenv("LOG_ASYNC", "1").strip().lower() not in ("0", "false", "no"),
+        "level": level if isinstance(level, int) else None,
+        "format": "json" if os.getenv("LOG_FORMAT", "text").strip().lower() == "json" else "text",
+        "file": os.getenv("LOG_FILE", "").strip() or None,
+        "max_bytes": int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024)),
+        "backup_count": int(os.getenv("LOG_BACKUP_COUNT", 5)),
+        "rate": float(os.getenv("LOG_RATE_LIMIT", 20)),
+        "rate_overrides": overrides,
+    }
+
+
+def _file_handler(path, max_bytes, backup_count):
+    log_dir = os.path.dirname(path)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+    return RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+
+
+def _sinks(settings):
+    """Handler ghi thật (console, LOG_FILE, file riêng từng logger)."""
+    formatter = JsonFormatter() if settings["format"] == "json" else logging.Formatter(TEXT_FORMAT)
+
+    handlers = [logging.StreamHandler()]
+    if settings["file"]:
+        handlers.append(_file_handler(settings["file"], settings["max_bytes"], settings["backup_count"]))
+
+    for name, (_, log_file, max_bytes, backup_count) in _loggers.items():
+        if log_file:
+            # File riêng của 1 logger (init_logger(..., log_file=...))
+            fh = _file_handler(log_file, max_bytes, backup_count)
+            fh.addFilter(logging.Filter(name))
+            handlers.append(fh)
+
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+def _attach(name, level):
+    """Gắn handler + filter hiện tại vào logger (thay cái cũ của module này)."""
+    logger = logging.getLogger(name)
+    logger.setLevel(_settings["level"] or level)
+    logger.propagate = False
+
+    for handler in [h for h in logger.handlers if getattr(h, "_smartfactory", False)]:
+        logger.removeHandler(handler)
+    for flt in [f for f in logger.filters if isinstance(f, RateLimitFilter)]:
+        logger.removeFilter(flt)
+
+    # Filter đặt ở logger (không ở handler) → mỗi record chỉ tính 1 lần
+    logger.addFilter(_rate_filter)
+    for handler in _front:
+        handler._smartfactory = True
+        logger.addHandler(handler)
+    return logger
+
+
+def configure_logging(settings=None):
+    """
+    (Cấu hình lại) sink dùng chung theo biến môi trường; áp lên mọi
+    logger đã tạo bằng init_logger. Gọi lại được bất cứ lúc nào.
+    """
+    global _listener, _settings, _sinks_current, _front, _rate_filter
+
+    with _lock:
+        _settings = dict(_env_settings(), **(settings or {}))
+
+        if _listener is not None:
+            _listener.stop()            # ghi nốt record đang chờ
+            _listener = None
+        for handler in _sinks_current:
+            handler.close()
+
+        _rate_filter = RateLimitFilter(_settings["rate"], _settings["rate_overrides"])
+        _sinks_current = _sinks(_settings)
+
+        if _settings["async"]:
+            _listener = QueueListener(_queue, *_sinks_current, respect_handler_level=True)
+            _listener.start()
+            _front = [_NonBlockingQueueHandler(_queue)]
+        else:
+            _front = list(_sinks_current)
+
+        for name, (level, *_rest) in _loggers.items():
+            _attach(name, level)
+
+    return _settings
+
+
+def shutdown_logging():
+    """Dừng thread ghi log, ghi nốt record còn trong queue."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+def log_stats():
+    """Độ sâu queue + số record bị bỏ (queue đầy) / bị giới hạn tần suất."""
+    return {
+        "async": bool(_settings and _settings["async"]),
+        "queue_depth": _queue.qsize(),
+        "queue_size": QUEUE_SIZE,
+        "dropped": _stats["dropped"],
+        "suppressed": _stats["suppressed"],
+    }
+
+
+# ---------------------------------------------------------------------------
 
 def init_logger(
     name="SmartFactory",
@@ -12,34 +274,18 @@ def init_logger(
     """
     Initialize a logger with console and optional file output.
     Rotates log file when exceeding max_bytes.
+
+    Handler dùng chung cho mọi logger (xem đầu file): ghi qua queue +
+    thread nền khi LOG_ASYNC=1.
     """
-    logger = logging.getLogger(name)
-    if logger.hasHandlers():
-        # Avoid duplicate handlers
-        return logger
-
-    logger.setLevel(level)
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s [in %(pathname)s:%(lineno)d]'
-    )
-
-    # Console handler
-    ch = logging.StreamHandler()
-    ch.setFormatter(formatter)
-    ch.setLevel(level)
-    logger.addHandler(ch)
-
-    # File handler
-    if log_file:
-        log_dir = os.path.dirname(log_file)
-        if log_dir and not os.path.exists(log_dir):
-            os.makedirs(log_dir, exist_ok=True)
-
-        fh = RotatingFileHandler(
-            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
-        )
-        fh.setFormatter(formatter)
-        fh.setLevel(level)
-        logger.addHandler(fh)
+    with _lock:
+        if name in _loggers:
+            # Avoid duplicate handlers
+            return logging.getLogger(name)
 
-    return logger
+        _loggers[name] = (level, log_file, max_bytes, backup_count)
+        if _settings is None or log_file:
+            # Lần đầu / cần thêm file riêng → dựng lại sink
+            configure_logging()
+            return logging.getLogger(name)
+        return _attach(name, level)
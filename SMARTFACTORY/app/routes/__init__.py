@@ -1,4 +1,4 @@
-from ..api import api_camera, api_mqtt, api_colors, api_wifi
+from ..api import api_camera, api_mqtt, api_colors, api_wifi, api_events, api_metrics, api_profiler, api_memory
 from .web_routes import web  
 
 def register_routes(app):
@@ -7,3 +7,7 @@ def register_routes(app):
     app.register_blueprint(api_mqtt)
     app.register_blueprint(api_colors)
     app.register_blueprint(api_wifi)  
+    app.register_blueprint(api_events)
+    app.register_blueprint(api_metrics)
+    app.register_blueprint(api_profiler)
+    app.register_blueprint(api_memory)
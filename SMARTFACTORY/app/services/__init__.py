@@ -1,7 +1,15 @@
 from .camera_service import camera_service
 from .mqtt_service import mqtt_service
+from .event_service import event_service
+from .memory_service import memory_service
+from .watchdog_service import watchdog_service
+from .thermal_service import thermal_service
 
 __all__ = [
     "camera_service",
     "mqtt_service",
+    "event_service",
+    "memory_service",
+    "watchdog_service",
+    "thermal_service",
 ]
\ No newline at end of file
@@ -5,9 +5,15 @@ import cv2
 from typing import Any, Dict, List, Optional
 
 from app.core.camera.color_object import ColorObject
+from app.core.camera.snapshot import FrameSnapshot
 from app.services.colors_service import colors_service
+from app.services.event_service import event_service
 from app.core.camera.pipeline import CameraPipeline
+from app.core.camera.quality import QualityController
+from app.core.camera.scheduling import scheduler
+from app.core.watchdog import watchdog
 from app.core.config import config_service
+from app.core.metrics import registry
 
 
 class CameraService:
@@ -20,23 +26,95 @@ class CameraService:
         + stream() → MJPEG generator
         + get_frame_bytes() → lấy 1 frame ảnh JPEG
         + get_detections() → list detection chuẩn hoá cho FE
+        + get_tracks() → metadata track cho client-side overlay
         + get_status() → thông tin đơn giản
+    - Đẩy "detections" / "tracks" / "camera_status" qua event_service (SSE)
+      mỗi khi thay đổi.
     - Ẩn toàn bộ chi tiết core (CameraReader, ColorDetector, Tracker...).
       Sau này đổi thuật toán detect chỉ cần sửa service + core,
       không phải sửa các API.
     """
 
+    # "detections" không đổi vẫn gửi lại sau mỗi khoảng này: detection.js
+    # gửi lệnh MQTT theo từng event (như poll 1s trước đây), vật đứng yên
+    # trên băng vẫn phải được lặp lệnh sau duration_ms
+    DETECTIONS_RESEND_S = 1.0
+
     def __init__(self):
         self.pipeline: Optional[CameraPipeline] = None
+        self.quality: Optional[QualityController] = None
+        self.thermal = None             # ThermalGovernor, gắn bởi thermal_service
         self.running: bool = False
         self._lock = threading.Lock()
         self.logger = None
 
+        # Khoá + thời điểm push "detections" gần nhất → push khi đổi
+        # hoặc đã quá DETECTIONS_RESEND_S
+        self._last_pushed_key = None
+        self._last_pushed_at = 0.0
+
     def init_app(self, app):
         self.logger = app.logger
+        self._register_metrics()
         self.logger.info("CameraService ready")
 
+    def _register_metrics(self):
+        """Gauge đọc trực tiếp từ pipeline lúc scrape /api/metrics."""
+
+        def from_pipeline(fn):
+            def read():
+                pipeline = self.pipeline
+                return fn(pipeline) if pipeline is not None else 0
+            return read
+
+        def per_stage(fn):
+            def read():
+                pipeline = self.pipeline
+                if pipeline is None:
+                    return None
+                return {(stage.name,): fn(stage) for stage in pipeline.stages}
+            return read
+
+        registry.gauge(
+            "smartfactory_camera_running", "1 when the camera pipeline is running"
+        ).set_function(lambda: 1 if self.running else 0)
+        registry.gauge(
+            "smartfactory_capture_fps", "Frames captured per second"
+        ).set_function(from_pipeline(lambda p: p.capture_fps))
+        registry.gauge(
+            "smartfactory_detection_fps", "Frames detected per second"
+        ).set_function(from_pipeline(lambda p: p._fps))
+        registry.gauge(
+            "smartfactory_stream_clients", "Connected MJPEG stream clients"
+        ).set_function(from_pipeline(lambda p: p.viewers))
+        registry.gauge(
+            "smartfactory_sse_clients", "Connected Server-Sent Events clients"
+        ).set_function(event_service.client_count)
+        registry.gauge(
+            "smartfactory_stage_queue_depth", "Items waiting in front of each stage", ["stage"]
+        ).set_function(per_stage(lambda s: len(s.queue)))
+        registry.counter(
+            "smartfactory_stage_queue_drops_total",
+            "Items replaced in a stage queue before being processed", ["stage"]
+        ).set_function(per_stage(lambda s: s.queue.drops))
+        registry.counter(
+            "smartfactory_render_skipped_total", "Frames skipped by the render stage"
+        ).set_function(from_pipeline(lambda p: p.frames_render_skipped))
+        registry.gauge(
+            "smartfactory_detection_max_fps", "Current detection FPS limit"
+        ).set_function(from_pipeline(lambda p: p.max_det_fps))
+        registry.gauge(
+            "smartfactory_detection_scale", "Current detection downscale factor"
+        ).set_function(from_pipeline(lambda p: p.effective_det_scale))
+        registry.gauge(
+            "smartfactory_stream_jpeg_quality", "Current JPEG quality of the stream"
+        ).set_function(from_pipeline(lambda p: p.jpeg_quality))
+
     def start(self, src_override=None) -> bool:
+        # Thread của pipeline không được thừa hưởng nice / core của thread web
+        return scheduler.call(self._start, src_override)
+
+    def _start(self, src_override=None) -> bool:
         with self._lock:
             if self.running:
                 return True
@@ -60,8 +138,17 @@ class CameraService:
                     return False
 
                 self.update_colors()
+                self._last_pushed_key = None
+                self._last_pushed_at = 0.0
+                self.pipeline.add_listener(self._on_frame)
                 self.pipeline.start()
+
+                if cfg.adaptive["enabled"]:
+                    self.quality = QualityController(self.pipeline, cfg.adaptive)
+                    self.quality.start()
+
                 self.running = True
+                self._push_status()
                 return True
 
             except Exception as e:
@@ -79,10 +166,17 @@ class CameraService:
                 return True
 
             try:
+                if self.quality:
+                    self.quality.stop()
+                    self.quality = None
+
                 self.pipeline.stop()
                 self.pipeline = None
                 self.running = False
 
+                self._push_status()
+                event_service.publish("detections", {"seq": None, "detections": []})
+
                 if self.logger:
                     self.logger.info("CameraService stopped successfully")
 
@@ -93,6 +187,79 @@ class CameraService:
                     self.logger.exception(f"Error during camera stop: {e}")
                 return False
 
+    def _push_status(self):
+        event_service.publish("camera_status", self.get_status())
+
+    def _on_frame(self, pipeline):
+        """
+        Listener của pipeline (chạy trên detection thread).
+        Chỉ push khi có client SSE và nội dung detection thay đổi
+        (hoặc đã DETECTIONS_RESEND_S chưa push).
+        """
+        if not event_service.has_clients():
+            return
+
+        snapshot = pipeline.get_snapshot()
+        key = tuple(
+            (d["name"], d["x"], d["y"], d["w"], d["h"]) for d in snapshot.detections
+        )
+
+        # Snapshot JSON đã chứa "detections" → gửi nguyên bytes, không dump lại
+        now = time.monotonic()
+        if key != self._last_pushed_key or now - self._last_pushed_at >= self.DETECTIONS_RESEND_S:
+            self._last_pushed_key = key
+            self._last_pushed_at = now
+            event_service.publish_raw("detections", snapshot.to_json().decode("utf-8"))
+
+        if pipeline.overlay_mode == "client":
+            event_service.publish_raw("tracks", snapshot.to_json().decode("utf-8"))
+
+    # ------------------------------------------------------
+    # Watchdog probes / recovery
+    # ------------------------------------------------------
+
+    def capture_progress(self) -> Optional[float]:
+        """
+        time.monotonic() của frame capture gần nhất (tính từ lúc pipeline
+        start nếu chưa có frame). None khi camera không chạy hoặc file
+        nguồn đã phát hết (không loop) → watchdog bỏ qua.
+        """
+        pipeline = self.pipeline
+        if not self.running or pipeline is None:
+            return None
+        source = pipeline.camera.source
+        if source is not None and source.finished:
+            return None
+        return max(pipeline.camera.ring.last_commit, pipeline.started_at)
+
+    def detection_progress(self) -> Optional[float]:
+        """time.monotonic() của vòng detect loop gần nhất."""
+        pipeline = self.pipeline
+        if not self.running or pipeline is None:
+            return None
+        return max(pipeline.detect_heartbeat, pipeline.started_at)
+
+    def recover_capture(self) -> bool:
+        """Mở lại nguồn camera, giữ nguyên pipeline / viewer / SSE."""
+        with self._lock:
+            if not self.running or not self.pipeline:
+                return False
+            return self.pipeline.restart_camera()
+
+    def recover_detection(self) -> bool:
+        with self._lock:
+            if not self.running or not self.pipeline:
+                return False
+            return self.pipeline.restart_detection()
+
+    def seek(self, frame=None, seconds=None) -> bool:
+        """Tua nguồn file video / thư mục ảnh (camera thật → False)."""
+        pipeline = self.pipeline
+        if not pipeline:
+            return False
+        # File đã phát hết → seek start lại thread capture (như start())
+        return scheduler.call(pipeline.camera.seek, frame, seconds)
+
     def get_frame_bytes(self) -> Optional[bytes]:
         """
         Lấy frame hiện tại dưới dạng JPEG bytes.
@@ -108,15 +275,26 @@ class CameraService:
         """
         Yield MJPEG frames cho /api/camera/stream.
 
-        NOTE mở rộng:
-        - Nếu muốn giới hạn FPS stream (ví dụ 15fps) có thể
-          thêm time.sleep(1/15) trong vòng lặp.
+        - Client được đăng ký là viewer của pipeline → pipeline chỉ
+          render/encode khi có ít nhất 1 người xem.
+        - Chờ frame mới thay vì lặp liên tục → mỗi frame gửi đúng 1 lần,
+          JPEG được encode 1 lần dùng chung cho mọi client.
+        - Passthrough (MJPEG + overlay client): gửi thẳng JPEG của camera.
+
+        Giới hạn FPS stream: pipeline.set_stream_fps() (ThermalGovernor
+        dùng theo "thermal.stream_fps"), không sleep trong generator.
         """
+        pipeline = self.pipeline
+        if not pipeline:
+            return
+
+        pipeline.add_viewer()
+        last_seq = pipeline.frame_seq
+
         try:
-            while self.running:
-                frame_bytes = self.get_frame_bytes()
+            while self.running and self.pipeline is pipeline:
+                last_seq, frame_bytes = pipeline.wait_frame(last_seq, timeout=1.0)
                 if not frame_bytes:
-                    time.sleep(0.01)
                     continue
 
                 yield (
@@ -134,6 +312,22 @@ class CameraService:
             if self.logger:
                 self.logger.exception(f"Error in stream generator: {e}")
 
+        finally:
+            pipeline.remove_viewer()
+
+    def get_snapshot(self) -> Optional[FrameSnapshot]:
+        """
+        FrameSnapshot của frame detect gần nhất.
+        Dùng snapshot.to_json() / to_binary() → bytes đã cache,
+        mọi request trong cùng 1 frame dùng chung.
+
+        Return None nếu pipeline chưa sẵn sàng.
+        """
+        pipeline = self.pipeline
+        if not pipeline:
+            return None
+        return pipeline.get_snapshot()
+
     def get_detections(self) -> Optional[List[Dict[str, Any]]]:
         """
         Trả list các detection đã chuẩn hoá cho FE.
@@ -142,59 +336,30 @@ class CameraService:
             - None  → pipeline chưa sẵn sàng
             - []    → không thấy đối tượng nào
         """
-        if not self.pipeline:
+        snapshot = self.get_snapshot()
+        if snapshot is None:
+            return None
+        return list(snapshot.detections)
+
+    def get_tracks(self, after: Optional[int] = None, timeout: float = 2.0) -> Optional[FrameSnapshot]:
+        """
+        Metadata track của frame detect gần nhất (client-side overlay).
+
+        - after=None → trả ngay.
+        - after=seq  → long-poll tới khi có frame mới hơn seq
+                       (tối đa timeout giây).
+
+        Return None nếu pipeline chưa sẵn sàng.
+        """
+        pipeline = self.pipeline
+        if not pipeline:
             return None
 
-        raw_objs = self.pipeline.get_detections()
-        detections: List[Dict[str, Any]] = []
-
-        for o in raw_objs:
-
-            # ===============================================================
-            # 1) Trường hợp pipeline trả dict (từ ColorObject.to_dict())
-            # ===============================================================
-            if isinstance(o, dict):
-                detections.append({
-                    "x": o.get("x", 0),
-                    "y": o.get("y", 0),
-                    "w": o.get("w", 0),
-                    "h": o.get("h", 0),
-                    "name": o.get("color_name") or o.get("name", "unknown"),
-                    "bgr": list(o.get("bgr", (255, 255, 255))),
-                    "action_id": o.get("action_id", 0),
-                    "duration_ms": o.get("duration_ms", 1000),
-                })
-            
-            # ===============================================================
-            # 2) Trường hợp pipeline trả instance ColorObject
-            # ===============================================================
-            elif hasattr(o, "name"):
-                detections.append({
-                    "x": getattr(o, "x", 0),
-                    "y": getattr(o, "y", 0),
-                    "w": getattr(o, "w", 0),
-                    "h": getattr(o, "h", 0),
-                    "name": getattr(o, "name", "unknown"),
-                    "bgr": list(getattr(o, "bgr", (255, 255, 255))),
-                    "action_id": getattr(o, "action_id", 0),
-                    "duration_ms": getattr(o, "duration_ms", 1000),
-                })
-
-            # ===============================================================
-            # 3) Fallback
-            # ===============================================================
-            else:
-                detections.append({
-                    "x": 0, "y": 0, "w": 0, "h": 0,
-                    "name": "unknown",
-                    "bgr": [200, 200, 200],
-                    "action_id": 0,
-                    "duration_ms": 1000,
-                })
-
-        return detections
-
-    
+        if after is None:
+            return pipeline.get_tracks()
+
+        return pipeline.wait_tracks(after, timeout=timeout)
+
     def update_colors(self) -> bool:
         """
         Hot-reload cấu hình màu cho ColorDetector
@@ -231,15 +396,55 @@ class CameraService:
 
     def get_status(self) -> dict:
         """Return status đơn giản cho /api/camera/status."""
-        pipeline_ready = self.pipeline is not None
-        detected = len(self.pipeline.detections) if pipeline_ready else 0
-        tracked = len(self.pipeline.tracked) if pipeline_ready else 0
+        # Đọc 1 lần: stop() có thể gán None giữa chừng (như stream())
+        pipeline = self.pipeline
+        quality = self.quality
+        thermal = self.thermal
+
+        pipeline_ready = pipeline is not None
+        detected = len(pipeline.detections) if pipeline_ready else 0
+        tracked = len(pipeline.tracked) if pipeline_ready else 0
+
+        viewers = pipeline.viewers if pipeline_ready else 0
+        overlay_mode = (
+            pipeline.overlay_mode if pipeline_ready
+            else config_service.get_camera_config().overlay_mode
+        )
+
+        frame_age = pipeline.frame_age() if pipeline_ready else None
+        camera = pipeline.camera if pipeline_ready else None     # đổi khi restart camera
+
+        frames = {
+            "age_s": round(frame_age, 3) if frame_age is not None else None,
+            "captured": camera.frames_captured,
+            "processed": pipeline.frames_processed,
+            "dropped": pipeline.frames_dropped,
+            "wait_timeouts": pipeline.wait_timeouts,
+            "torn": pipeline.frames_torn,
+            "detect_copy": pipeline.detect_copy,
+            "detection_scale": pipeline.effective_det_scale,
+            "camera_restarts": pipeline.camera_restarts,
+            "detect_restarts": pipeline.detect_restarts,
+            "decode": camera.decode_stats(),
+        } if pipeline_ready else {}
+
+        source = camera.source if pipeline_ready else None
 
         return {
             "running": self.running,
             "pipeline_ready": pipeline_ready,
             "detected": detected,
             "tracked": tracked,
+            "viewers": viewers,
+            "overlay_mode": overlay_mode,
+            "passthrough": pipeline.passthrough if pipeline_ready else False,
+            "frames": frames,
+            "playback": source.stats() if source is not None else None,
+            "stages": pipeline.stage_stats() if pipeline_ready else {},
+            "scheduling": scheduler.stats(),
+            "watchdog": watchdog.stats(),
+            "adaptive": quality.stats() if quality else {"enabled": False},
+            "thermal": thermal.stats() if thermal else {"running": False},
         }
 
 
@@ -0,0 +1,183 @@
+# app/services/event_service.py
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class EventClient:
+    """
+    Hàng đợi sự kiện của 1 client SSE.
+
+    - Coalescing: mỗi key (mặc định = tên event) chỉ giữ payload mới
+      nhất chưa gửi. Event mang toàn bộ trạng thái hiện tại (không phải
+      diff) nên bỏ bớt bản cũ không làm client lệch trạng thái.
+    - Rate limit: tối thiểu min_interval giây giữa 2 lần flush.
+    """
+
+    def __init__(self, min_interval: float = 0.05):
+        self.min_interval = min_interval
+        self.pending: Dict[str, Tuple[str, str]] = {}
+        self.cond = threading.Condition()
+        self.closed = False
+        self.last_flush = 0.0
+
+    def push(self, key: str, event: str, payload: str):
+        with self.cond:
+            self.pending[key] = (event, payload)
+            self.cond.notify()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+
+    def wait(self, timeout: float) -> Optional[List[Tuple[str, str]]]:
+        """
+        Chờ event mới (tối đa timeout giây), tôn trọng rate limit.
+
+        Return:
+            - list [(event, payload)] → cần gửi
+            - [] → hết timeout (gửi heartbeat)
+            - None → client đã đóng
+        """
+        with self.cond:
+            self.cond.wait_for(lambda: self.pending or self.closed, timeout=timeout)
+            if self.closed:
+                return None
+            if not self.pending:
+                return []
+
+        # Gom thêm event trong khoảng rate limit thay vì gửi ngay
+        delay = self.min_interval - (time.time() - self.last_flush)
+        if delay > 0:
+            time.sleep(delay)
+
+        with self.cond:
+            batch, self.pending = self.pending, {}
+
+        self.last_flush = time.time()
+        return list(batch.values())
+
+
+class EventService:
+    """
+    Server-Sent Events broker (singleton) cho /api/events.
+
+    Nguồn event:
+        - camera_service → "detections", "tracks", "camera_status"
+        - mqtt_service   → "mqtt_status", "conveyor"
+        - memory_service → "memory_alert"
+
+    Payload được json.dumps 1 lần trong publish() và dùng chung
+    cho mọi client. Client mới nhận ngay trạng thái mới nhất của
+    từng loại event.
+    """
+
+    HEARTBEAT_INTERVAL = 15.0
+    MIN_INTERVAL = 0.02     # tối đa 50 lần flush / giây / client
+    DEFAULT_INTERVAL = 0.05
+
+    def __init__(self):
+        self._clients = set()
+        self._latest: Dict[str, Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+        self.logger = None
+
+    def init_app(self, app):
+        self.logger = app.logger
+        self.logger.info("EventService ready")
+
+    # ------------------------------------------------------
+
+    def has_clients(self) -> bool:
+        return bool(self._clients)
+
+    def client_count(self) -> int:
+        return len(self._clients)
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Byte payload đang giữ: trạng thái mới nhất + hàng chờ của từng client."""
+        with self._lock:
+            latest = sum(len(payload) for _, payload in self._latest.values())
+            clients = list(self._clients)
+
+        pending = 0
+        for client in clients:
+            with client.cond:
+                pending += sum(len(payload) for _, payload in client.pending.values())
+
+        return {"latest": latest, "pending": pending}
+
+    def publish(self, event: str, data: Any, key: Optional[str] = None):
+        """
+        Gửi event tới mọi client (coalescing theo từng client).
+
+        key: khoá coalescing, mặc định = event. Dùng key riêng khi
+        nhiều nguồn cùng loại event không được đè nhau
+        (ví dụ "conveyor:<user>").
+        """
+        self.publish_raw(event, json.dumps(data, separators=(",", ":")), key)
+
+    def publish_raw(self, event: str, payload: str, key: Optional[str] = None):
+        """Như publish() nhưng payload đã là chuỗi JSON (không dump lại)."""
+        key = key or event
+
+        with self._lock:
+            self._latest[key] = (event, payload)
+            clients = list(self._clients)
+
+        for client in clients:
+            client.push(key, event, payload)
+
+    def subscribe(self, min_interval: Optional[float] = None) -> EventClient:
+        if min_interval is None:
+            min_interval = self.DEFAULT_INTERVAL
+
+        client = EventClient(max(min_interval, self.MIN_INTERVAL))
+
+        with self._lock:
+            client.pending.update(self._latest)
+            self._clients.add(client)
+
+        return client
+
+    def unsubscribe(self, client: EventClient):
+        with self._lock:
+            self._clients.discard(client)
+        client.close()
+
+    # ------------------------------------------------------
+
+    def stream(self, min_interval: Optional[float] = None):
+        """Generator text/event-stream cho 1 client."""
+        client = self.subscribe(min_interval)
+
+        try:
+            # Báo browser thời gian reconnect khi mất kết nối
+            yield "retry: 2000\n\n"
+
+            while True:
+                batch = client.wait(self.HEARTBEAT_INTERVAL)
+                if batch is None:
+                    break
+
+                if not batch:
+                    yield ": ping\n\n"
+                    continue
+
+                yield "".join(
+                    f"event: {event}\ndata: {payload}\n\n"
+                    for event, payload in batch
+                )
+
+        except GeneratorExit:
+            if self.logger:
+                self.logger.info("Client disconnected from event stream")
+
+        finally:
+            self.unsubscribe(client)
+
+
+# Singleton instance
+event_service = EventService()
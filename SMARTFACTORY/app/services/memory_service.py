@@ -0,0 +1,65 @@
+# app/services/memory_service.py
+from typing import Optional
+
+from app.core.config import config_service
+from app.core.memory import memory_monitor
+from app.services.camera_service import camera_service
+from app.services.event_service import event_service
+from app.services.mqtt_service import mqtt_service
+
+
+class MemoryService:
+    """
+    Nối MemoryMonitor (app/core/memory.py) với các service:
+    - đăng ký ước lượng byte của camera pipeline, MQTT, SSE
+    - cảnh báo tăng RSS → log + event SSE "memory_alert"
+    - API /api/memory gọi qua đây
+    """
+
+    def __init__(self):
+        self.logger = None
+
+    def init_app(self, app):
+        self.logger = app.logger
+
+        cfg = config_service.get_memory_config()
+        memory_monitor.configure(cfg)
+
+        memory_monitor.register("camera", self._camera_usage)
+        memory_monitor.register("mqtt", mqtt_service.memory_usage)
+        memory_monitor.register("events", event_service.memory_usage)
+        memory_monitor.on_alert(lambda alert: event_service.publish("memory_alert", alert))
+
+        if cfg["enabled"]:
+            memory_monitor.start()
+        self.logger.info("MemoryService ready")
+
+    @staticmethod
+    def _camera_usage():
+        pipeline = camera_service.pipeline
+        return pipeline.memory_usage() if pipeline is not None else {}
+
+    # ------------------------------------------------------
+
+    def get_status(self, history: Optional[int] = None) -> dict:
+        """RSS hiện tại, byte theo thành phần, xu hướng, cảnh báo."""
+        status = memory_monitor.status()
+        if history:
+            status["history"] = memory_monitor.series(history)
+        return status
+
+    def start_tracemalloc(self, frames: Optional[int] = None) -> bool:
+        if self.logger:
+            self.logger.warning("[Memory] tracemalloc enabled (adds CPU / RAM overhead until stopped)")
+        return memory_monitor.tracemalloc_start(frames)
+
+    def stop_tracemalloc(self):
+        memory_monitor.tracemalloc_stop()
+
+    def tracemalloc_diff(self, limit: int = 20, reset: bool = False,
+                         group_by: str = "lineno") -> Optional[dict]:
+        return memory_monitor.tracemalloc_diff(limit=limit, reset=reset, group_by=group_by)
+
+
+# Singleton instance
+memory_service = MemoryService()
@@ -1,14 +1,28 @@
 import paho.mqtt.client as mqtt
 from app.core.config import config_service
+from app.core.metrics import registry
+from app.services.event_service import event_service
 import threading
 import time
-from collections import defaultdict
+from collections import OrderedDict
 import json
 
+MQTT_PUBLISHES = registry.counter(
+    "smartfactory_mqtt_publishes_total",
+    "MQTT publish attempts by result (ok / failed / not_connected)",
+    ["result"],
+)
+MQTT_RECEIVED = registry.counter(
+    "smartfactory_mqtt_messages_received_total", "MQTT messages received"
+)
+
 class MQTTService:
     """Singleton MQTT service cho publish và lưu message cuối theo topic."""
     _instance_lock = threading.Lock()
 
+    # Số topic tối đa giữ message cuối; quá thì bỏ topic lâu không có message nhất
+    MAX_TOPICS = 256
+
     def __new__(cls, *args, **kwargs):
         if not hasattr(cls, "_instance"):
             with cls._instance_lock:
@@ -22,12 +36,17 @@ class MQTTService:
         self.client: mqtt.Client | None = None
         self.connected = False
         self.logger = None
-        self.last_messages = defaultdict(lambda: None)  # lưu message cuối theo topic
+        self.last_messages = OrderedDict()  # lưu message cuối theo topic (LRU, MAX_TOPICS)
+        self._messages_lock = threading.Lock()
+        self._last_healthy = time.monotonic()
         self._initialized = True
 
     def init_app(self, app):
         """Khởi tạo MQTT service với Flask app."""
         self.logger = app.logger
+        registry.gauge(
+            "smartfactory_mqtt_connected", "1 when connected to the MQTT broker"
+        ).set_function(lambda: 1 if self.connected else 0)
         self._setup()
         if self.logger:
             self.logger.info("[MQTTService] Initialized")
@@ -59,6 +78,7 @@ class MQTTService:
 
     def _on_connect(self, client, userdata, flags, rc, properties=None):
         self.connected = True
+        event_service.publish("mqtt_status", self.status())
         cfg = config_service.get_mqtt_config()
         # Subscribe đúng topic của user, không subscribe nhầm php/feeds/...
         for user in cfg.users:
@@ -71,6 +91,7 @@ class MQTTService:
 
     def _on_disconnect(self, client, userdata, rc):
         self.connected = False
+        event_service.publish("mqtt_status", self.status())
         if self.logger:
             self.logger.warning(f"[MQTT] Disconnected, rc={rc}")
 
@@ -82,32 +103,100 @@ class MQTTService:
             payload = json.loads(payload_raw)
         except:
             payload = payload_raw
-        self.last_messages[topic] = payload
+        with self._messages_lock:
+            self.last_messages[topic] = payload
+            self.last_messages.move_to_end(topic)
+            while len(self.last_messages) > self.MAX_TOPICS:
+                self.last_messages.popitem(last=False)
+        MQTT_RECEIVED.inc()
         if self.logger:
-            self.logger.info(f"[MQTT] Received on '{topic}': {payload}")
+            # Mỗi message 1 dòng → debug, format lười (chỉ khi level DEBUG)
+            self.logger.debug("[MQTT] Received on '%s': %s", topic, payload)
+
+        # Trạng thái conveyor: <user>/feeds/<status_topic>
+        cfg = config_service.get_mqtt_config()
+        if topic.endswith(f"/feeds/{cfg.status_topic}"):
+            user = topic.split("/", 1)[0]
+            event_service.publish("conveyor", {
+                "user": user,
+                "topic": topic,
+                "message": payload,
+            }, key=f"conveyor:{user}")
 
     def publish(self, topic: str, msg: str):
         """Publish message nếu connected."""
         if not self.client or not self.connected:
+            MQTT_PUBLISHES.labels("not_connected").inc()
             if self.logger:
                 self.logger.warning(f"[MQTT] Not connected, cannot publish to '{topic}'")
             return False
         try:
-            self.client.publish(topic, msg)
+            info = self.client.publish(topic, msg)
+            # rc != 0: paho không đưa được message vào hàng gửi (mất kết nối...)
+            MQTT_PUBLISHES.labels("ok" if info.rc == mqtt.MQTT_ERR_SUCCESS else "failed").inc()
             if self.logger:
-                self.logger.info(f"[MQTT] Published to '{topic}': {msg}")
+                self.logger.debug("[MQTT] Published to '%s': %s", topic, msg)
             return True
         except Exception as e:
+            MQTT_PUBLISHES.labels("failed").inc()
             if self.logger:
                 self.logger.error(f"[MQTT] Publish failed: {e}")
             return False
 
+    # ------------------------------------------------------
+    # Watchdog probe / recovery
+    # ------------------------------------------------------
+
+    def loop_alive(self) -> bool:
+        """Thread network loop của paho (loop_start) còn chạy?"""
+        thread = getattr(self.client, "_thread", None)
+        return thread is not None and thread.is_alive()
+
+    def progress(self):
+        """
+        time.monotonic() lần cuối thấy MQTT khoẻ (đã connect + loop thread
+        còn sống). None nếu chưa khởi tạo client.
+        """
+        if self.client is None:
+            return None
+        if self.connected and self.loop_alive():
+            self._last_healthy = time.monotonic()
+        return self._last_healthy
+
+    def restart_loop(self) -> bool:
+        """Dừng loop cũ (nếu còn), reconnect và chạy lại loop_start()."""
+        if self.client is None:
+            return False
+        try:
+            self.client.loop_stop()
+        except Exception:
+            pass
+
+        ok = True
+        try:
+            self.client.reconnect()
+        except Exception as e:
+            ok = False
+            if self.logger:
+                self.logger.error(f"[MQTT] Reconnect failed: {e}")
+        finally:
+            # loop_start vẫn tự thử kết nối lại nếu reconnect() lỗi
+            self.client.loop_start()
+        return ok
+
     def status(self) -> dict:
         return {"connected": self.connected}
 
     def get_last_message(self, topic: str):
         """Trả message cuối cùng của topic, nếu chưa có thì None"""
-        return self.last_messages.get(topic)
+        with self._messages_lock:
+            return self.last_messages.get(topic)
+
+    def memory_usage(self) -> dict:
+        """Ước lượng byte của last_messages (topic + payload dạng text)."""
+        with self._messages_lock:
+            items = list(self.last_messages.items())
+        return {"last_messages": sum(len(topic) + len(str(payload)) for topic, payload in items)}
 
 # Singleton instance
 mqtt_service = MQTTService()
@@ -0,0 +1,40 @@
+# app/services/thermal_service.py
+from typing import Optional
+
+from app.core.config import config_service
+from app.core.thermal import ThermalGovernor, ThermalSensors
+from app.services.camera_service import camera_service
+from app.services.event_service import event_service
+
+
+class ThermalService:
+    """
+    Nối ThermalGovernor (app/core/thermal.py) với camera pipeline:
+    - đọc nhiệt độ CPU qua sysfs mỗi interval_s
+    - đổi bậc giảm tải → áp lên pipeline hiện tại + event SSE "thermal"
+    - trạng thái hiển thị trong /api/camera/status ("thermal")
+    """
+
+    def __init__(self):
+        self.logger = None
+        self.governor: Optional[ThermalGovernor] = None
+
+    def init_app(self, app):
+        self.logger = app.logger
+
+        cfg = config_service.get_camera_config().thermal
+        sensors = ThermalSensors(root=cfg["sysfs_root"], zone=cfg["zone"])
+        self.governor = ThermalGovernor(sensors, cfg, lambda: camera_service.pipeline)
+        self.governor.on_change(lambda change: event_service.publish("thermal", self.governor.stats()))
+        camera_service.thermal = self.governor
+
+        if cfg["enabled"]:
+            self.governor.start()
+        self.logger.info("ThermalService ready")
+
+    def get_status(self) -> dict:
+        return self.governor.stats() if self.governor else {"running": False}
+
+
+# Singleton instance
+thermal_service = ThermalService()
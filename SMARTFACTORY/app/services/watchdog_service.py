@@ -0,0 +1,61 @@
+# app/services/watchdog_service.py
+from app.core.config import config_service
+from app.core.watchdog import watchdog
+from app.services.camera_service import camera_service
+from app.services.event_service import event_service
+from app.services.mqtt_service import mqtt_service
+
+
+class WatchdogService:
+    """
+    Nối Watchdog (app/core/watchdog.py) với các thành phần chạy nền:
+
+    - "capture": không có frame mới quá capture_timeout_s → mở lại
+      CameraReader (pipeline, viewer, SSE giữ nguyên)
+    - "detect":  detect loop không quay vòng quá detect_timeout_s
+      (thread chết / kẹt trong OpenCV) → chạy detect loop mới
+    - "mqtt":    mất kết nối hoặc thread loop paho chết quá
+      mqtt_timeout_s → loop_stop / reconnect / loop_start
+    """
+
+    def __init__(self):
+        self.logger = None
+
+    def init_app(self, app):
+        self.logger = app.logger
+
+        cfg = config_service.get_watchdog_config()
+        watchdog.configure(cfg)
+
+        watchdog.register(
+            "capture", camera_service.capture_progress,
+            self._recover(camera_service.recover_capture), cfg["capture_timeout_s"],
+        )
+        watchdog.register(
+            "detect", camera_service.detection_progress,
+            self._recover(camera_service.recover_detection), cfg["detect_timeout_s"],
+        )
+        watchdog.register(
+            "mqtt", mqtt_service.progress,
+            mqtt_service.restart_loop, cfg["mqtt_timeout_s"],
+        )
+
+        if cfg["enabled"]:
+            watchdog.start()
+        self.logger.info("WatchdogService ready")
+
+    @staticmethod
+    def _recover(fn):
+        """Khôi phục camera xong → đẩy lại camera_status cho FE."""
+        def recover():
+            ok = fn()
+            event_service.publish("camera_status", camera_service.get_status())
+            return ok
+        return recover
+
+    def get_status(self) -> dict:
+        return watchdog.stats()
+
+
+# Singleton instance
+watchdog_service = WatchdogService()
@@ -1,14 +1,15 @@
 // ======================== IMPORT MODULES ===========================
-import { switchCameraType, initFullscreenButton, initEmergencyStop, loadUSBCameras } from "./ui_camera.js";
+import { switchCameraType, initFullscreenButton, initEmergencyStop, loadUSBCameras, drawOverlayEvent } from "./ui_camera.js";
 import { startCamera, stopCamera } from "./camera_control.js";
-import { pollMQTTStatus } from "./mqtt.js";
-import { pollDetections } from "./detection.js";
+import { pollMQTTStatus, renderMQTTStatus } from "./mqtt.js";
+import { pollDetections, renderDetections } from "./detection.js";
+import { onEvent, connectEvents, eventsSupported } from "./events.js";
 import {
     renderColorTable,
     saveColorConfig,
     addNewColorRow
 } from "./colors.js";
-import { pingConveyor } from "./conveyor.js";
+import { pingConveyor, handleConveyorEvent } from "./conveyor.js";
 
 
 // ======================== EXPOSE GLOBAL (HTML BUTTONS) ===========================
@@ -62,7 +63,15 @@ document.addEventListener("DOMContentLoaded", async () => {
     // --- Load Colors Config from Server ---
     await renderColorTable();
 
-    // --- Auto Poll ---
-    setInterval(pollMQTTStatus, 5000);
-    setInterval(pollDetections, 1000);
+    // --- Push (SSE), fallback polling nếu browser không hỗ trợ ---
+    if (eventsSupported()) {
+        onEvent("detections", renderDetections);
+        onEvent("mqtt_status", renderMQTTStatus);
+        onEvent("conveyor", handleConveyorEvent);
+        onEvent("tracks", drawOverlayEvent);
+        connectEvents();
+    } else {
+        setInterval(pollMQTTStatus, 5000);
+        setInterval(pollDetections, 1000);
+    }
 });
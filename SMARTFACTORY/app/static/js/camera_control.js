@@ -1,4 +1,5 @@
 import { CAMERA_API_BASE } from "./helpers.js";
+import { startOverlay, stopOverlay } from "./ui_camera.js";
 
 export let cameraRunning = false;
 
@@ -65,6 +66,8 @@ export async function startCamera() {
         camStatusEl.innerHTML =
             '<i class="fas fa-circle" style="color:green;"></i> Camera Running';
 
+        await syncOverlayMode();
+
         return true;
     }
 
@@ -96,8 +99,27 @@ export async function stopCamera() {
 
     videoEl.src = "";
     videoEl.style.display = "none";
+    stopOverlay();
 
     list.innerHTML = `<li style="color:#888;">No objects detected</li>`;
     camStatusEl.innerHTML =
         '<i class="fas fa-circle" style="color:gray;"></i> Camera Stopped';
 }
+
+/**
+ * overlay_mode = "client" → browser tự vẽ overlay lên canvas
+ */
+async function syncOverlayMode() {
+    try {
+        const res = await fetch(`${CAMERA_API_BASE}/status`);
+        const data = await res.json();
+
+        if (data.data?.overlay_mode === "client") {
+            startOverlay();
+        } else {
+            stopOverlay();
+        }
+    } catch (err) {
+        console.error("[Camera] Status error:", err);
+    }
+}
@@ -1,11 +1,39 @@
-import { sendMQTT, pollMQTTMessages } from "./mqtt.js";
+import { sendMQTT, pollMQTTMessages, appendMQTTLog } from "./mqtt.js";
 import { buildFeedTopic, CMD_FEED, STATUS_FEED } from "./helpers.js";
+import { eventsSupported } from "./events.js";
 
 const pingIntervals = {};
+const pingTimeouts = {};
+
+/**
+ * Handler cho SSE "conveyor": { user, topic, message }
+ */
+export function handleConveyorEvent(evt) {
+    const text = typeof evt.message === "string" ? evt.message : JSON.stringify(evt.message);
+    appendMQTTLog(`← RECV: ${evt.topic} | ${text}`);
+
+    if (text.includes("READY")) {
+        clearTimeout(pingTimeouts[evt.user]);
+        setConveyorStatus(evt.user, "READY");
+    }
+
+    if (text.includes("DONE")) {
+        setConveyorStatus(evt.user, "DONE");
+    }
+}
 
 export async function pingConveyor(user) {
     setConveyorStatus(user, "PING...");
 
+    // SSE: trạng thái được đẩy qua handleConveyorEvent
+    if (eventsSupported()) {
+        clearTimeout(pingTimeouts[user]);
+        await sendMQTT(buildFeedTopic(user, CMD_FEED), JSON.stringify({ action: "PING" }));
+
+        pingTimeouts[user] = setTimeout(() => setConveyorStatus(user, "TIMEOUT"), 5000);
+        return;
+    }
+
     await sendMQTT(buildFeedTopic(user, CMD_FEED), JSON.stringify({ action: "PING" }));
 
     let timeout = false;
@@ -39,6 +67,7 @@ export async function pingConveyor(user) {
 
 export function setConveyorStatus(user, status) {
     const el = document.getElementById(`status-${user}`);
+    if (!el) return;
     el.textContent = status;
     el.classList.remove("conv-ready", "conv-timeout");
 
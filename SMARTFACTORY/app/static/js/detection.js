@@ -4,13 +4,25 @@ import { cameraRunning } from "./camera_control.js";
 
 let lastActions = {};
 
+/**
+ * Fallback khi browser không hỗ trợ SSE
+ */
 export async function pollDetections() {
     if (!cameraRunning) return;
 
     const res = await fetch(`${CAMERA_API_BASE}/detections`);
     if (!res.ok) return;
 
-    const data = await res.json();
+    await renderDetections(await res.json());
+}
+
+/**
+ * Render danh sách + gửi lệnh MQTT
+ * data: { detections: [...] } (từ SSE "detections" hoặc /detections)
+ */
+export async function renderDetections(data) {
+    if (!cameraRunning) return;
+
     const list = document.getElementById("detected-list");
 
     // Không có detection
@@ -49,7 +61,9 @@ export async function pollDetections() {
         const key = `${user}_${action}`;
 
         // Chống gửi trùng lặp (debounce theo duration)
+        // Ghi lastActions trước khi await: event SSE có thể tới liên tiếp
         if (!lastActions[key] || now - lastActions[key] > duration + 500) {
+            lastActions[key] = now;
 
             await sendMQTT(
                 buildFeedTopic(user, CMD_FEED),
@@ -58,8 +72,6 @@ export async function pollDetections() {
                     duration_ms: duration
                 })
             );
-
-            lastActions[key] = now;
         }
     }
 }
@@ -0,0 +1,54 @@
+import { EVENTS_API_BASE } from "./helpers.js";
+
+/* ================= SERVER-SENT EVENTS =================
+   1 kết nối /api/events/ thay cho các vòng polling:
+   - detections, tracks, camera_status, mqtt_status, conveyor
+   Server chỉ đẩy khi trạng thái thay đổi (coalescing + rate limit).
+========================================================= */
+
+const handlers = {};
+let source = null;
+
+function attach(name) {
+    source.addEventListener(name, (e) => {
+        let data;
+        try {
+            data = JSON.parse(e.data);
+        } catch (err) {
+            console.error(`[Events] Invalid JSON for ${name}:`, err);
+            return;
+        }
+
+        for (const fn of handlers[name] || []) {
+            fn(data);
+        }
+    });
+}
+
+/**
+ * Đăng ký handler cho 1 loại event
+ */
+export function onEvent(name, fn) {
+    const isNew = !handlers[name];
+    (handlers[name] ||= []).push(fn);
+
+    if (source && isNew) attach(name);
+}
+
+export function eventsSupported() {
+    return typeof window.EventSource !== "undefined";
+}
+
+/**
+ * Mở kết nối SSE (EventSource tự reconnect khi mất mạng)
+ */
+export function connectEvents(rate = 20) {
+    if (source || !eventsSupported()) return;
+
+    source = new EventSource(`${EVENTS_API_BASE}/?rate=${rate}`);
+    Object.keys(handlers).forEach(attach);
+
+    source.onerror = () => {
+        console.warn("[Events] Connection lost, retrying...");
+    };
+}
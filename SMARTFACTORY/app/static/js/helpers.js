@@ -4,6 +4,7 @@
 export const CAMERA_API_BASE = "/api/camera";
 export const MQTT_API_BASE = "/api/mqtt";
 export const COLOR_API_BASE = "/api/colors";   // <<--- THÊM MỚI
+export const EVENTS_API_BASE = "/api/events";
 
 // MQTT FEEDS (phù hợp config_mqtt.json)
 export const CMD_FEED = "V1";
@@ -15,9 +15,13 @@ export async function pollMQTTStatus() {
     if (!res.ok) return;
 
     const data = await res.json();
+    renderMQTTStatus(data.data);
+}
+
+export function renderMQTTStatus(status) {
     const statusEl = document.getElementById('mqtt-status');
 
-    if (data.data.connected) {
+    if (status.connected) {
         statusEl.innerHTML = '<i class="fas fa-circle" style="color:green;"></i> MQTT Online';
     } else {
         statusEl.innerHTML = '<i class="fas fa-circle" style="color:red;"></i> MQTT Offline';
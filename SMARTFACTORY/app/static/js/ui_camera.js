@@ -1,3 +1,6 @@
+import { CAMERA_API_BASE } from "./helpers.js";
+import { eventsSupported } from "./events.js";
+
 /* ================= UI Camera Switch ================= */
 export function switchCameraType() {
     const typeSelect = document.getElementById('camera-type');
@@ -81,6 +84,10 @@ function applyTransform() {
     transformString += ` rotate(${rotation}deg)`;
 
     img.style.transform = transformString;
+
+    // Overlay phải xoay / lật cùng video
+    const canvas = document.getElementById("overlay-canvas");
+    if (canvas) canvas.style.transform = transformString;
 }
 
 // GẮN TOÀN CỤC (để HTML gọi được)
@@ -105,3 +112,170 @@ window.resetTransform = function () {
     rotation = 0;
     applyTransform();
 };
+
+
+// ========================= CLIENT-SIDE OVERLAY =========================
+// overlay_mode = "client": server stream frame gốc, browser tự vẽ
+// box / label / trajectory từ SSE "tracks"
+// (fallback: long-poll /api/camera/tracks theo seq).
+
+let overlayRunning = false;
+let overlaySeq = -1;
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+function bgrToCss(bgr) {
+    return bgr ? `rgb(${bgr[2]},${bgr[1]},${bgr[0]})` : "#ccc";
+}
+
+/**
+ * Vùng ảnh thực sự hiển thị trong <img> (object-fit: contain)
+ */
+function contentRect(cw, ch, fw, fh) {
+    const scale = Math.min(cw / fw, ch / fh);
+    return {
+        scale,
+        offsetX: (cw - fw * scale) / 2,
+        offsetY: (ch - fh * scale) / 2,
+    };
+}
+
+function drawLabel(ctx, text, x, y) {
+    ctx.font = "12px sans-serif";
+    const tw = ctx.measureText(text).width;
+
+    ctx.fillStyle = "rgba(0,0,0,0.7)";
+    ctx.fillRect(x, y - 18, tw + 6, 18);
+
+    ctx.fillStyle = "#fff";
+    ctx.fillText(text, x + 3, y - 5);
+}
+
+function drawArrowHead(ctx, from, to) {
+    const angle = Math.atan2(to[1] - from[1], to[0] - from[0]);
+    const len = Math.max(6, 0.3 * Math.hypot(to[0] - from[0], to[1] - from[1]));
+
+    ctx.beginPath();
+    ctx.moveTo(to[0], to[1]);
+    ctx.lineTo(to[0] - len * Math.cos(angle - Math.PI / 4), to[1] - len * Math.sin(angle - Math.PI / 4));
+    ctx.moveTo(to[0], to[1]);
+    ctx.lineTo(to[0] - len * Math.cos(angle + Math.PI / 4), to[1] - len * Math.sin(angle + Math.PI / 4));
+    ctx.stroke();
+}
+
+export function drawOverlay(meta) {
+    const canvas = document.getElementById("overlay-canvas");
+    if (!canvas || !meta) return;
+
+    const dpr = window.devicePixelRatio || 1;
+    const cw = canvas.clientWidth;
+    const ch = canvas.clientHeight;
+
+    if (canvas.width !== Math.round(cw * dpr) || canvas.height !== Math.round(ch * dpr)) {
+        canvas.width = Math.round(cw * dpr);
+        canvas.height = Math.round(ch * dpr);
+    }
+
+    const ctx = canvas.getContext("2d");
+    ctx.setTransform(dpr, 0, 0, dpr, 0, 0);
+    ctx.clearRect(0, 0, cw, ch);
+
+    if (!meta.width || !meta.height) return;
+
+    // Toạ độ frame → toạ độ canvas
+    const { scale, offsetX, offsetY } = contentRect(cw, ch, meta.width, meta.height);
+    const px = (p) => [offsetX + p[0] * scale, offsetY + p[1] * scale];
+
+    ctx.lineWidth = 2;
+
+    for (const t of meta.tracks || []) {
+        const color = bgrToCss(t.bgr);
+        const [x, y] = px([t.x, t.y]);
+
+        // Bounding box
+        ctx.strokeStyle = color;
+        ctx.strokeRect(x, y, t.w * scale, t.h * scale);
+
+        // Label
+        drawLabel(ctx, `${t.name} | ID:${t.id}`, x, y);
+
+        // Trajectory
+        const traj = (t.trajectory || []).map(px);
+        if (traj.length >= 2) {
+            ctx.strokeStyle = color;
+            ctx.beginPath();
+            ctx.moveTo(traj[0][0], traj[0][1]);
+            for (let i = 1; i < traj.length; i++) {
+                ctx.lineTo(traj[i][0], traj[i][1]);
+            }
+            ctx.stroke();
+
+            drawArrowHead(ctx, traj[traj.length - 2], traj[traj.length - 1]);
+        }
+    }
+
+    // FPS góc phải trên
+    if (meta.fps) {
+        const text = `FPS: ${meta.fps.toFixed(1)}`;
+        ctx.font = "12px sans-serif";
+        const tw = ctx.measureText(text).width;
+        const right = offsetX + meta.width * scale;
+
+        ctx.fillStyle = "#fff";
+        ctx.fillRect(right - tw - 15, offsetY + 5, tw + 10, 20);
+        ctx.fillStyle = "#000";
+        ctx.fillText(text, right - tw - 10, offsetY + 19);
+    }
+}
+
+/**
+ * Handler cho SSE "tracks"
+ */
+export function drawOverlayEvent(meta) {
+    if (!overlayRunning) return;
+    requestAnimationFrame(() => drawOverlay(meta));
+}
+
+async function overlayLoop() {
+    while (overlayRunning) {
+        try {
+            const res = await fetch(`${CAMERA_API_BASE}/tracks?after=${overlaySeq}&timeout=2`);
+            if (!res.ok) {
+                await sleep(1000);
+                continue;
+            }
+
+            const data = await res.json();
+            if (!overlayRunning || !data.data) continue;
+
+            overlaySeq = data.data.seq;
+            requestAnimationFrame(() => drawOverlay(data.data));
+
+        } catch (err) {
+            console.error("[Overlay] Fetch error:", err);
+            await sleep(1000);
+        }
+    }
+}
+
+export function startOverlay() {
+    const canvas = document.getElementById("overlay-canvas");
+    if (canvas) canvas.style.display = "block";
+
+    if (overlayRunning) return;
+
+    overlayRunning = true;
+    overlaySeq = -1;
+
+    if (!eventsSupported()) overlayLoop();
+}
+
+export function stopOverlay() {
+    overlayRunning = false;
+
+    const canvas = document.getElementById("overlay-canvas");
+    if (!canvas) return;
+
+    canvas.getContext("2d").clearRect(0, 0, canvas.width, canvas.height);
+    canvas.style.display = "none";
+}
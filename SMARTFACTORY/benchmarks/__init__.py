@@ -0,0 +1,9 @@
+"""
+Benchmark scripts cho camera core.
+
+Chạy từ thư mục SMARTFACTORY, ví dụ:
+    python -m benchmarks.bench_draw_manager
+
+Toàn bộ camera core + so baseline JSON: python -m benchmarks.bench_suite
+Độ chính xác detect / track trên cảnh tổng hợp: python -m benchmarks.score_synthetic
+"""
@@ -0,0 +1,82 @@
+"""
+Benchmark DrawManager.render với 1 / 10 / 50 object.
+
+    python -m benchmarks.bench_draw_manager [--iterations 300] [--width 640 --height 480]
+
+Mỗi object có bounding box, label và trajectory đầy đủ (max_history điểm).
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.core.camera import ColorObject, DrawManager, Tracker
+
+
+COLORS = [
+    ColorObject("red", [0, 100, 80], [10, 255, 255], [0, 0, 255]),
+    ColorObject("green", [35, 80, 80], [85, 255, 255], [0, 255, 0]),
+    ColorObject("blue", [90, 70, 70], [130, 255, 255], [255, 0, 0]),
+]
+
+
+def build_tracker(n_objects, width, height, history=20):
+    """Tạo tracker với n object đã có trajectory đủ dài."""
+    tracker = Tracker(max_lost=60, max_history=history, match_dist=30)
+
+    cols = max(1, int(np.ceil(np.sqrt(n_objects))))
+    cell_w = width // cols
+    cell_h = height // cols
+
+    tracked = []
+    for step in range(history):
+        boxes, labels = [], []
+        for i in range(n_objects):
+            x = (i % cols) * cell_w + step
+            y = (i // cols) * cell_h + step // 2
+            boxes.append((x, y, max(8, cell_w // 3), max(8, cell_h // 3)))
+            labels.append(COLORS[i % len(COLORS)])
+        tracked = tracker.update(boxes, labels)
+
+    return tracker, tracked
+
+
+def bench(n_objects, width, height, iterations):
+    tracker, tracked = build_tracker(n_objects, width, height)
+    drawer = DrawManager(tracker=tracker, show_fps=True)
+    base = np.random.randint(0, 255, (height, width, 3), dtype=np.uint8)
+    frame = base.copy()
+
+    # warm-up
+    for _ in range(10):
+        np.copyto(frame, base)
+        drawer.render(frame, tracked, fps=30.0)
+
+    samples = []
+    for _ in range(iterations):
+        np.copyto(frame, base)
+        t0 = time.perf_counter()
+        drawer.render(frame, tracked, fps=30.0)
+        samples.append(time.perf_counter() - t0)
+
+    samples = np.array(samples) * 1000.0
+    return np.mean(samples), np.percentile(samples, 50), np.percentile(samples, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    args = parser.parse_args()
+
+    print(f"DrawManager.render @ {args.width}x{args.height}, {args.iterations} iterations")
+    print(f"{'objects':>8} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for n in (1, 10, 50):
+        mean, p50, p99 = bench(n, args.width, args.height, args.iterations)
+        print(f"{n:>8} {mean:>9.3f} {p50:>9.3f} {p99:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""
+Load test HTTP: N client xem /api/camera/stream cùng lúc (có client đọc
+chậm) + poll API, tăng dần số client → Pi phục vụ được bao nhiêu dashboard.
+
+    # Tự chạy server (run.py, FLASK_ENV=production) với nguồn camera tổng hợp
+    python -m benchmarks.bench_loadtest --clients 0,1,2,4,8 --step-seconds 10
+
+    # Server đang chạy sẵn (vd. trên Pi); CPU server chỉ đo được khi cùng máy (--pid)
+    python -m benchmarks.bench_loadtest --url http://<pi>:5000 --src <nguồn> --pid <pid>
+
+Mỗi bậc (số client stream):
+    - stream:  FPS nhận được của từng client (đếm frame multipart bằng
+               MJPEGParser); --slow-ratio client đọc giới hạn --slow-kbps
+    - poll:    /api/camera/detections (--detections-hz), /api/mqtt/status
+               (--mqtt-hz), /api/colors (--colors-hz) → latency p50/p95/p99
+    - server:  CPU % của process server, FPS detect (delta frames.processed
+               của /api/camera/status) → so với bậc 0 client
+
+Nguồn tổng hợp mặc định: thư mục ảnh băng chuyền có vật thể màu di chuyển
+(ImageDirSource, phát realtime + loop), không cần camera.
+"""
+
+import argparse
+import json
+import math
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+import requests
+
+from app.core.camera import MJPEGParser
+from benchmarks.bench_suite import color_objects, fill_bgr
+
+try:
+    import psutil
+except ImportError:     # pragma: no cover - psutil có trong requirements
+    psutil = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# ---------------------------------------------------------------------------
+# Nguồn tổng hợp + server
+# ---------------------------------------------------------------------------
+
+def write_synthetic_frames(path, width, height, frames, n_objects=6):
+    """Ghi `frames` ảnh JPEG: nền xám có nhiễu, n_objects khối màu chạy ngang."""
+    rng = np.random.default_rng(0)
+    objects = color_objects(7)
+    colors = [fill_bgr(obj) for obj in objects]
+    size = max(24, height // 8)
+    lanes = [int(height * (i + 1) / (n_objects + 1)) - size // 2 for i in range(n_objects)]
+
+    base = np.full((height, width, 3), 90, dtype=np.uint8)
+    for n in range(frames):
+        frame = base + rng.integers(0, 20, base.shape, dtype=np.uint8)
+        for i, y in enumerate(lanes):
+            x = int((n * (4 + i) + i * width / n_objects) % (width + size)) - size
+            cv2.rectangle(frame, (x, y), (x + size, y + size), colors[i % len(colors)], -1)
+        cv2.imwrite(os.path.join(path, f"{n:05d}.jpg"), frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, log_path):
+    env = dict(os.environ, FLASK_ENV="production", FLASK_HOST="127.0.0.1",
+               FLASK_PORT=str(port), LOG_LEVEL=os.getenv("LOG_LEVEL", "WARNING"))
+    log = open(log_path, "w")
+    proc = subprocess.Popen([sys.executable, "run.py"], cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with {proc.returncode}, see {log_path}")
+        try:
+            requests.get(f"{url}/api/camera/status", timeout=1)
+            return proc, url
+        except requests.RequestException:
+            time.sleep(0.3)
+    proc.terminate()
+    raise RuntimeError(f"server did not start in 30 s, see {log_path}")
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+class StreamClient(threading.Thread):
+    """Đọc /api/camera/stream, ghi thời điểm nhận từng frame."""
+
+    CHUNK = 16384
+
+    def __init__(self, url, stop_event, kbps=None):
+        super().__init__(daemon=True)
+        self.url = url
+        self.stop_event = stop_event
+        self.kbps = kbps
+        self.frame_times = []
+        self.error = None
+
+    def run(self):
+        parser = MJPEGParser(b"frame")
+        chunk = 4096 if self.kbps else self.CHUNK
+        try:
+            with requests.get(f"{self.url}/api/camera/stream", stream=True, timeout=10) as response:
+                response.raise_for_status()
+                for data in response.iter_content(chunk_size=chunk):
+                    now = time.perf_counter()
+                    self.frame_times.extend([now] * len(parser.feed(data)))
+                    if self.stop_event.is_set():
+                        break
+                    if self.kbps:
+                        time.sleep(len(data) / (self.kbps * 1024.0))
+        except requests.RequestException as e:
+            self.error = str(e)
+
+    def fps(self, start, end):
+        return sum(1 for t in self.frame_times if start <= t <= end) / max(1e-6, end - start)
+
+
+class Poller(threading.Thread):
+    """Gọi GET 1 endpoint với tần số cố định, ghi latency."""
+
+    def __init__(self, url, path, hz, stop_event):
+        super().__init__(daemon=True)
+        self.url = url
+        self.path = path
+        self.interval = 1.0 / hz
+        self.stop_event = stop_event
+        self.samples = []       # (thời điểm, latency giây, status code)
+        self.session = requests.Session()
+
+    def run(self):
+        next_at = time.perf_counter()
+        while not self.stop_event.is_set():
+            t0 = time.perf_counter()
+            try:
+                code = self.session.get(f"{self.url}{self.path}", timeout=5).status_code
+            except requests.RequestException:
+                code = None
+            self.samples.append((t0, time.perf_counter() - t0, code))
+
+            next_at = max(next_at + self.interval, time.perf_counter())
+            self.stop_event.wait(next_at - time.perf_counter())
+
+    def latency(self, start, end):
+        ms = [lat * 1000.0 for t, lat, _ in self.samples if start <= t <= end]
+        errors = sum(1 for t, _, code in self.samples if start <= t <= end and code != 200)
+        if not ms:
+            return {"requests": 0, "errors": errors}
+        return {
+            "requests": len(ms),
+            "errors": errors,
+            "p50_ms": round(float(np.percentile(ms, 50)), 1),
+            "p95_ms": round(float(np.percentile(ms, 95)), 1),
+            "p99_ms": round(float(np.percentile(ms, 99)), 1),
+        }
+
+
+def processed_frames(url):
+    data = requests.get(f"{url}/api/camera/status", timeout=5).json()["data"]
+    return data.get("frames", {}).get("processed", 0)
+
+
+# ---------------------------------------------------------------------------
+
+def run_step(url, n_clients, args, server):
+    stop_event = threading.Event()
+    # Làm tròn lên → mỗi bước có client luôn có ít nhất 1 client đọc chậm
+    n_slow = min(n_clients, math.ceil(n_clients * args.slow_ratio))
+    clients = [
+        StreamClient(url, stop_event, kbps=args.slow_kbps if i < n_slow else None)
+        for i in range(n_clients)
+    ]
+    pollers = [
+        Poller(url, path, hz, stop_event)
+        for path, hz in (
+            ("/api/camera/detections", args.detections_hz),
+            ("/api/mqtt/status", args.mqtt_hz),
+            ("/api/colors/", args.colors_hz),
+        ) if hz > 0
+    ]
+    for worker in clients + pollers:
+        worker.start()
+
+    time.sleep(args.warmup)
+    if server is not None:
+        server.cpu_percent()                # mốc đầu
+    start, frames0 = time.perf_counter(), processed_frames(url)
+    time.sleep(args.step_seconds)
+    end, frames1 = time.perf_counter(), processed_frames(url)
+    cpu = server.cpu_percent() if server is not None else None
+
+    stop_event.set()
+    for worker in clients + pollers:
+        worker.join(timeout=5)
+
+    fps = [round(c.fps(start, end), 1) for c in clients]
+    return {
+        "clients": n_clients,
+        "slow_clients": n_slow,
+        "stream_fps": fps,
+        "stream_fps_min": min(fps) if fps else None,
+        "stream_fps_fast_avg": round(float(np.mean(fps[n_slow:])), 1) if fps[n_slow:] else None,
+        "stream_errors": [c.error for c in clients if c.error],
+        "detection_fps": round((frames1 - frames0) / (end - start), 1),
+        "server_cpu_percent": round(cpu, 1) if cpu is not None else None,
+        "latency": {p.path: p.latency(start, end) for p in pollers},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="server có sẵn (mặc định: tự chạy run.py trên cổng trống)")
+    parser.add_argument("--pid", type=int, help="PID server để đo CPU khi dùng --url")
+    parser.add_argument("--src", help="nguồn camera gửi kèm /api/camera/start (mặc định: ảnh tổng hợp)")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--clients", default="0,1,2,4,8", help="số client stream mỗi bậc")
+    parser.add_argument("--slow-ratio", type=float, default=0.25, help="tỉ lệ client đọc chậm (làm tròn lên, > 0 → ít nhất 1)")
+    parser.add_argument("--slow-kbps", type=float, default=256, help="băng thông client chậm (KB/s)")
+    parser.add_argument("--detections-hz", type=float, default=5)
+    parser.add_argument("--mqtt-hz", type=float, default=1)
+    parser.add_argument("--colors-hz", type=float, default=0.5)
+    parser.add_argument("--step-seconds", type=float, default=10)
+    parser.add_argument("--warmup", type=float, default=2, help="giây chờ sau khi client kết nối")
+    parser.add_argument("--json", metavar="PATH", help="ghi kết quả JSON")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="loadtest-")
+    proc = None
+    try:
+        src = args.src
+        if src is None:
+            src = os.path.join(workdir, "frames")
+            os.makedirs(src)
+            write_synthetic_frames(src, args.width, args.height, frames=150)
+
+        if args.url:
+            url = args.url.rstrip("/")
+            server = psutil.Process(args.pid) if psutil is not None and args.pid else None
+        else:
+            proc, url = start_server(free_port(), os.path.join(workdir, "server.log"))
+            server = psutil.Process(proc.pid) if psutil is not None else None
+
+        started = requests.post(f"{url}/api/camera/start", json={"src": src}, timeout=30).json()
+        if not started.get("started"):
+            raise SystemExit(f"Camera did not start: {started}")
+        time.sleep(2)
+
+        print(f"{url}, src={src}, {args.step_seconds:g}s / step, "
+              f"{args.slow_ratio:.0%} slow clients @ {args.slow_kbps:g} KB/s")
+        print(f"{'clients':>7} {'det fps':>8} {'cpu %':>6} {'fps min':>8} {'fps avg':>8} "
+              f"{'detections p50/p95/p99 ms':>26} {'mqtt p95':>9} {'colors p95':>11}")
+
+        results = []
+        for n in (int(c) for c in args.clients.split(",")):
+            r = run_step(url, n, args, server)
+            results.append(r)
+
+            lat = r["latency"]
+            det = lat.get("/api/camera/detections", {})
+            print(
+                f"{n:>7} {r['detection_fps']:>8.1f} {str(r['server_cpu_percent']):>6} "
+                f"{str(r['stream_fps_min']):>8} {str(r['stream_fps_fast_avg']):>8} "
+                f"{'/'.join(str(det.get(k, '-')) for k in ('p50_ms', 'p95_ms', 'p99_ms')):>26} "
+                f"{str(lat.get('/api/mqtt/status', {}).get('p95_ms', '-')):>9} "
+                f"{str(lat.get('/api/colors/', {}).get('p95_ms', '-')):>11}",
+                flush=True,
+            )
+            for error in r["stream_errors"]:
+                print(f"        stream error: {error}")
+
+        if len(results) > 1 and results[0]["detection_fps"]:
+            base, last = results[0], results[-1]
+            print(f"\nDetection FPS {base['detection_fps']:.1f} ({base['clients']} clients) → "
+                  f"{last['detection_fps']:.1f} ({last['clients']} clients), "
+                  f"{(last['detection_fps'] / base['detection_fps'] - 1) * 100:+.0f}%")
+
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump({"url": url, "src": src, "args": vars(args), "steps": results}, f, indent=2)
+            print(f"Saved → {args.json}")
+
+    finally:
+        if proc is not None:
+            try:
+                requests.post(f"{url}/api/camera/stop", timeout=5)
+            except requests.RequestException:
+                pass
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Benchmark MJPEGParser (MB/s) trên stream MJPEG đã ghi sẵn hoặc tổng hợp.
+
+    # Ghi 10 giây stream từ IP camera ra file
+    python -m benchmarks.bench_mjpeg_parser --record http://<cam>/video --seconds 10 --out cam.mjpeg
+
+    # Đo tốc độ parse file đã ghi (kèm boundary nếu là multipart)
+    python -m benchmarks.bench_mjpeg_parser --file cam.mjpeg --boundary frame
+
+    # Không có file → tự tạo stream tổng hợp (multipart có / không
+    # Content-Length, JPEG nối liền có thumbnail EXIF)
+    python -m benchmarks.bench_mjpeg_parser
+
+"legacy" là cách tách cũ của MJPEGReader (bytes += chunk, quét lại
+toàn bộ buffer tìm 0xFFD8 / 0xFFD9) để so sánh.
+"""
+
+import argparse
+import struct
+import time
+
+import cv2
+import numpy as np
+
+from app.core.camera import MJPEGParser
+
+
+def make_jpeg(width, height, seed, quality=85):
+    rng = np.random.default_rng(seed)
+    img = rng.integers(0, 255, (height // 8, width // 8, 3), dtype=np.uint8)
+    img = cv2.resize(img, (width, height), interpolation=cv2.INTER_LINEAR)
+    ok, jpg = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return jpg.tobytes()
+
+
+def with_exif_thumbnail(jpg, thumb):
+    """Chèn APP1 chứa 1 JPEG thumbnail (có SOI/EOI riêng) ngay sau SOI."""
+    payload = b"Exif\x00\x00" + thumb
+    app1 = b"\xff\xe1" + struct.pack(">H", len(payload) + 2) + payload
+    return jpg[:2] + app1 + jpg[2:]
+
+
+def build_stream(frames, mode, boundary=b"frame"):
+    parts = []
+    for jpg in frames:
+        if mode == "raw":
+            parts.append(jpg)
+            continue
+        header = b"--" + boundary + b"\r\nContent-Type: image/jpeg\r\n"
+        if mode == "multipart-length":
+            header += b"Content-Length: " + str(len(jpg)).encode() + b"\r\n"
+        parts.append(header + b"\r\n" + jpg + b"\r\n")
+    return b"".join(parts)
+
+
+def legacy_parse(stream, chunk_size):
+    """Thuật toán cũ: bytes += chunk rồi find SOI/EOI từ đầu buffer."""
+    frames = 0
+    bytes_buffer = b""
+    for i in range(0, len(stream), chunk_size):
+        bytes_buffer += stream[i:i + chunk_size]
+        start = bytes_buffer.find(b"\xff\xd8")
+        end = bytes_buffer.find(b"\xff\xd9")
+        if start != -1 and end != -1 and end > start:
+            bytes_buffer = bytes_buffer[end + 2:]
+            frames += 1
+    return frames
+
+
+def parse(stream, chunk_size, boundary):
+    parser = MJPEGParser(boundary)
+    frames = 0
+    view = memoryview(stream)
+    for i in range(0, len(stream), chunk_size):
+        frames += len(parser.feed(view[i:i + chunk_size]))
+    return frames
+
+
+def bench(fn, stream, repeat):
+    best = float("inf")
+    frames = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        frames = fn(stream)
+        best = min(best, time.perf_counter() - t0)
+    return len(stream) / best / 1e6, frames
+
+
+def record(url, seconds, out):
+    import requests
+
+    response = requests.get(url, stream=True, timeout=5)
+    print("Content-Type:", response.headers.get("Content-Type"))
+    deadline = time.time() + seconds
+    total = 0
+    with open(out, "wb") as f:
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            f.write(chunk)
+            total += len(chunk)
+            if time.time() > deadline:
+                break
+    print(f"Recorded {total / 1e6:.1f} MB → {out}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", help="stream MJPEG đã ghi")
+    parser.add_argument("--boundary", help="boundary multipart của file")
+    parser.add_argument("--record", metavar="URL", help="ghi stream từ URL")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--out", default="stream.mjpeg")
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--chunks", default="1024,16384,65536")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record, args.seconds, args.out)
+        return
+
+    chunk_sizes = [int(c) for c in args.chunks.split(",")]
+
+    if args.file:
+        with open(args.file, "rb") as f:
+            streams = {"file": (f.read(), args.boundary.encode() if args.boundary else None)}
+    else:
+        thumb = make_jpeg(160, 120, seed=0)
+        frames = [
+            with_exif_thumbnail(make_jpeg(args.width, args.height, seed=i), thumb)
+            for i in range(args.frames)
+        ]
+        streams = {
+            mode: (build_stream(frames, mode), None if mode == "raw" else b"frame")
+            for mode in ("multipart-length", "multipart", "raw")
+        }
+
+    print(f"{'stream':>17} {'chunk':>7} {'MB/s':>9} {'frames':>7} {'legacy MB/s':>12} {'legacy frames':>14}")
+    for name, (stream, boundary) in streams.items():
+        for chunk in chunk_sizes:
+            mbps, frames = bench(lambda s: parse(s, chunk, boundary), stream, args.repeat)
+            legacy_mbps, legacy_frames = bench(lambda s: legacy_parse(s, chunk), stream, 1)
+            print(f"{name:>17} {chunk:>7} {mbps:>9.1f} {frames:>7} {legacy_mbps:>12.1f} {legacy_frames:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Đo jitter nhịp detect (khoảng cách giữa 2 frame detect liên tiếp) khi
+có tải web giả lập, so sánh không / có scheduling profile.
+
+    python -m benchmarks.bench_scheduling_jitter [--seconds 10] [--load-threads 4]
+    python -m benchmarks.bench_scheduling_jitter --profile '{"cpus": {"detect": [1]}, "nice": {"web": 10}}'
+
+Nguồn là video tổng hợp (VideoFileSource, phát realtime) → không cần
+camera. Tải web: các thread gọi scheduler.pin("web") rồi chạy từng đợt
+encode JPEG + json.dumps giống request stream / API dồn dập.
+
+Không truyền --profile → profile mặc định theo số core hiện có.
+"""
+
+import argparse
+import copy
+import json
+import os
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from app.core.camera import CameraPipeline
+from app.core.camera.scheduling import scheduler
+from app.core.config import config_service
+
+
+def make_video(path, seconds, fps=30, width=640, height=480):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (width, height))
+    for i in range(int(seconds * fps)):
+        frame = np.full((height, width, 3), 90, np.uint8)
+        x = int((i * 8) % (width - 60))
+        cv2.rectangle(frame, (x, 100), (x + 60, 160), (0, 0, 255), -1)
+        cv2.rectangle(frame, (width - x - 60, 300), (width - x, 360), (255, 0, 0), -1)
+        writer.write(frame)
+    writer.release()
+
+
+def default_profile():
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else [0]
+    n = len(cpus)
+
+    profile = {"enabled": True, "opencv_threads": max(1, min(2, n - 1)), "nice": {"web": 10}}
+    if n >= 4:
+        profile["cpus"] = {
+            "capture": [cpus[0]],
+            "detect": cpus[1:3],
+            "track": cpus[1:3],
+            "render": [cpus[3]],
+            "encode": [cpus[3]],
+            "web": [cpus[0], cpus[3]],
+        }
+    elif n >= 2:
+        profile["cpus"] = {"detect": [cpus[1]], "track": [cpus[1]], "web": [cpus[0]]}
+    return profile
+
+
+def web_load(stop, burst=0.2, idle=0.1):
+    """Giả lập thread request: từng đợt encode JPEG + serialize JSON."""
+    scheduler.pin("web")
+    frame = np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8)
+    payload = {"tracks": [{"id": i, "trajectory": [[i, j] for j in range(50)]} for i in range(50)]}
+
+    while not stop.is_set():
+        end = time.perf_counter() + burst
+        while time.perf_counter() < end:
+            cv2.imencode(".jpg", frame)
+            json.dumps(payload)
+        stop.wait(idle)
+
+
+def run(video, seconds, load_threads, det_fps, profile):
+    scheduler.configure(profile)
+
+    cfg = copy.copy(config_service.get_camera_config())
+    cfg.src = video
+    cfg.max_det_fps = det_fps
+    cfg.playback = {"mode": "realtime", "loop": True, "speed": 1.0}
+
+    stamps = []
+    pipeline = CameraPipeline(cfg)
+    pipeline.add_listener(lambda p: stamps.append(time.perf_counter()))
+    pipeline.add_viewer()     # bật render + encode như khi có người xem
+
+    stop = threading.Event()
+    loaders = [threading.Thread(target=web_load, args=(stop,), daemon=True) for _ in range(load_threads)]
+
+    pipeline.start()
+    time.sleep(1.0)           # warm-up
+    for t in loaders:
+        t.start()
+
+    stamps.clear()
+    time.sleep(seconds)
+
+    stop.set()
+    pipeline.stop()
+    for t in loaders:
+        t.join()
+
+    intervals = np.diff(np.array(stamps)) * 1000.0
+    expected = 1000.0 / min(det_fps, 30)
+    return {
+        "frames": len(stamps),
+        "p50": float(np.percentile(intervals, 50)) if len(intervals) else 0.0,
+        "p99": float(np.percentile(intervals, 99)) if len(intervals) else 0.0,
+        "max": float(intervals.max()) if len(intervals) else 0.0,
+        "jitter_p99": float(np.percentile(np.abs(intervals - expected), 99)) if len(intervals) else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--load-threads", type=int, default=4)
+    parser.add_argument("--det-fps", type=float, default=15.0)
+    parser.add_argument("--profile", type=str, default=None, help="JSON scheduling profile")
+    args = parser.parse_args()
+
+    profile = json.loads(args.profile) if args.profile else default_profile()
+    profile["enabled"] = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        video = os.path.join(tmp, "synthetic.avi")
+        make_video(video, seconds=10)
+
+        # Chạy không profile trước: thread đã ghim ở lần sau không ảnh hưởng lần trước
+        results = {
+            "default": run(video, args.seconds, args.load_threads, args.det_fps, {"enabled": False}),
+            "profile": run(video, args.seconds, args.load_threads, args.det_fps, profile),
+        }
+
+    print(f"Detection interval @ {args.det_fps:g} fps, {args.load_threads} web load threads, {args.seconds:g} s")
+    print(f"profile: {json.dumps(profile)}")
+    print(f"{'run':>8} {'frames':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'jitter p99':>11}")
+    for name, r in results.items():
+        print(f"{name:>8} {r['frames']:>7} {r['p50']:>8.1f} {r['p99']:>8.1f} {r['max']:>8.1f} {r['jitter_p99']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""
+Bộ micro-benchmark cho camera core, kết quả ra JSON để so giữa các commit.
+
+    # Chạy toàn bộ, lưu baseline của máy này
+    python -m benchmarks.bench_suite --save benchmarks/baselines/pi4.json
+
+    # Lần sau: so với baseline, exit 1 nếu có case chậm đi > 10%
+    python -m benchmarks.bench_suite --baseline benchmarks/baselines/pi4.json --fail-on-regression
+
+    # Chỉ chạy vài case (lọc theo tên), nhanh hơn
+    python -m benchmarks.bench_suite --only detect/640x480 --min-time 0.2
+
+Case (tên = "<nhóm>/<độ phân giải>/..."):
+    detect  ColorDetector.detect    độ phân giải x số màu (1/3/7) x số object (0/10/100)
+    track   Tracker.update          số object (0/10/50/100), object di chuyển mỗi frame
+    draw    DrawManager.render      độ phân giải x số object (0/10/100)
+    jpeg    cv2.imencode            độ phân giải x chất lượng (80/95)
+    mjpeg   MJPEGParser.feed        độ phân giải, stream multipart chunk 16 KB
+
+Mỗi case chạy tới khi đủ --min-time giây (ít nhất --min-iterations lần),
+báo ops/s và latency mean / p50 / p95 / p99 (ms). So baseline theo p50
+(ít bị ảnh hưởng bởi vài lần bị preempt hơn mean): tốc độ (p50 cũ / p50
+mới) giảm quá --threshold → REGRESSION, tăng quá → faster.
+
+Baseline phụ thuộc máy (Pi 4 ≠ laptop): mỗi máy giữ 1 file riêng, chỉ
+so các lần chạy trên cùng máy.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+
+import cv2
+import numpy as np
+
+from app.core.camera import ColorDetector, ColorObject, DrawManager, MJPEGParser, Tracker
+from app.core.config.color_config import ColorConfig
+from benchmarks.bench_draw_manager import build_tracker
+from benchmarks.bench_mjpeg_parser import build_stream, make_jpeg
+
+RESOLUTIONS = {
+    "320x240": (320, 240),
+    "640x480": (640, 480),
+    "1280x720": (1280, 720),
+    "1920x1080": (1920, 1080),
+}
+COLOR_COUNTS = (1, 3, 7)
+OBJECT_COUNTS = (0, 10, 100)
+TRACK_COUNTS = (0, 10, 50, 100)
+JPEG_QUALITIES = (80, 95)
+MJPEG_CHUNK = 16384
+
+
+# ---------------------------------------------------------------------------
+# Dữ liệu tổng hợp
+# ---------------------------------------------------------------------------
+
+def color_objects(n):
+    """n màu đầu tiên của bảng màu mặc định (tối đa 7)."""
+    return [
+        ColorObject(c["name"], c["lower"], c["upper"], c["bgr"], c["action_id"], c["duration_ms"])
+        for c in ColorConfig.DEFAULT[:n]
+    ]
+
+
+def fill_bgr(obj):
+    """Màu BGR nằm giữa dải HSV của ColorObject (chắc chắn detect được)."""
+    h = (int(obj.lower[0]) + int(obj.upper[0])) // 2
+    hsv = np.uint8([[[h, 220, 220]]])
+    return tuple(int(c) for c in cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)[0, 0])
+
+
+def synthetic_frame(width, height, objects, n_objects, seed=0):
+    """Nền băng chuyền xám có nhiễu + n_objects hình chữ nhật màu, không chồng nhau."""
+    rng = np.random.default_rng(seed)
+    frame = np.full((height, width, 3), 90, dtype=np.uint8)
+    frame += rng.integers(0, 20, frame.shape, dtype=np.uint8)
+
+    if n_objects and objects:
+        cols = int(np.ceil(np.sqrt(n_objects)))
+        cell_w, cell_h = width // cols, height // cols
+        colors = [fill_bgr(obj) for obj in objects]
+        for i in range(n_objects):
+            x = (i % cols) * cell_w + cell_w // 4
+            y = (i // cols) * cell_h + cell_h // 4
+            cv2.rectangle(frame, (x, y), (x + cell_w // 2, y + cell_h // 2), colors[i % len(colors)], -1)
+    return frame
+
+
+# ---------------------------------------------------------------------------
+# Đo
+# ---------------------------------------------------------------------------
+
+def measure(fn, min_time, min_iterations, warmup=3):
+    """Gọi fn() tới khi đủ min_time giây và min_iterations lần."""
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < min_iterations or time.perf_counter() - started < min_time:
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+
+    ms = np.array(samples) * 1000.0
+    return {
+        "iterations": len(samples),
+        "ops_per_s": round(len(samples) / float(np.sum(samples)), 2),
+        "mean_ms": round(float(np.mean(ms)), 4),
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(ms, 95)), 4),
+        "p99_ms": round(float(np.percentile(ms, 99)), 4),
+    }
+
+
+def cases(resolutions):
+    """(tên, hàm dựng fn) — dựng dữ liệu lười để --only không tốn thời gian."""
+
+    for res in resolutions:
+        width, height = RESOLUTIONS[res]
+        for n_colors in COLOR_COUNTS:
+            for n_objects in OBJECT_COUNTS:
+                def setup(width=width, height=height, n_colors=n_colors, n_objects=n_objects):
+                    objects = color_objects(n_colors)
+                    detector = ColorDetector(objects, min_area=50)
+                    frame = synthetic_frame(width, height, objects, n_objects)
+                    return lambda: detector.detect(frame)
+                yield f"detect/{res}/c{n_colors}/o{n_objects}", setup
+
+    for n_objects in TRACK_COUNTS:
+        def setup(n_objects=n_objects):
+            objects = color_objects(7)
+            tracker = Tracker(max_lost=15, max_history=20, match_dist=40)
+            step = [0]
+
+            def fn():
+                step[0] += 1
+                boxes = [((i % 10) * 60 + step[0] % 50, (i // 10) * 45, 20, 20) for i in range(n_objects)]
+                tracker.update(boxes, [objects[i % 7] for i in range(n_objects)])
+            return fn
+        yield f"track/o{n_objects}", setup
+
+    for res in resolutions:
+        width, height = RESOLUTIONS[res]
+        for n_objects in OBJECT_COUNTS:
+            def setup(width=width, height=height, n_objects=n_objects):
+                tracker, tracked = build_tracker(n_objects, width, height) if n_objects else (Tracker(), [])
+                drawer = DrawManager(tracker=tracker, show_fps=True)
+                base = synthetic_frame(width, height, [], 0)
+                frame = base.copy()
+
+                def fn():
+                    np.copyto(frame, base)
+                    drawer.render(frame, tracked, fps=30.0)
+                return fn
+            yield f"draw/{res}/o{n_objects}", setup
+
+    for res in resolutions:
+        width, height = RESOLUTIONS[res]
+        for quality in JPEG_QUALITIES:
+            def setup(width=width, height=height, quality=quality):
+                frame = synthetic_frame(width, height, color_objects(7), 10)
+                params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+                return lambda: cv2.imencode(".jpg", frame, params)
+            yield f"jpeg/{res}/q{quality}", setup
+
+    for res in resolutions:
+        width, height = RESOLUTIONS[res]
+
+        def setup(width=width, height=height):
+            stream = memoryview(build_stream([make_jpeg(width, height, seed=i) for i in range(10)], "multipart"))
+
+            def fn():
+                # 1 op = parse 10 frame
+                parser = MJPEGParser(b"frame")
+                for i in range(0, len(stream), MJPEG_CHUNK):
+                    parser.feed(stream[i:i + MJPEG_CHUNK])
+            return fn
+        yield f"mjpeg/{res}/10frames", setup
+
+
+# ---------------------------------------------------------------------------
+# Baseline
+# ---------------------------------------------------------------------------
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "machine": platform.machine(),
+        "node": platform.node(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "opencv_threads": cv2.getNumThreads(),
+    }
+
+
+def compare(results, baseline, threshold):
+    """{tên: (tốc độ mới / cũ theo p50, trạng thái)} cho các case có trong cả 2."""
+    verdicts = {}
+    for name, result in results.items():
+        old = baseline.get(name)
+        if not old or not old.get("p50_ms") or not result["p50_ms"]:
+            continue
+        ratio = old["p50_ms"] / result["p50_ms"]
+        if ratio < 1.0 - threshold:
+            status = "REGRESSION"
+        elif ratio > 1.0 + threshold:
+            status = "faster"
+        else:
+            status = "ok"
+        verdicts[name] = (ratio, status)
+    return verdicts
+
+
+# ---------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", action="append", default=[], help="chỉ chạy case có tên chứa chuỗi này (lặp được)")
+    parser.add_argument("--resolutions", default=",".join(RESOLUTIONS), help="vd. 320x240,640x480")
+    parser.add_argument("--min-time", type=float, default=0.5, help="giây đo tối thiểu mỗi case")
+    parser.add_argument("--min-iterations", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=None, help="cv2.setNumThreads trước khi đo")
+    parser.add_argument("--save", metavar="JSON", help="ghi kết quả (baseline mới)")
+    parser.add_argument("--baseline", metavar="JSON", help="so với baseline đã lưu")
+    parser.add_argument("--threshold", type=float, default=0.10, help="ngưỡng tốc độ p50 (0.10 = 10%%)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit 1 nếu có REGRESSION")
+    args = parser.parse_args()
+
+    if args.threads is not None:
+        cv2.setNumThreads(args.threads)
+
+    resolutions = [r for r in args.resolutions.split(",") if r in RESOLUTIONS]
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    env = environment()
+    print(f"commit {env['commit']}, {env['machine']} x{env['cpu_count']}, "
+          f"OpenCV {env['opencv']} ({env['opencv_threads']} threads)")
+    if baseline:
+        old = baseline.get("environment", {})
+        print(f"baseline: commit {old.get('commit')}, {old.get('time')}")
+
+    print(f"{'case':<32} {'ops/s':>10} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+          + (f" {'vs base':>8}" if baseline else ""))
+
+    results = {}
+    for name, setup in cases(resolutions):
+        if args.only and not any(pattern in name for pattern in args.only):
+            continue
+        r = results[name] = measure(setup(), args.min_time, args.min_iterations)
+
+        line = (f"{name:<32} {r['ops_per_s']:>10.1f} {r['mean_ms']:>9.3f} {r['p50_ms']:>9.3f} "
+                f"{r['p95_ms']:>9.3f} {r['p99_ms']:>9.3f}")
+        if baseline:
+            verdict = compare({name: r}, baseline.get("results", {}), args.threshold).get(name)
+            if verdict:
+                ratio, status = verdict
+                line += f" {(ratio - 1) * 100:>+7.1f}%" + ("" if status == "ok" else f"  {status}")
+            else:
+                line += f" {'new':>8}"
+        print(line, flush=True)
+
+    regressions = []
+    if baseline:
+        verdicts = compare(results, baseline.get("results", {}), args.threshold)
+        regressions = [name for name, (_, status) in verdicts.items() if status == "REGRESSION"]
+        faster = [name for name, (_, status) in verdicts.items() if status == "faster"]
+        print(f"\n{len(verdicts)} compared, {len(regressions)} regressions, {len(faster)} faster "
+              f"(threshold {args.threshold:.0%})")
+        for name in regressions:
+            print(f"  REGRESSION {name}: {verdicts[name][0]:.2f}x speed (p50)")
+
+    if args.save:
+        out_dir = os.path.dirname(args.save)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump({"environment": env, "results": results}, f, indent=2)
+        print(f"Saved {len(results)} results → {args.save}")
+
+    if regressions and args.fail_on_regression:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Cây sysfs giả (thermal zone + cpufreq) để thử ThermalGovernor trên máy
+không phải Pi.
+
+    python -m benchmarks.fake_sysfs --demo [--cpus 4] [--peak 84]
+
+--demo: tăng nhiệt độ từ 60°C tới --peak rồi hạ lại, in bậc giảm tải
+và tham số pipeline (FPS stream, overlay, scale detect) ở mỗi lần đo.
+
+Kiểm tra thứ tự giảm tải / hysteresis: test_thermal_governor.py.
+
+Dùng với app: tạo cây bằng FakeSysfs(root) rồi đặt
+"thermal": {"sysfs_root": "<root>"} trong config_camera.json.
+"""
+
+import argparse
+import os
+import tempfile
+
+from app.core.config.camera_config import CameraConfig
+from app.core.thermal import THROTTLE_C, ThermalGovernor, ThermalSensors
+
+
+class FakeSysfs:
+    """<root>/class/thermal/thermal_zone0 + <root>/devices/system/cpu/cpuN/cpufreq."""
+
+    def __init__(self, root, cpus=4, zone_type="cpu-thermal", max_khz=1800000):
+        self.root = root
+        self.cpus = cpus
+        self.zone = os.path.join(root, "class", "thermal", "thermal_zone0")
+        os.makedirs(self.zone, exist_ok=True)
+        self._write(os.path.join(self.zone, "type"), zone_type)
+
+        for cpu in range(cpus):
+            path = self._cpufreq(cpu)
+            os.makedirs(path, exist_ok=True)
+            self._write(os.path.join(path, "cpuinfo_max_freq"), max_khz)
+        self.set_temp(45.0)
+        self.set_freq(max_khz)
+
+    def _cpufreq(self, cpu):
+        return os.path.join(self.root, "devices", "system", "cpu", f"cpu{cpu}", "cpufreq")
+
+    @staticmethod
+    def _write(path, value):
+        with open(path, "w") as f:
+            f.write(f"{value}\n")
+
+    def set_temp(self, celsius):
+        self._write(os.path.join(self.zone, "temp"), int(celsius * 1000))
+
+    def set_freq(self, khz, cpu=None):
+        for n in range(self.cpus) if cpu is None else [cpu]:
+            self._write(os.path.join(self._cpufreq(n), "scaling_cur_freq"), int(khz))
+
+
+class StubPipeline:
+    """Chỉ các thuộc tính / setter ThermalGovernor dùng."""
+
+    def __init__(self, det_scale=1):
+        self.det_scale = det_scale
+        self.det_scale_floor = 1
+        self.stream_max_fps = None
+        self.overlays_enabled = True
+
+    def set_stream_fps(self, fps):
+        self.stream_max_fps = fps
+
+    def set_overlays(self, enabled):
+        self.overlays_enabled = enabled
+
+    def set_detection_scale_floor(self, scale):
+        self.det_scale_floor = scale
+
+
+def demo(cpus, peak):
+    config = dict(CameraConfig.DEFAULT["thermal"], interval_s=1)
+    pipeline = StubPipeline()
+
+    with tempfile.TemporaryDirectory() as root:
+        fake = FakeSysfs(root, cpus=cpus)
+        governor = ThermalGovernor(ThermalSensors(root), config, lambda: pipeline)
+
+        ramp = list(range(60, int(peak) + 1, 2))
+        print(f"{'temp':>6} {'MHz':>6} {'level':>5} {'stream_fps':>10} {'overlay':>7} {'scale':>5}")
+        for temp in ramp + ramp[::-1]:
+            fake.set_temp(temp)
+            # Từ ngưỡng throttle mềm của Pi firmware hạ tần số
+            fake.set_freq(1800000 if temp < THROTTLE_C else 1500000)
+            level = governor.step()
+            mhz = next(iter(governor.sensors.frequencies().values()))[0] / 1e6
+            print(
+                f"{temp:>6} {mhz:>6.0f} {level:>5} {str(pipeline.stream_max_fps):>10} "
+                f"{str(pipeline.overlays_enabled):>7} {pipeline.det_scale_floor:>5}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--demo", action="store_true", help="run a temperature ramp against ThermalGovernor")
+    parser.add_argument("--root", help="create the fake tree here (kept) instead of printing the demo")
+    parser.add_argument("--cpus", type=int, default=4)
+    parser.add_argument("--peak", type=float, default=84.0)
+    parser.add_argument("--temp", type=float, default=45.0, help="initial temperature for --root")
+    args = parser.parse_args()
+
+    if args.root:
+        FakeSysfs(args.root, cpus=args.cpus).set_temp(args.temp)
+        print(f"Fake sysfs at {args.root} ({args.temp}°C); set \"sysfs_root\" to this path")
+    elif args.demo:
+        demo(args.cpus, args.peak)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+Chấm điểm detect + track trên cảnh băng chuyền tổng hợp (synthetic://)
+so với ground truth của từng frame.
+
+    python -m benchmarks.score_synthetic [--url synthetic://conveyor?...] [--frames 1800]
+    python -m benchmarks.score_synthetic --pipeline --seconds 20
+
+Mặc định (offline): ColorDetector → Tracker chạy tuần tự trên từng frame
+với ManualClock (như app.core.camera.batch), đo throughput thuần.
+--pipeline: chạy CameraPipeline thật với nguồn synthetic:// (nhịp camera,
+bỏ frame, detect thread...), đối chiếu snapshot qua camera_seq.
+
+Detector / tracker dùng config hiện tại (config_camera.json, colors.json);
+màu của cảnh không có trong colors.json được liệt kê ở "unconfigured_colors"
+(vẫn tính vào recall).
+
+Chỉ số:
+    recall     vật "bắt buộc" (visible >= --min-visible, diện tích nhìn
+               thấy >= min_area) được detect đúng màu
+    precision  detection khớp vật / (khớp + false positive)
+    id_switch  track ID khớp với 1 vật đổi so với lần khớp trước
+    frag       số track ID trung bình / vật
+
+Khớp: tham lam theo IoU, 1-1, cùng màu, tâm detection nằm trong box vật.
+Detection thừa nằm trong box của vật cùng màu (vật bị thanh chắn cắt đôi,
+vật chưa bắt buộc) không tính false positive.
+"""
+
+import argparse
+import json
+import time
+from collections import defaultdict
+
+import cv2
+
+from app.core.camera.clock import ManualClock
+from app.core.camera.color_detector import ColorDetector
+from app.core.camera.color_object import ColorObject
+from app.core.camera.file_source import open_file_source
+from app.core.camera.tracker import Tracker
+from app.core.config import config_service
+
+DEFAULT_URL = "synthetic://conveyor?rate=1.5&speed=150&occlusion=1&seed=7&colors=red,blue,yellow"
+
+
+def _iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = min(ax + aw, bx + bw) - max(ax, bx)
+    ih = min(ay + ah, by + bh) - max(ay, by)
+    if iw <= 0 or ih <= 0:
+        return 0.0
+    inter = iw * ih
+    return inter / float(aw * ah + bw * bh - inter)
+
+
+def _inside(box, point):
+    x, y, w, h = box
+    return x <= point[0] <= x + w and y <= point[1] <= y + h
+
+
+class Scorer:
+    """Cộng dồn TP / FN / FP / ID switch qua các frame."""
+
+    def __init__(self, min_visible=0.5, min_area=0):
+        self.min_visible = min_visible
+        self.min_area = min_area
+        self.frames = 0
+        self.tp = self.fn = self.fp = 0
+        self.id_switches = 0
+        self.per_color = defaultdict(lambda: [0, 0])    # color → [tp, required]
+        self._last_track = {}                           # truth id → track id
+        self._tracks = defaultdict(set)                 # truth id → {track id}
+
+    def add(self, truth, detections):
+        """
+        truth     : ConveyorScene.truth(index)
+        detections: [((x, y, w, h), color, track_id)]
+        """
+        self.frames += 1
+
+        pairs = []
+        for di, (box, color, _) in enumerate(detections):
+            center = (box[0] + box[2] / 2, box[1] + box[3] / 2)
+            for ti, obj in enumerate(truth):
+                if obj["color"] == color and _inside(obj["box"], center):
+                    pairs.append((_iou(box, obj["box"]), di, ti))
+
+        matched_det, matched_truth = {}, {}
+        for _, di, ti in sorted(pairs, key=lambda p: (-p[0], p[1], p[2])):
+            if di in matched_det or ti in matched_truth:
+                continue
+            matched_det[di] = ti
+            matched_truth[ti] = di
+
+        for ti, obj in enumerate(truth):
+            required = obj["visible"] >= self.min_visible and obj["area"] >= self.min_area
+            di = matched_truth.get(ti)
+            if required:
+                self.per_color[obj["color"]][1] += 1
+                if di is None:
+                    self.fn += 1
+                else:
+                    self.tp += 1
+                    self.per_color[obj["color"]][0] += 1
+
+            track_id = detections[di][2] if di is not None else None
+            if track_id is not None:
+                last = self._last_track.get(obj["id"])
+                if last is not None and last != track_id:
+                    self.id_switches += 1
+                self._last_track[obj["id"]] = track_id
+                self._tracks[obj["id"]].add(track_id)
+
+        # Detection thừa trong box vật cùng màu → bỏ qua, còn lại là FP
+        in_any = {di for _, di, _ in pairs}
+        for di in range(len(detections)):
+            if di not in matched_det and di not in in_any:
+                self.fp += 1
+
+    def result(self):
+        tracked = [len(ids) for ids in self._tracks.values()]
+        return {
+            "frames": self.frames,
+            "tp": self.tp, "fn": self.fn, "fp": self.fp,
+            "recall": round(self.tp / max(1, self.tp + self.fn), 4),
+            "precision": round(self.tp / max(1, self.tp + self.fp), 4),
+            "id_switches": self.id_switches,
+            "objects": len(tracked),
+            "fragmentation": round(sum(tracked) / max(1, len(tracked)), 3),
+            "recall_by_color": {
+                color: round(tp / max(1, req), 4) for color, (tp, req) in sorted(self.per_color.items())
+            },
+        }
+
+
+# ---------------------------------------------------------------------------
+
+
+def _detector(cfg):
+    colors = [
+        ColorObject(c["name"], c["lower"], c["upper"], c["bgr"], c["action_id"], c["duration_ms"])
+        for c in config_service.get_color_config().colors
+    ]
+    return ColorDetector(colors, min_area=cfg.min_area)
+
+
+def run_offline(url, frames, scale, min_visible):
+    cfg = config_service.get_camera_config()
+    detector = _detector(cfg)
+    clock = ManualClock()
+    tracker = Tracker(cfg.max_lost, cfg.max_history, cfg.match_dist, clock=clock)
+
+    source = open_file_source(url)
+    if source is None or not source.open():
+        raise SystemExit(f"Cannot open {url}")
+
+    scorer = Scorer(min_visible, cfg.min_area)
+    busy = 0.0
+    for index, t, frame in source.iter_frames(0, frames):
+        clock.set(t)
+
+        start = time.perf_counter()
+        image = frame
+        if scale != 1:
+            h, w = frame.shape[:2]
+            image = cv2.resize(frame, ((w + scale - 1) // scale, (h + scale - 1) // scale),
+                               interpolation=cv2.INTER_AREA)
+        detections = detector.detect(image, scale=scale)
+        tracked = tracker.update(
+            [(x, y, w, h) for x, y, w, h, _ in detections],
+            [obj for _, _, _, _, obj in detections],
+        )
+        busy += time.perf_counter() - start
+
+        scorer.add(source.scene.truth(index), [
+            ((x, y, w, h), obj.name, tracked[i][0] if i < len(tracked) else None)
+            for i, (x, y, w, h, obj) in enumerate(detections)
+        ])
+
+    result = scorer.result()
+    result["mode"] = "offline"
+    result["fps"] = round(scorer.frames / busy, 1) if busy else 0.0
+    result["ms_per_frame"] = round(busy * 1000 / max(1, scorer.frames), 3)
+    source.close()
+    return result
+
+
+def run_pipeline(url, seconds, min_visible):
+    from app.core.camera.pipeline import CameraPipeline
+
+    cfg = config_service.get_camera_config()
+    cfg.src = url
+    pipeline = CameraPipeline(cfg)
+    source = pipeline.camera.source
+    if source is None or not hasattr(source, "truth_for_seq"):
+        raise SystemExit(f"{url} is not a synthetic source")
+
+    scorer = Scorer(min_visible, cfg.min_area)
+    missing = 0
+    pipeline.start()
+    start = time.monotonic()
+    last_seq = 0
+    try:
+        while time.monotonic() - start < seconds:
+            snap = pipeline.wait_tracks(last_seq, timeout=1.0)
+            if snap.seq == last_seq:
+                continue
+            last_seq = snap.seq
+
+            truth = source.truth_for_seq(snap.camera_seq)
+            if truth is None:
+                missing += 1
+                continue
+            scorer.add(truth, [
+                ((d["x"], d["y"], d["w"], d["h"]), d["name"], d["track_id"])
+                for d in snap.detections
+            ])
+    finally:
+        elapsed = time.monotonic() - start
+        pipeline.stop()
+
+    result = scorer.result()
+    result.update({
+        "mode": "pipeline",
+        "seconds": round(elapsed, 2),
+        "fps": round(pipeline.frames_processed / elapsed, 1) if elapsed else 0.0,
+        "frames_dropped": pipeline.frames_dropped,
+        "unmatched_snapshots": missing,
+    })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=DEFAULT_URL, help="nguồn synthetic://conveyor?...")
+    parser.add_argument("--frames", type=int, default=1800, help="số frame (offline)")
+    parser.add_argument("--scale", type=int, default=None, help="scale detect (offline, mặc định theo config)")
+    parser.add_argument("--pipeline", action="store_true", help="chạy CameraPipeline thật")
+    parser.add_argument("--seconds", type=float, default=20.0, help="thời gian chạy (--pipeline)")
+    parser.add_argument("--min-visible", type=float, default=0.5, help="tỉ lệ nhìn thấy tối thiểu để bắt buộc detect")
+    parser.add_argument("--json", metavar="PATH", help="ghi kết quả ra file JSON")
+    args = parser.parse_args()
+
+    if args.pipeline:
+        result = run_pipeline(args.url, args.seconds, args.min_visible)
+    else:
+        scale = args.scale or config_service.get_camera_config().det_scale
+        result = run_offline(args.url, args.frames, scale, args.min_visible)
+    result["url"] = args.url
+
+    configured = {c["name"] for c in config_service.get_color_config().colors}
+    scene = getattr(open_file_source(args.url), "scene", None)
+    missing = [name for name, _ in scene.colors if name not in configured] if scene else []
+    if missing:
+        result["unconfigured_colors"] = missing
+
+    for key, value in result.items():
+        print(f"{key:>20}: {value}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
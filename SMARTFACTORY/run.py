@@ -6,12 +6,13 @@ Smart Factory Control System (Development)
 
 import os
 from dotenv import load_dotenv
-from app import create_app
-from app.logging_config import init_logger
 
-# Load environment variables from .env
+# Load environment variables from .env (trước khi import app → LOG_* có hiệu lực)
 load_dotenv()
 
+from app import create_app
+from app.logging_config import init_logger
+
 # Initialize logger (shared across project)
 logger = init_logger("SmartFactory")
 
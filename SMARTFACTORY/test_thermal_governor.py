@@ -0,0 +1,144 @@
+# test_thermal_governor.py
+"""
+ThermalGovernor trên cây sysfs giả (benchmarks/fake_sysfs.py):
+thứ tự giảm tải FPS stream → overlay → scale detect, hysteresis,
+mỗi lần đo chỉ đổi 1 bậc.
+
+    python test_thermal_governor.py      (hoặc python -m pytest test_thermal_governor.py)
+"""
+
+import tempfile
+
+from app.core.config.camera_config import CameraConfig
+from app.core.thermal import THROTTLE_C, ThermalGovernor, ThermalSensors
+from benchmarks.fake_sysfs import FakeSysfs, StubPipeline
+
+CONFIG = {"levels_c": [65, 70, 75], "hysteresis_c": 5, "interval_s": 1, "stream_fps": 10}
+
+
+def make_governor(root, pipeline, temp=45.0, config=CONFIG):
+    fake = FakeSysfs(root)
+    fake.set_temp(temp)
+    governor = ThermalGovernor(ThermalSensors(root), config, lambda: pipeline)
+    return fake, governor
+
+
+def state(pipeline):
+    return pipeline.stream_max_fps, pipeline.overlays_enabled, pipeline.det_scale_floor
+
+
+def drive(fake, governor, temps):
+    """Đặt lần lượt từng nhiệt độ, đo 1 lần → [level sau mỗi lần đo]."""
+    levels = []
+    for temp in temps:
+        fake.set_temp(temp)
+        levels.append(governor.step())
+    return levels
+
+
+# ---------------------------------------------------------------------------
+
+def test_shedding_order():
+    pipeline = StubPipeline()
+    with tempfile.TemporaryDirectory() as root:
+        fake, governor = make_governor(root, pipeline)
+
+        assert drive(fake, governor, [60]) == [0]
+        assert state(pipeline) == (None, True, 1)
+
+        assert drive(fake, governor, [66]) == [1]
+        assert state(pipeline) == (10, True, 1)         # 1. FPS stream
+
+        assert drive(fake, governor, [71]) == [2]
+        assert state(pipeline) == (10, False, 1)        # 2. overlay
+
+        assert drive(fake, governor, [76]) == [3]
+        assert state(pipeline) == (10, False, 2)        # 3. scale detect x2
+
+
+def test_shed_scale_doubles_configured_scale():
+    pipeline = StubPipeline(det_scale=2)
+    with tempfile.TemporaryDirectory() as root:
+        fake, governor = make_governor(root, pipeline)
+        drive(fake, governor, [80, 80, 80])
+        assert governor.level == 3
+        assert pipeline.det_scale_floor == 4
+
+
+def test_one_level_per_sample():
+    pipeline = StubPipeline()
+    with tempfile.TemporaryDirectory() as root:
+        fake, governor = make_governor(root, pipeline)
+
+        # Nhảy thẳng lên 90°C → vẫn lên từng bậc
+        assert drive(fake, governor, [90, 90, 90, 90]) == [1, 2, 3, 3]
+        # Nguội hẳn → trả từng bậc
+        assert drive(fake, governor, [40, 40, 40, 40]) == [2, 1, 0, 0]
+        assert state(pipeline) == (None, True, 1)
+
+
+def test_hysteresis():
+    pipeline = StubPipeline()
+    with tempfile.TemporaryDirectory() as root:
+        fake, governor = make_governor(root, pipeline)
+        drive(fake, governor, [76, 76, 76])
+        assert governor.level == 3
+
+        # Bậc i chỉ trả khi < levels_c[i-1] - hysteresis_c
+        assert drive(fake, governor, [72, 70]) == [3, 3]
+        assert drive(fake, governor, [69, 66]) == [2, 2]
+        assert drive(fake, governor, [64, 61]) == [1, 1]
+        assert drive(fake, governor, [59]) == [0]
+
+        # Dao động quanh ngưỡng không bật / tắt liên tục
+        assert drive(fake, governor, [65, 63, 66, 62]) == [1, 1, 1, 1]
+
+
+def test_change_callbacks():
+    pipeline = StubPipeline()
+    changes = []
+    with tempfile.TemporaryDirectory() as root:
+        fake, governor = make_governor(root, pipeline)
+        governor.on_change(changes.append)
+        drive(fake, governor, [66, 66, 40])
+
+    assert [(c["from"], c["to"]) for c in changes] == [(0, 1), (1, 0)]
+    assert [c["temperature_c"] for c in changes] == [66.0, 40.0]
+
+
+def test_no_pipeline_then_new_pipeline():
+    with tempfile.TemporaryDirectory() as root:
+        current = {"pipeline": None}
+        fake = FakeSysfs(root)
+        governor = ThermalGovernor(ThermalSensors(root), CONFIG, lambda: current["pipeline"])
+
+        drive(fake, governor, [76, 76, 76])
+        assert governor.level == 3
+
+        # Pipeline start sau khi đã nóng → lần đo kế tiếp áp ngay bậc hiện tại
+        current["pipeline"] = pipeline = StubPipeline()
+        drive(fake, governor, [76])
+        assert state(pipeline) == (10, False, 2)
+
+
+def test_missing_thermal_zone():
+    pipeline = StubPipeline()
+    with tempfile.TemporaryDirectory() as root:
+        governor = ThermalGovernor(ThermalSensors(root), CONFIG, lambda: pipeline)
+        assert governor.step() == 0
+        assert governor.temperature is None
+        assert state(pipeline) == (None, True, 1)
+
+
+def test_default_levels_below_throttle():
+    levels = CameraConfig.DEFAULT["thermal"]["levels_c"]
+    assert levels == sorted(levels)
+    assert max(levels) < THROTTLE_C
+
+
+if __name__ == "__main__":
+    tests = [(name, fn) for name, fn in sorted(globals().items()) if name.startswith("test_")]
+    for name, fn in tests:
+        fn()
+        print(f"[Test] {name}: OK")
+    print(f"[Test] {len(tests)} passed")